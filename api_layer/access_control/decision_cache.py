@@ -0,0 +1,85 @@
+from typing import Any, Dict, Hashable, Optional, Tuple
+from collections import OrderedDict
+from datetime import datetime
+import time
+
+_MISSING = object()
+
+class DecisionCache:
+    """Bounded in-process cache with per-entry TTL and LRU eviction."""
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: float = 30.0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Bumped on every invalidation so lookups that raced a write are not cached
+        self.version = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key, or default if missing or expired."""
+        entry = self._entries.get(key, _MISSING)
+        if entry is _MISSING:
+            self.misses += 1
+            return default
+
+        value, deadline = entry
+        if deadline <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return default
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self,
+            key: Hashable,
+            value: Any,
+            ttl_seconds: Optional[float] = None,
+            expires_at: Optional[datetime] = None,
+            version: Optional[int] = None) -> None:
+        """Cache a value for at most ttl_seconds, and never past expires_at (naive UTC).
+
+        If version is given and the cache has been invalidated since it was read,
+        the value is considered stale and is not stored.
+        """
+        if self.max_size <= 0 or (version is not None and version != self.version):
+            return
+
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        if expires_at is not None:
+            ttl = min(ttl, (expires_at - datetime.utcnow()).total_seconds())
+        if ttl <= 0:
+            self._entries.pop(key, None)
+            return
+
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a single cached entry."""
+        self.version += 1
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop all cached entries."""
+        self.version += 1
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss/eviction counters for sizing the cache."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
@@ -1,46 +1,84 @@
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
+import hashlib
 import jwt
 from fastapi import HTTPException, Security
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from supabase import create_client, Client
 import os
 from dotenv import load_dotenv
+from vault.backend.data_access import DataAccess, get_data_access, parse_timestamp
+from api_layer.access_control.decision_cache import DecisionCache
+from api_layer.monetization.usage_writer import UsageLogWriter
 
 load_dotenv()
 
 class Gatekeeper:
     """Gatekeeper agent for managing access control and permissions."""
     
-    def __init__(self):
-        self.supabase: Client = create_client(
-            os.getenv("SUPABASE_URL"),
-            os.getenv("SUPABASE_KEY")
-        )
+    def __init__(self, data_access: Optional[DataAccess] = None):
+        self.db = (data_access or get_data_access()).for_module(__name__)
         self.security = HTTPBearer()
         self.jwt_secret = os.getenv("JWT_SECRET")
+        # Encode the HMAC key once instead of on every decode
+        self._jwt_key = self.jwt_secret.encode() if self.jwt_secret else self.jwt_secret
+        self._jwt_algorithms = ["HS256"]
+        # Opt-in: verified tokens are cached by digest, never past their own exp
+        self.token_cache = DecisionCache(
+            max_size=int(os.getenv("GATEKEEPER_TOKEN_CACHE_SIZE", "0")),
+            ttl_seconds=float(os.getenv("GATEKEEPER_TOKEN_CACHE_TTL", "300"))
+        )
+        self.decision_cache = DecisionCache(
+            max_size=int(os.getenv("GATEKEEPER_CACHE_SIZE", "10000")),
+            ttl_seconds=float(os.getenv("GATEKEEPER_CACHE_TTL", "30"))
+        )
+        self.usage_writer = UsageLogWriter(
+            self.db,
+            batch_size=int(os.getenv("USAGE_LOG_BATCH_SIZE", "500")),
+            flush_interval=float(os.getenv("USAGE_LOG_FLUSH_INTERVAL", "1.0")),
+            max_queue_size=int(os.getenv("USAGE_LOG_QUEUE_SIZE", "10000")),
+            spill_path=os.getenv("USAGE_LOG_SPILL_PATH", "usage_logs.spill.{pid}.ndjson")
+        )
     
     async def verify_token(self, credentials: HTTPAuthorizationCredentials = Security(HTTPBearer())) -> Dict[str, Any]:
         """Verify JWT token and return user information."""
+        token = credentials.credentials
+        if self.token_cache.max_size > 0:
+            digest = hashlib.sha256(token.encode()).digest()
+            cached = self.token_cache.get(digest)
+            if cached is not None:
+                return dict(cached)
+        
         try:
-            token = credentials.credentials
-            payload = jwt.decode(token, self.jwt_secret, algorithms=["HS256"])
-            return payload
+            payload = jwt.decode(token, self._jwt_key, algorithms=self._jwt_algorithms)
         except jwt.ExpiredSignatureError:
             raise HTTPException(status_code=401, detail="Token has expired")
-        except jwt.JWTError:
+        except jwt.InvalidTokenError:
             raise HTTPException(status_code=401, detail="Invalid token")
+        
+        if self.token_cache.max_size > 0:
+            exp = payload.get("exp")
+            expires_at = datetime.utcfromtimestamp(exp) if isinstance(exp, (int, float)) else None
+            self.token_cache.set(digest, dict(payload), expires_at=expires_at)
+        return payload
     
     async def check_permission(self, user_id: str, resource: str, action: str) -> bool:
         """Check if user has permission for specific resource and action."""
-        result = self.supabase.table("permissions")\
+        key = ("permission", user_id, resource, action)
+        cached = self.decision_cache.get(key)
+        if cached is not None:
+            return cached
+        version = self.decision_cache.version
+        
+        result = await self.db.table("permissions")\
             .select("*")\
             .eq("user_id", user_id)\
             .eq("resource", resource)\
             .eq("action", action)\
             .execute()
         
-        return len(result.data) > 0
+        allowed = len(result.data) > 0
+        self.decision_cache.set(key, allowed, version=version)
+        return allowed
     
     async def grant_permission(self, user_id: str, resource: str, action: str, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Grant permission to user."""
@@ -52,23 +90,25 @@ class Gatekeeper:
             "created_at": datetime.utcnow().isoformat()
         }
         
-        result = self.supabase.table("permissions").insert(permission).execute()
+        result = await self.db.table("permissions").insert(permission).execute()
+        self.decision_cache.invalidate(("permission", user_id, resource, action))
         return result.data[0]
     
     async def revoke_permission(self, user_id: str, resource: str, action: str) -> bool:
         """Revoke permission from user."""
-        result = self.supabase.table("permissions")\
+        result = await self.db.table("permissions")\
             .delete()\
             .eq("user_id", user_id)\
             .eq("resource", resource)\
             .eq("action", action)\
             .execute()
         
+        self.decision_cache.invalidate(("permission", user_id, resource, action))
         return len(result.data) > 0
     
     async def list_permissions(self, user_id: str) -> List[Dict[str, Any]]:
         """List all permissions for a user."""
-        result = self.supabase.table("permissions")\
+        result = await self.db.table("permissions")\
             .select("*")\
             .eq("user_id", user_id)\
             .execute()
@@ -85,12 +125,19 @@ class Gatekeeper:
             "created_at": datetime.utcnow().isoformat()
         }
         
-        result = self.supabase.table("consents").insert(consent).execute()
+        result = await self.db.table("consents").insert(consent).execute()
+        self.decision_cache.invalidate(("consent", user_id, data_type, purpose))
         return result.data[0]
     
     async def check_consent(self, user_id: str, data_type: str, purpose: str) -> bool:
         """Check if user has given consent."""
-        result = self.supabase.table("consents")\
+        key = ("consent", user_id, data_type, purpose)
+        cached = self.decision_cache.get(key)
+        if cached is not None:
+            return cached
+        version = self.decision_cache.version
+        
+        result = await self.db.table("consents")\
             .select("*")\
             .eq("user_id", user_id)\
             .eq("data_type", data_type)\
@@ -98,21 +145,39 @@ class Gatekeeper:
             .gt("expires_at", datetime.utcnow().isoformat())\
             .execute()
         
-        return len(result.data) > 0
+        if not result.data:
+            self.decision_cache.set(key, False, version=version)
+            return False
+        
+        # Never serve a granted consent from cache past its own expiry
+        expires_at = max(parse_timestamp(row["expires_at"]) for row in result.data)
+        self.decision_cache.set(key, True, expires_at=expires_at, version=version)
+        return True
     
     async def revoke_consent(self, user_id: str, data_type: str, purpose: str) -> bool:
         """Revoke user consent."""
-        result = self.supabase.table("consents")\
+        result = await self.db.table("consents")\
             .delete()\
             .eq("user_id", user_id)\
             .eq("data_type", data_type)\
             .eq("purpose", purpose)\
             .execute()
         
+        self.decision_cache.invalidate(("consent", user_id, data_type, purpose))
         return len(result.data) > 0
     
+    def cache_stats(self) -> Dict[str, Any]:
+        """Return decision cache counters, with the token cache's under "tokens"."""
+        return {
+            **self.decision_cache.stats(),
+            "tokens": self.token_cache.stats()
+        }
+    
     async def track_usage(self, user_id: str, resource: str, action: str, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        """Track resource usage for attribution and billing."""
+        """Track resource usage for attribution and billing.
+        
+        The event is queued for a bulk insert; call shutdown() on exit to flush it.
+        """
         usage = {
             "user_id": user_id,
             "resource": resource,
@@ -121,5 +186,13 @@ class Gatekeeper:
             "timestamp": datetime.utcnow().isoformat()
         }
         
-        result = self.supabase.table("usage_logs").insert(usage).execute()
-        return result.data[0] 
\ No newline at end of file
+        await self.usage_writer.enqueue(usage)
+        return usage
+    
+    async def shutdown(self) -> None:
+        """Flush buffered usage logs; call on graceful exit."""
+        await self.usage_writer.close()
+    
+    def register_shutdown(self, app: Any) -> None:
+        """Call shutdown() when a FastAPI/Starlette app shuts down."""
+        app.add_event_handler("shutdown", self.shutdown) 
\ No newline at end of file
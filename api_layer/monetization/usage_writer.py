@@ -0,0 +1,237 @@
+from typing import Dict, Any, List, Optional
+import asyncio
+import glob
+import json
+import os
+import threading
+import uuid
+from vault.backend.data_access import DataAccess
+
+class UsageLogWriter:
+    """Buffers usage events in memory and writes them to usage_logs in bulk.
+
+    Events are flushed when a batch fills up or the oldest buffered event is
+    flush_interval seconds old. Events that cannot be queued or written are
+    appended to a local NDJSON spill file and replayed after the next
+    successful write. Spill and replay file I/O runs on worker threads, so a
+    full queue costs the request path a list append, not an fsync. "{pid}" in spill_path is replaced with the process id,
+    so workers sharing a directory keep separate files; files left by
+    processes that are no longer running are taken over and replayed too.
+
+    Each event gets an id before it is queued and batches are upserted
+    ignoring duplicates, so replaying a batch whose insert timed out but
+    landed anyway does not log it twice.
+    """
+
+    def __init__(self,
+                 data_access: DataAccess,
+                 batch_size: int = 500,
+                 flush_interval: float = 1.0,
+                 max_queue_size: int = 10000,
+                 spill_path: str = "usage_logs.spill.{pid}.ndjson"):
+        self.db = data_access.for_module(__name__)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue_size = max_queue_size
+        self._spill_template = spill_path
+        self.spill_path = spill_path.replace("{pid}", str(os.getpid()))
+        # Set when there may be spilled events to replay, including other processes' leftovers
+        self._replay_due = True
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._pending: List[Dict[str, Any]] = []
+        # Events that found the queue full, waiting for the spill task
+        self._overflow: List[Dict[str, Any]] = []
+        self._spiller: Optional[asyncio.Task] = None
+        self._write_lock: Optional[asyncio.Lock] = None
+        # Serializes spill-file appends and renames across worker threads
+        self._spill_lock = threading.Lock()
+        self.written = 0
+        self.spilled = 0
+
+    async def enqueue(self, event: Dict[str, Any]) -> None:
+        """Queue a usage event; spills to disk instead of blocking when full."""
+        self._ensure_worker()
+        event.setdefault("id", str(uuid.uuid4()))
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self._overflow.append(event)
+            if self._spiller is None or self._spiller.done():
+                self._spiller = asyncio.get_running_loop().create_task(self._spill_overflow())
+
+    async def flush(self) -> None:
+        """Write every buffered event, then replay anything previously spilled."""
+        self._ensure_queue()
+        async with self._write_lock:
+            batch, self._pending = self._pending, []
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            # Overflow not yet taken by the spill task is written directly
+            batch += self._overflow
+            self._overflow = []
+            if self._spiller is not None and not self._spiller.done():
+                await asyncio.wait({self._spiller})
+            for start in range(0, len(batch), self.batch_size):
+                await self._write(batch[start:start + self.batch_size])
+            await self._replay_spill()
+
+    async def close(self) -> None:
+        """Stop the background writer and flush everything; call on shutdown."""
+        if self._worker is not None:
+            # Before Python 3.12, wait_for() swallows a cancellation that lands as its
+            # get() completes, and the worker goes back to waiting; cancel until it stops
+            while not self._worker.done():
+                self._worker.cancel()
+                await asyncio.wait({self._worker}, timeout=0.1)
+            if not self._worker.cancelled():
+                self._worker.exception()
+            self._worker = None
+        await self.flush()
+
+    def _ensure_queue(self) -> None:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self._write_lock = asyncio.Lock()
+
+    def _ensure_worker(self) -> None:
+        self._ensure_queue()
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            self._pending.append(await self._queue.get())
+            deadline = loop.time() + self.flush_interval
+            while len(self._pending) < self.batch_size:
+                if not self._queue.empty():
+                    self._pending.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    self._pending.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # Shielded so that close() never interrupts a half-finished insert
+            written = await asyncio.shield(self._write_pending())
+            if written and self._replay_due:
+                await asyncio.shield(self._replay_pending())
+
+    async def _write_pending(self) -> bool:
+        async with self._write_lock:
+            batch, self._pending = self._pending, []
+            return await self._write(batch)
+
+    async def _replay_pending(self) -> None:
+        async with self._write_lock:
+            await self._replay_spill()
+
+    async def _write(self, batch: List[Dict[str, Any]]) -> bool:
+        if not batch:
+            return True
+        try:
+            await self.db.table("usage_logs")\
+                .upsert(batch, on_conflict="id", ignore_duplicates=True, returning="minimal")\
+                .execute()
+        except Exception:
+            await asyncio.to_thread(self._spill, batch)
+            return False
+        self.written += len(batch)
+        return True
+
+    async def _spill_overflow(self) -> None:
+        while self._overflow:
+            events, self._overflow = self._overflow, []
+            await asyncio.to_thread(self._spill, events)
+
+    def _spill(self, events: List[Dict[str, Any]]) -> None:
+        """Append events to the spill file; runs on a worker thread."""
+        lines = "".join(json.dumps(event, default=str) + "\n" for event in events)
+        with self._spill_lock:
+            with open(self.spill_path, "a", encoding="utf-8") as spill:
+                spill.write(lines)
+                spill.flush()
+                os.fsync(spill.fileno())
+            self.spilled += len(events)
+        self._replay_due = True
+
+    async def _replay_spill(self) -> None:
+        self._replay_due = False
+        for path in await asyncio.to_thread(self._replay_paths):
+            await self._replay_file(path)
+
+    def _replay_paths(self) -> List[str]:
+        """Take the spill file and orphaned ones for replay; runs on a worker thread."""
+        replay_path = self.spill_path + ".replay"
+        with self._spill_lock:
+            # A leftover replay file from an interrupted run is finished first
+            if not os.path.exists(replay_path) and os.path.exists(self.spill_path):
+                os.replace(self.spill_path, replay_path)
+        return [path for path in [replay_path] + self._claim_orphans() if os.path.exists(path)]
+
+    async def _replay_file(self, path: str) -> None:
+        spill = await asyncio.to_thread(open, path, encoding="utf-8")
+        try:
+            while True:
+                batch = await asyncio.to_thread(self._read_batch, spill)
+                if not batch:
+                    break
+                await self._write(batch)
+        finally:
+            spill.close()
+        # Failed writes were re-spilled above, so the replayed copy can go
+        await asyncio.to_thread(os.remove, path)
+
+    def _read_batch(self, spill) -> List[Dict[str, Any]]:
+        batch: List[Dict[str, Any]] = []
+        for line in spill:
+            if line.strip():
+                batch.append(json.loads(line))
+                if len(batch) >= self.batch_size:
+                    break
+        return batch
+
+    def _claim_orphans(self) -> List[str]:
+        """Rename spill files of processes that are no longer running to names of our own."""
+        if "{pid}" not in self._spill_template:
+            return []
+        prefix, suffix = self._spill_template.split("{pid}", 1)
+        claimed = []
+        for path in sorted(glob.glob(glob.escape(prefix) + "*" + glob.escape(suffix) + "*")):
+            pid, found, tail = path[len(prefix):].partition(suffix)
+            if not (found and pid.isdigit()) or int(pid) == os.getpid() or _process_alive(int(pid)):
+                continue
+            if tail not in ("", ".replay") and not tail.startswith(".from-"):
+                continue
+            target = f"{self.spill_path}.from-{pid}{tail}"
+            try:
+                # Atomic, so when several workers race for a file exactly one gets it
+                os.replace(path, target)
+            except FileNotFoundError:
+                continue
+            claimed.append(target)
+        return claimed
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth and write/spill counters."""
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "pending": len(self._pending) + len(self._overflow),
+            "written": self.written,
+            "spilled": self.spilled
+        }
+
+def _process_alive(pid: int) -> bool:
+    if os.name == "nt":
+        # os.kill() would terminate the process on Windows; never take over its files
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
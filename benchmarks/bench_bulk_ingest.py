@@ -0,0 +1,149 @@
+"""Vault ingest throughput: one POST /vault/entries per entry vs streamed POST /vault/entries/bulk.
+
+    python -m benchmarks.bench_bulk_ingest --entries 100000 --latency 0.005
+
+Requests go through the FastAPI app in-process (httpx ASGI transport) to a
+stand-in store with a fixed round-trip latency. The bulk body is generated
+and sent in 64 KB pieces, with a few invalid lines and rows the store
+rejects mixed in. The store only counts inserted rows, so the peak traced
+memory is the ingest path's own. Finally checks that a chunk whose insert
+times out fails as a whole without retries.
+"""
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+import uuid
+
+import httpx
+
+from benchmarks.stand_in import StandInAPIError, StandInClient, StandInQuery, StandInResponse
+from vault.backend.data_access import DataAccess
+import vault.backend.main as vault_api
+
+
+class CountingQuery(StandInQuery):
+    def _execute_insert(self, rows):
+        new_rows = self.payload if isinstance(self.payload, list) else [self.payload]
+        if any(row["data_type"] == "unregistered" for row in new_rows):
+            raise StandInAPIError("insert violates foreign key constraint on data_type", "23503")
+        self.client.inserted += len(new_rows)
+        return StandInResponse([])
+
+
+class CountingClient(StandInClient):
+    def __init__(self, latency: float):
+        super().__init__(latency)
+        self.inserted = 0
+
+    def table(self, name: str) -> StandInQuery:
+        return CountingQuery(self, name)
+
+
+class TimingOutClient(StandInClient):
+    """Times out on the chunk-th insert; every other row is accepted."""
+
+    def __init__(self, latency: float, chunk: int):
+        super().__init__(latency)
+        self.chunk = chunk
+        self.inserts = 0
+
+    def table(self, name: str) -> StandInQuery:
+        return TimingOutQuery(self, name)
+
+
+class TimingOutQuery(StandInQuery):
+    def _execute_insert(self, rows):
+        self.client.inserts += 1
+        if self.client.inserts == self.client.chunk:
+            raise TimeoutError("read timed out")
+        return StandInResponse([])
+
+
+def entry(i: int) -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "user_id": "user",
+        "data_type": "unregistered" if i % 1000 == 999 else "health",
+        "content": {"heart_rate": 60 + i % 40, "steps": i % 12000},
+        "metadata": {"source": "bench"},
+        "created_at": "2026-01-01T00:00:00",
+        "updated_at": "2026-01-01T00:00:00"
+    }
+
+
+async def ndjson_body(count: int, piece_size: int = 1 << 16):
+    piece = []
+    size = 0
+    for i in range(count):
+        line = "{not json\n" if i % 1000 == 500 else json.dumps(entry(i)) + "\n"
+        piece.append(line)
+        size += len(line)
+        if size >= piece_size:
+            yield "".join(piece).encode()
+            piece, size = [], 0
+    if piece:
+        yield "".join(piece).encode()
+
+
+async def bulk(client: CountingClient, count: int) -> tuple:
+    transport = httpx.ASGITransport(app=vault_api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://vault", timeout=None) as http:
+        began = time.perf_counter()
+        response = await http.post("/vault/entries/bulk", content=ndjson_body(count),
+                                   headers={"content-type": "application/x-ndjson"})
+        elapsed = time.perf_counter() - began
+    return elapsed, response.json()
+
+
+async def run(entries: int, single_entries: int, latency: float) -> None:
+    client = CountingClient(latency)
+    vault_api.db = DataAccess(client=client)
+    vault_api.schema_cache.db = vault_api.entry_loader.db = vault_api.db
+
+    transport = httpx.ASGITransport(app=vault_api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://vault") as http:
+        began = time.perf_counter()
+        for i in range(single_entries):
+            await http.post("/vault/entries", json=entry(i * 1000))
+        single_time = time.perf_counter() - began
+    single_rate = single_entries / single_time
+
+    print(f"store round trip {latency * 1000:.1f} ms")
+    print(f"{'path':<28}{'entries':>10}{'entries/s':>12}{'store calls':>13}{'failed':>8}{'peak MB':>10}")
+    print(f"{'POST /vault/entries':<28}{single_entries:>10,}{single_rate:>12,.0f}{single_entries:>13,}{0:>8}{'':>10}")
+
+    for count in (entries // 10, entries):
+        client.calls = client.inserted = 0
+        elapsed, stats = await bulk(client, count)
+        calls = client.calls
+        assert stats["received"] == count and stats["inserted"] == client.inserted, stats
+        assert stats["inserted"] + stats["failed"] == count, stats
+        tracemalloc.start()
+        await bulk(client, count)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{'POST /vault/entries/bulk':<28}{count:>10,}{count / elapsed:>12,.0f}{calls:>13,}"
+              f"{stats['failed']:>8,}{peak / 2**20:>10.1f}")
+
+    # A timed-out chunk fails as a whole instead of being bisected into more timeouts
+    client = TimingOutClient(latency, chunk=2)
+    vault_api.db = vault_api.schema_cache.db = vault_api.entry_loader.db = DataAccess(client=client)
+    _, stats = await bulk(client, 2000)
+    # Two malformed lines plus the 500 rows of the timed-out chunk
+    assert (client.calls, stats["inserted"], stats["failed"]) == (4, 1498, 502), (client.calls, stats["failed"])
+    print("timed-out chunk failed without retries: ok")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=100000)
+    parser.add_argument("--single-entries", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.005)
+    args = parser.parse_args()
+    asyncio.run(run(args.entries, args.single_entries, args.latency))
+
+
+if __name__ == "__main__":
+    main()
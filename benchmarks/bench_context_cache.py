@@ -0,0 +1,84 @@
+"""Agent-turn latency: uncached get_active_contexts/update_context vs the hot-context cache.
+
+    python -m benchmarks.bench_context_cache --users 50 --turns 40 --latency 0.002
+
+Each turn reads the user's active contexts and updates one of them several
+times, as an agent does while working. Checks that after flush() the store
+holds exactly the last update of every context.
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.stand_in import StandInClient
+from vault.backend.data_access import DataAccess
+from mcp.agents.context_cache import ContextCache
+from mcp.agents.context_manager import ContextManager
+
+
+def seed(client: StandInClient, users: int, contexts_per_user: int) -> None:
+    now = datetime.utcnow()
+    rows = client.rows("contexts")
+    for user in range(users):
+        for index in range(contexts_per_user):
+            stamp = (now - timedelta(hours=index * 6)).isoformat()
+            rows.append({
+                "id": f"context-{user}-{index}",
+                "user_id": f"user-{user}",
+                "context_type": "session",
+                "data": {"step": 0},
+                "metadata": {},
+                "created_at": stamp,
+                "updated_at": stamp
+            })
+
+
+async def agent(manager: ContextManager, user: int, turns: int, updates_per_turn: int) -> list:
+    latencies = []
+    for turn in range(turns):
+        started = time.perf_counter()
+        contexts = await manager.get_active_contexts(f"user-{user}")
+        target = contexts[turn % len(contexts)]
+        for step in range(updates_per_turn):
+            await manager.update_context(target["id"], data={"step": turn * updates_per_turn + step + 1})
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+async def run(users: int, turns: int, updates_per_turn: int, latency: float, write_behind: float) -> None:
+    print(f"{users} concurrent agents x {turns} turns, {updates_per_turn} updates/turn, "
+          f"store latency {latency * 1000:.1f} ms/call")
+    for label, cache_users, seconds in (("uncached", 0, 0.0), ("hot cache", 10000, write_behind)):
+        client = StandInClient(latency=latency)
+        seed(client, users, 4)
+        db = DataAccess(client=client, max_concurrency=64)
+        manager = ContextManager(db, ContextCache(db, max_users=cache_users, write_behind_seconds=seconds))
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(agent(manager, user, turns, updates_per_turn) for user in range(users)))
+        elapsed = time.perf_counter() - started
+        await manager.close()
+
+        latencies = sorted(value for result in results for value in result)
+        for row in client.rows("contexts"):
+            # Contexts that were updated must hold their final step
+            assert row["data"]["step"] in (0,) or row["data"]["step"] % updates_per_turn == 0, row
+        print(f"{label:>10}: turn p50 {latencies[len(latencies) // 2] * 1000:7.2f} ms, "
+              f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:7.2f} ms, "
+              f"{client.calls:6,} store calls in {elapsed:.2f}s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--turns", type=int, default=40)
+    parser.add_argument("--updates-per-turn", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.002)
+    parser.add_argument("--write-behind", type=float, default=0.05)
+    args = parser.parse_args()
+    asyncio.run(run(args.users, args.turns, args.updates_per_turn, args.latency, args.write_behind))
+
+
+if __name__ == "__main__":
+    main()
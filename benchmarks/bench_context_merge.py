@@ -0,0 +1,97 @@
+"""merge_contexts latency: per-id get_context loop vs bulk fetch + single-pass merge.
+
+    python -m benchmarks.bench_context_merge --contexts 200 --latency 0.002
+
+Runs each strategy over contexts of growing size to show that latency now
+tracks payload size rather than the number of round trips. "fold only" is the
+combine merge without I/O; the rest of the combine time is the stand-in
+copying the large merged context on insert.
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.stand_in import StandInClient
+from vault.backend.data_access import DataAccess
+from mcp.agents.context_manager import ContextManager
+from mcp.agents.context_merge import create_merger
+
+
+def seed_contexts(client: StandInClient, count: int, keys: int, list_length: int) -> list:
+    base = datetime(2026, 1, 1)
+    rows = client.rows("contexts")
+    for i in range(count):
+        rows.append({
+            "id": f"context-{i}",
+            "user_id": "user",
+            "context_type": "session",
+            "data": {
+                f"key-{k}": list(range(i, i + list_length)) if k % 2 else f"value-{i}-{k}"
+                for k in range(keys)
+            },
+            "metadata": {},
+            "created_at": base.isoformat(),
+            "updated_at": (base + timedelta(seconds=(i * 7919) % count)).isoformat()
+        })
+    return [row["id"] for row in rows]
+
+
+async def sequential_merge(manager: ContextManager, context_ids: list) -> dict:
+    """The previous merge_contexts: one get_context per id, then sort and merge."""
+    contexts = []
+    for context_id in context_ids:
+        contexts.append(await manager.get_context(context_id))
+    merged_data = {}
+    for context in sorted(contexts, key=lambda x: x["updated_at"], reverse=True):
+        for key, value in context["data"].items():
+            if key not in merged_data:
+                merged_data[key] = value
+    return merged_data
+
+
+async def run(count: int, latency: float, key_counts: list, list_length: int) -> None:
+    print(f"{count} contexts, store latency {latency * 1000:.1f} ms/call")
+    print(f"{'keys':>6} {'payload':>10} {'sequential':>12} {'latest':>10} {'combine':>10} {'fold only':>10}")
+    for keys in key_counts:
+        client = StandInClient(latency=latency)
+        context_ids = seed_contexts(client, count, keys, list_length)
+        payload = sum(len(json.dumps(row["data"])) for row in client.rows("contexts"))
+        manager = ContextManager(DataAccess(client=client))
+
+        started = time.perf_counter()
+        expected = await sequential_merge(manager, context_ids)
+        sequential = time.perf_counter() - started
+
+        timings = []
+        for strategy in ("latest", "combine"):
+            started = time.perf_counter()
+            merged = await manager.merge_contexts(context_ids, strategy)
+            timings.append(time.perf_counter() - started)
+            if strategy == "latest":
+                assert merged["data"] == expected, "latest merge differs from the sequential merge"
+
+        merger = create_merger("combine")
+        started = time.perf_counter()
+        for row in client.rows("contexts")[:count]:
+            merger.add(row)
+        merger.result()
+        fold = time.perf_counter() - started
+
+        print(f"{keys:>6} {payload / 1e6:>8.2f}MB {sequential * 1000:>10.1f}ms "
+              f"{timings[0] * 1000:>8.1f}ms {timings[1] * 1000:>8.1f}ms {fold * 1000:>8.1f}ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--contexts", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.002)
+    parser.add_argument("--keys", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--list-length", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args.contexts, args.latency, args.keys, args.list_length))
+
+
+if __name__ == "__main__":
+    main()
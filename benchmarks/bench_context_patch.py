@@ -0,0 +1,137 @@
+"""Small edits to 1 MB contexts: full update_context rewrite vs patch_context.
+
+    python -m benchmarks.bench_context_patch --size-mb 1 --edits 200
+
+Reports request bytes and latency per edit. The stand-in charges the fixed
+round-trip latency plus request size over --bandwidth-mbps, and mirrors the
+patch_context database function with apply_merge_patch. Also checks that
+a patch racing staged write-behind updates leaves the cache and the store
+agreeing.
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime
+
+from benchmarks.stand_in import StandInClient
+from vault.backend.data_access import DataAccess
+from mcp.agents.context_cache import ContextCache
+from mcp.agents.context_manager import ContextManager
+from mcp.agents.context_patch import ContextConflictError, apply_merge_patch
+
+
+class WireClient(StandInClient):
+    def __init__(self, latency: float, bandwidth: float):
+        super().__init__(latency=latency)
+        self.bandwidth = bandwidth
+
+    def record_call(self, payload, name=None) -> None:
+        before = self.bytes_sent
+        super().record_call(payload, name)
+        time.sleep((self.bytes_sent - before) / self.bandwidth)
+
+
+def patch_context(client, p_context_id, p_data_patch, p_metadata_patch, p_expected_updated_at, p_updated_at):
+    for row in client.rows("contexts"):
+        if row["id"] == p_context_id:
+            if p_expected_updated_at is not None and row["updated_at"] != p_expected_updated_at:
+                return [{"updated_at": row["updated_at"], "conflict": True}]
+            if p_data_patch is not None:
+                row["data"] = apply_merge_patch(row["data"], p_data_patch)
+            if p_metadata_patch is not None:
+                row["metadata"] = apply_merge_patch(row["metadata"], p_metadata_patch)
+            row["updated_at"] = p_updated_at
+            return [{"updated_at": p_updated_at, "conflict": False}]
+    return []
+
+
+def large_document(size: int) -> dict:
+    entries = size // 120
+    return {
+        "turns": {f"turn-{i}": {"role": "agent", "text": "x" * 80, "tokens": i} for i in range(entries)},
+        "state": {"step": 0, "focus": None}
+    }
+
+
+def new_manager(latency: float, bandwidth: float, size: int):
+    client = WireClient(latency, bandwidth)
+    client.register_function("patch_context", patch_context)
+    stamp = datetime.utcnow().isoformat()
+    client.rows("contexts").append({
+        "id": "context", "user_id": "user", "context_type": "session",
+        "data": large_document(size), "metadata": {}, "created_at": stamp, "updated_at": stamp
+    })
+    db = DataAccess(client=client)
+    return client, ContextManager(db, ContextCache(db, max_users=0, write_behind_seconds=0))
+
+
+async def run(size_mb: float, edits: int, latency: float, bandwidth_mbps: float) -> None:
+    size = int(size_mb * 1e6)
+    bandwidth = bandwidth_mbps * 1e6 / 8
+
+    client, manager = new_manager(latency, bandwidth, size)
+    document = (await manager.get_context("context"))["data"]
+    client.bytes_sent = client.calls = 0
+    started = time.perf_counter()
+    for edit in range(edits):
+        document = apply_merge_patch(document, {"state": {"step": edit + 1}})
+        await manager.update_context("context", data=document)
+    full_time = (time.perf_counter() - started) / edits
+    full_bytes = client.bytes_sent / edits
+    full_result = client.rows("contexts")[0]["data"]
+
+    client, manager = new_manager(latency, bandwidth, size)
+    started = time.perf_counter()
+    for edit in range(edits):
+        await manager.patch_context("context", {"state": {"step": edit + 1}})
+    patch_time = (time.perf_counter() - started) / edits
+    patch_bytes = client.bytes_sent / edits
+    assert client.rows("contexts")[0]["data"] == full_result, "patched and rewritten documents differ"
+
+    updated = await manager.patch_context("context", {"state": {"focus": "a"}})
+    try:
+        await manager.patch_context("context", {"state": {"focus": "b"}}, expected_updated_at="2000-01-01T00:00:00")
+        raise AssertionError("stale patch was applied")
+    except ContextConflictError:
+        pass
+    await manager.patch_context("context", {"state": {"focus": "b"}}, expected_updated_at=updated["updated_at"])
+
+    print(f"{size_mb:g} MB context, {edits} edits, {latency * 1000:.1f} ms + {bandwidth_mbps:g} Mbit/s")
+    print(f"update_context (full): {full_bytes:12,.0f} bytes/edit {full_time * 1000:8.2f} ms/edit")
+    print(f"patch_context (delta): {patch_bytes:12,.0f} bytes/edit {patch_time * 1000:8.2f} ms/edit")
+
+    # A staged update lands before the patch; one arriving mid-patch waits for it
+    client = StandInClient(latency=max(latency, 0.01))
+    client.register_function("patch_context", patch_context)
+    stamp = datetime.utcnow().isoformat()
+    client.rows("contexts").append({"id": "context", "user_id": "user", "context_type": "session",
+                                    "data": {"a": 0, "b": 0}, "metadata": {}, "created_at": stamp, "updated_at": stamp})
+    db = DataAccess(client=client)
+    cache = ContextCache(db, max_users=1, write_behind_seconds=client.latency / 2)
+    manager = ContextManager(db, cache)
+    await manager.get_active_contexts("user")
+    await manager.update_context("context", data={"a": 1, "b": 0})
+
+    async def update_during_patch():
+        await asyncio.sleep(client.latency * 1.5)
+        await manager.update_context("context", data={"a": 2, "b": 0})
+
+    await asyncio.gather(manager.patch_context("context", {"b": 5}), update_during_patch())
+    await cache.close()
+    assert cache.get("context")["data"] == client.rows("contexts")[0]["data"], \
+        (cache.get("context")["data"], client.rows("contexts")[0]["data"])
+    print("patch racing write-behind updates: cache and store agree: ok")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=1.0)
+    parser.add_argument("--edits", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.002)
+    parser.add_argument("--bandwidth-mbps", type=float, default=1000.0)
+    args = parser.parse_args()
+    asyncio.run(run(args.size_mb, args.edits, args.latency, args.bandwidth_mbps))
+
+
+if __name__ == "__main__":
+    main()
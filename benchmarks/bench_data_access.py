@@ -0,0 +1,53 @@
+"""Load test: concurrent queries on the event loop, blocking vs DataAccess.
+
+    python -m benchmarks.bench_data_access --requests 200 --latency 0.02
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.stand_in import StandInClient
+from vault.backend.data_access import DataAccess
+from api_layer.access_control.gatekeeper import Gatekeeper
+
+
+async def blocking_check(client: StandInClient, user_id: str) -> bool:
+    # The pre-DataAccess pattern: a synchronous execute() inside async def
+    result = client.table("permissions").select("*").eq("user_id", user_id).execute()
+    return len(result.data) > 0
+
+
+async def run(requests: int, latency: float, concurrency: int) -> None:
+    client = StandInClient(latency=latency)
+    client.rows("permissions").extend(
+        {"user_id": f"user-{i}", "resource": "vault", "action": "read"} for i in range(requests)
+    )
+    users = [f"user-{i}" for i in range(requests)]
+
+    start = time.perf_counter()
+    await asyncio.gather(*(blocking_check(client, user) for user in users))
+    blocking = time.perf_counter() - start
+
+    data_access = DataAccess(client=client, max_concurrency=concurrency)
+    gatekeeper = Gatekeeper(data_access=data_access)
+    start = time.perf_counter()
+    await asyncio.gather(*(gatekeeper.check_permission(user, "vault", "read") for user in users))
+    pooled = time.perf_counter() - start
+    data_access.close()
+
+    print(f"{requests} concurrent permission checks, {latency * 1000:.0f} ms store latency")
+    print(f"blocking execute():          {blocking:8.3f} s  ({requests / blocking:10,.0f} req/s)")
+    print(f"DataAccess ({concurrency:3d} workers):   {pooled:8.3f} s  ({requests / pooled:10,.0f} req/s)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.latency, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
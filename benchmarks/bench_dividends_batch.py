@@ -0,0 +1,69 @@
+"""Dividend throughput: per-call calculate_dividend vs calculate_dividends_batch.
+
+    python -m benchmarks.bench_dividends_batch --events 1000000
+"""
+import argparse
+import asyncio
+import time
+
+import numpy as np
+
+from benchmarks.stand_in import StandInClient
+from vault.backend.data_access import DataAccess
+from grid.dividend_engine.calculator import DividendCalculator
+
+
+def synthetic_events(count: int, users: int, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    data_types = np.array(["spotify", "gmail", "location", "health", "rewind"], dtype=object)
+    return {
+        "user_id": np.array([f"user-{i}" for i in rng.integers(0, users, count)], dtype=object),
+        "data_type": data_types[rng.integers(0, len(data_types), count)],
+        "usage_count": rng.integers(1, 500, count),
+        "quality_score": rng.uniform(0.2, 1.0, count)
+    }
+
+
+async def run(count: int, baseline_count: int, users: int, latency: float, chunk_size: int) -> None:
+    events = synthetic_events(count, users)
+
+    client = StandInClient(latency=latency)
+    calculator = DividendCalculator(DataAccess(client=client))
+    start = time.perf_counter()
+    scalar = [
+        await calculator.calculate_dividend(
+            events["user_id"][i], events["data_type"][i],
+            int(events["usage_count"][i]), float(events["quality_score"][i])
+        )
+        for i in range(baseline_count)
+    ]
+    per_call = baseline_count / (time.perf_counter() - start)
+
+    client = StandInClient(latency=latency)
+    calculator = DividendCalculator(DataAccess(client=client))
+    start = time.perf_counter()
+    summary = await calculator.calculate_dividends_batch(events, chunk_size=chunk_size)
+    batch = count / (time.perf_counter() - start)
+
+    batch_dividends = [row["dividend"] for row in client.rows("dividend_calculations")[:baseline_count]]
+    assert batch_dividends == scalar, "batch and scalar dividends differ"
+
+    print(f"store latency {latency * 1000:.1f} ms/call, {users:,} users")
+    print(f"calculate_dividend        ({baseline_count:>9,} events): {per_call:12,.0f} events/s")
+    print(f"calculate_dividends_batch ({count:>9,} events): {batch:12,.0f} events/s")
+    print(f"results identical for the first {baseline_count:,} events; total ${summary['total']:,.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=1000000)
+    parser.add_argument("--baseline-events", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--latency", type=float, default=0.002)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(run(args.events, args.baseline_events, args.users, args.latency, args.chunk_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""calculate_total_earnings over years of history: raw scan vs daily rollups.
+
+    python -m benchmarks.bench_earnings_rollups --years 3 --calculations-per-day 200
+
+The stand-in implements sum_dividend_calculations and sum_dividend_rollups
+over sorted per-user arrays, emulating the (user_id, calculated_at) and
+(user_id, day) indexes, so each function's cost is proportional to the
+rows it actually reads. Also checks calculate_total_earnings_batch against
+the per-user totals.
+"""
+import argparse
+import asyncio
+import bisect
+import time
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from benchmarks.stand_in import StandInClient
+from vault.backend.data_access import DataAccess
+from grid.dividend_engine.calculator import DividendCalculator
+
+DATA_TYPES = ["spotify", "gmail", "location", "health", "rewind"]
+
+
+class IndexedHistory:
+    def __init__(self, start: date, days: int, per_day: int, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        offsets = np.sort(rng.integers(0, days * 86400 * 10**6, days * per_day))
+        types = rng.integers(0, len(DATA_TYPES), len(offsets))
+        dividends = rng.uniform(0.001, 5.0, len(offsets))
+        origin = datetime.combine(start, datetime.min.time())
+
+        self.keys = [(origin + timedelta(microseconds=int(o))).isoformat() for o in offsets]
+        self.rows = list(zip(types.tolist(), dividends.tolist()))
+        self.rows_read = 0
+
+        rollups = {}
+        for key, (type_index, dividend) in zip(self.keys, self.rows):
+            slot = (key[:10], type_index)
+            rollups[slot] = rollups.get(slot, 0.0) + dividend
+        self.rollup_keys = sorted(rollups)
+        self.rollup_totals = [rollups[key] for key in self.rollup_keys]
+
+    def sum_calculations(self, client, p_user_id, p_start, p_end, p_end_inclusive=True):
+        lo = 0 if p_start is None else bisect.bisect_left(self.keys, p_start)
+        if p_end is None:
+            hi = len(self.keys)
+        else:
+            hi = (bisect.bisect_right if p_end_inclusive else bisect.bisect_left)(self.keys, p_end)
+        return self._totals(self.rows[lo:hi])
+
+    def sum_rollups(self, client, p_user_id, p_first_day, p_last_day):
+        lo = 0 if p_first_day is None else bisect.bisect_left(self.rollup_keys, (p_first_day, -1))
+        hi = len(self.rollup_keys) if p_last_day is None else \
+            bisect.bisect_right(self.rollup_keys, (p_last_day, len(DATA_TYPES)))
+        rows = [(key[1], total) for key, total in zip(self.rollup_keys[lo:hi], self.rollup_totals[lo:hi])]
+        return self._totals(rows)
+
+    def sum_calculations_by_user(self, client, p_user_ids, **params):
+        return [{"user_id": user_id, **row} for user_id in p_user_ids
+                for row in self.sum_calculations(client, user_id, **params)]
+
+    def sum_rollups_by_user(self, client, p_user_ids, **params):
+        return [{"user_id": user_id, **row} for user_id in p_user_ids
+                for row in self.sum_rollups(client, user_id, **params)]
+
+    def _totals(self, rows):
+        self.rows_read += len(rows)
+        totals = {}
+        for type_index, amount in rows:
+            totals[type_index] = totals.get(type_index, 0.0) + amount
+        return [{"data_type": DATA_TYPES[t], "total": total} for t, total in totals.items()]
+
+
+async def run(years: int, per_day: int, repeats: int) -> None:
+    days = 365 * years
+    history = IndexedHistory(date(2022, 1, 1), days, per_day)
+    client = StandInClient()
+    client.register_function("sum_dividend_calculations", history.sum_calculations)
+    client.register_function("sum_dividend_rollups", history.sum_rollups)
+    client.register_function("sum_dividend_calculations_by_user", history.sum_calculations_by_user)
+    client.register_function("sum_dividend_rollups_by_user", history.sum_rollups_by_user)
+    calculator = DividendCalculator(DataAccess(client=client))
+
+    start = datetime(2022, 1, 1, 13, 30)
+    end = datetime(2022, 1, 1) + timedelta(days=days - 1, hours=9, minutes=15)
+
+    history.rows_read = 0
+    began = time.perf_counter()
+    for _ in range(repeats):
+        raw = await calculator._sum_calculations("user", start, end, end_inclusive=True)
+    raw_time = (time.perf_counter() - began) / repeats
+    raw_rows = history.rows_read // repeats
+
+    history.rows_read = 0
+    began = time.perf_counter()
+    for _ in range(repeats):
+        rolled = await calculator.calculate_total_earnings("user", start, end)
+    rollup_time = (time.perf_counter() - began) / repeats
+    rollup_rows = history.rows_read // repeats
+
+    raw_total = sum(item["total"] for item in raw)
+    assert abs(raw_total - rolled["total"]) < 1e-6 * max(1.0, raw_total), "rollup total differs"
+    print(f"{len(history.keys):,} calculations over {days:,} days")
+    print(f"raw scan:         {raw_time * 1000:9.2f} ms  {raw_rows:>10,} rows read")
+    print(f"rollups + edges:  {rollup_time * 1000:9.2f} ms  {rollup_rows:>10,} rows read")
+
+    # The grouped per-user queries split the range the same way
+    for range_start, range_end in ((start, end), (start, start + timedelta(hours=2)), (None, end), (start, None)):
+        single = await calculator.calculate_total_earnings("user", range_start, range_end)
+        batch = await calculator.calculate_total_earnings_batch(["user", "other"], range_start, range_end)
+        assert batch["user"] == batch["other"] == single, (range_start, range_end)
+    print("calculate_total_earnings_batch matches per-user totals: ok")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--calculations-per-day", type=int, default=200)
+    parser.add_argument("--repeats", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(run(args.years, args.calculations_per_day, args.repeats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Embedding throughput: per-record model calls vs the batching service and its on-disk cache.
+
+    python -m benchmarks.bench_embedding_service --records 20000 --duplicates 0.3
+
+Uses the deterministic hashing stand-in model with an emulated per-call
+latency. The second ingest reopens the cache file, as a re-run of the same
+export would, and must not call the model at all.
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks import signal_modules
+
+signal_modules.load("processors.checkpoint")
+base = signal_modules.load("processors.base")
+service_module = signal_modules.load("embeddings.service")
+cache_module = signal_modules.load("embeddings.vector_cache")
+
+
+def synthetic_emails(count: int, duplicates: float) -> list:
+    rng = random.Random(0)
+    emails = []
+    for i in range(count):
+        if emails and rng.random() < duplicates:
+            emails.append(dict(rng.choice(emails)))
+        else:
+            emails.append({"id": i, "subject": f"Report {i}", "body": f"weekly numbers for team {i % 97} look fine"})
+    return emails
+
+
+async def ingest(processor, emails: list, chunk_size: int) -> list:
+    vectors = []
+    for start in range(0, len(emails), chunk_size):
+        chunk = emails[start:start + chunk_size]
+        vectors.extend(await asyncio.gather(*(processor.generate_embeddings(email) for email in chunk)))
+    return vectors
+
+
+async def run(count: int, baseline_count: int, duplicates: float, latency: float, per_item: float,
+              batch_size: int, chunk_size: int) -> None:
+    emails = synthetic_emails(count, duplicates)
+    print(f"{count:,} records ({duplicates:.0%} duplicates), model {latency * 1000:.0f} ms/call "
+          f"+ {per_item * 1000:.2f} ms/item")
+
+    model = service_module.HashingEmbeddingModel(latency=latency, per_item=per_item)
+    processor = base.GmailProcessor({"embedding_service": service_module.EmbeddingService(model, batch_size=1)})
+    started = time.perf_counter()
+    for email in emails[:baseline_count]:
+        await processor.generate_embeddings(email)
+    elapsed = time.perf_counter() - started
+    print(f"{'per record':>16}: {baseline_count / elapsed:9,.0f} records/s, {model.calls:,} model calls")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "embeddings.cache")
+        first = None
+        for label in ("batched, cold", "re-ingest, warm"):
+            model = service_module.HashingEmbeddingModel(latency=latency, per_item=per_item)
+            cache = cache_module.VectorCache(path, model.dimension)
+            service = service_module.EmbeddingService(model, cache, batch_size=batch_size)
+            processor = base.GmailProcessor({"embedding_service": service})
+            started = time.perf_counter()
+            vectors = await ingest(processor, emails, chunk_size)
+            elapsed = time.perf_counter() - started
+            cache.close()
+            stats = service.stats()
+            print(f"{label:>16}: {count / elapsed:9,.0f} records/s, {model.calls:,} model calls, "
+                  f"{stats['cache_hits']:,} cache hits, {stats['deduplicated']:,} deduplicated, "
+                  f"cache {os.path.getsize(path) / 1e6:.1f} MB")
+            if first is None:
+                first = vectors
+            else:
+                assert model.calls == 0, "warm re-ingest called the model"
+                assert all(np.array_equal(a, b) for a, b in zip(first, vectors)), "cached vectors differ"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--baseline-records", type=int, default=500)
+    parser.add_argument("--duplicates", type=float, default=0.3)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--per-item", type=float, default=0.00005)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(run(args.records, args.baseline_records, args.duplicates, args.latency, args.per_item,
+                    args.batch_size, args.chunk_size))
+
+
+if __name__ == "__main__":
+    main()
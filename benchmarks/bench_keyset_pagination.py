@@ -0,0 +1,154 @@
+"""GET /vault/entries page latency by depth: OFFSET vs keyset cursor, plus /vault/export memory.
+
+    python -m benchmarks.bench_keyset_pagination --rows 200000 --limit 100
+
+The stand-in serves vault_entries from a sorted array emulating the
+(user_id, created_at DESC, id DESC) index: a cursor bisects straight to its
+position, while OFFSET visits every skipped row as the database does, so
+each page costs what it would read.
+"""
+import argparse
+import asyncio
+import bisect
+import json
+import re
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+
+from starlette.requests import Request
+
+from benchmarks.stand_in import StandInClient, StandInQuery, StandInResponse
+from vault.backend.data_access import DataAccess, encode_cursor
+from vault.backend.response_cache import ResponseCache
+import vault.backend.main as vault_api
+
+_BOUND = re.compile(r'created_at\.lt\."([^"]*)".*id\.lt\."([^"]*)"')
+
+
+class IndexedEntries:
+    def __init__(self, user_id: str, count: int):
+        origin = datetime(2024, 1, 1)
+        # Ascending (created_at, id); pages walk it from the end
+        self.rows = sorted(
+            (
+                {
+                    "id": str(uuid.uuid4()),
+                    "user_id": user_id,
+                    "data_type": "spotify",
+                    "content": {"track": f"track {i}", "ms_played": i % 240000},
+                    "metadata": {"source": "bench"},
+                    # Pairs of rows share a timestamp so the id tiebreak matters
+                    "created_at": (origin + timedelta(seconds=i // 2)).isoformat(),
+                    "updated_at": (origin + timedelta(seconds=i // 2)).isoformat()
+                }
+                for i in range(count)
+            ),
+            key=lambda row: (row["created_at"], row["id"])
+        )
+        self.keys = [(row["created_at"], row["id"]) for row in self.rows]
+        self.rows_read = 0
+
+
+class IndexedQuery(StandInQuery):
+    def __init__(self, client: "IndexedClient", table: str):
+        super().__init__(client, table)
+        self.bound = None
+
+    def or_(self, filters: str) -> "IndexedQuery":
+        self.bound = _BOUND.search(filters).groups()
+        return self
+
+    def _execute_select(self, rows):
+        index = self.client.index
+        top = bisect.bisect_left(index.keys, self.bound) if self.bound else len(index.keys)
+        # OFFSET fetches and discards every skipped row
+        for position in range(top - 1, top - 1 - self.offset, -1):
+            index.rows_read += index.rows[position]["user_id"] is not None
+        end = max(top - self.offset, 0)
+        start = 0 if self.max_rows is None else max(end - self.max_rows, 0)
+        index.rows_read += end - start
+        return StandInResponse([dict(row) for row in reversed(index.rows[start:end])])
+
+
+class IndexedClient(StandInClient):
+    def __init__(self, index: IndexedEntries):
+        super().__init__()
+        self.index = index
+
+    def table(self, name: str) -> StandInQuery:
+        return IndexedQuery(self, name)
+
+
+async def time_page(index: IndexedEntries, repeats: int, **params) -> tuple:
+    index.rows_read = 0
+    began = time.perf_counter()
+    for _ in range(repeats):
+        response = await vault_api.list_entries(Request({"type": "http", "headers": []}), user_id="user", **params)
+    return (time.perf_counter() - began) / repeats, index.rows_read // repeats, json.loads(response.body)
+
+
+async def measure(export, rows: int) -> tuple:
+    """Time an export, then repeat it under tracemalloc for its peak allocation."""
+    began = time.perf_counter()
+    assert await export() == rows, "export lost rows"
+    elapsed = time.perf_counter() - began
+    tracemalloc.start()
+    await export()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+async def run(rows: int, limit: int, pages: list, repeats: int) -> None:
+    index = IndexedEntries("user", rows)
+    vault_api.db = DataAccess(client=IndexedClient(index))
+    # Measure the query, not the response cache
+    vault_api.response_cache = ResponseCache(max_bytes=0)
+    newest_first = index.rows[::-1]
+
+    print(f"{rows:,} entries, {limit} per page")
+    print(f"{'page':>6}  {'offset ms':>10}  {'rows read':>10}  {'cursor ms':>10}  {'rows read':>10}")
+    for page_number in pages:
+        skipped = (page_number - 1) * limit
+        if skipped >= rows:
+            continue
+        offset_time, offset_rows, by_offset = await time_page(index, repeats, limit=limit, offset=skipped)
+        cursor = encode_cursor(newest_first[skipped - 1]) if skipped else None
+        cursor_time, cursor_rows, by_cursor = await time_page(index, repeats, limit=limit, cursor=cursor)
+        assert by_offset == by_cursor == newest_first[skipped:skipped + limit], "pages differ"
+        print(f"{page_number:>6}  {offset_time * 1000:>10.2f}  {offset_rows:>10,}  "
+              f"{cursor_time * 1000:>10.2f}  {cursor_rows:>10,}")
+
+    async def buffered() -> int:
+        result = await vault_api.db.table("vault_entries").select("*").eq("user_id", "user").execute()
+        body = "".join(json.dumps(row, default=str) + "\n" for row in result.data)
+        return body.count("\n")
+
+    async def streamed() -> int:
+        response = await vault_api.export_entries(user_id="user", page_size=1000)
+        exported = 0
+        async for chunk in response.body_iterator:
+            exported += chunk.count("\n")
+        return exported
+
+    buffered_time, buffered_peak = await measure(buffered, rows)
+    stream_time, stream_peak = await measure(streamed, rows)
+    print(f"\nexport of {rows:,} entries as NDJSON")
+    print(f"buffered select:   {buffered_time:6.2f} s  peak {buffered_peak / 2**20:8.1f} MB")
+    print(f"/vault/export:     {stream_time:6.2f} s  peak {stream_peak / 2**20:8.1f} MB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.limit, args.pages, args.repeats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Backfill throughput: per-row store_memory vs chunked store_memories.
+
+    python -m benchmarks.bench_memory_backfill --count 100000 --latency 0.005
+"""
+import argparse
+import asyncio
+import time
+
+import numpy as np
+
+from benchmarks.stand_in import StandInClient
+from vault.backend.data_access import DataAccess
+from echo.memory.memory_store import MemoryStore
+
+
+async def run(count: int, baseline_count: int, latency: float, chunk_size: int) -> None:
+    rng = np.random.default_rng(0)
+    embeddings = rng.standard_normal((count, 1536), dtype=np.float32)
+    contents = [{"text": f"memory {i}"} for i in range(count)]
+
+    client = StandInClient(latency=latency)
+    store = MemoryStore(DataAccess(client=client), use_index=False)
+    start = time.perf_counter()
+    for i in range(baseline_count):
+        # The pre-bulk path: one insert per memory with a Python float list
+        await store.store_memory("bench-user", contents[i], embeddings[i].tolist())
+    per_row = baseline_count / (time.perf_counter() - start)
+    per_row_bytes = client.bytes_sent / baseline_count
+
+    client = StandInClient(latency=latency)
+    store = MemoryStore(DataAccess(client=client), use_index=False)
+    start = time.perf_counter()
+    await store.store_memories("bench-user", contents, embeddings, chunk_size=chunk_size)
+    bulk = count / (time.perf_counter() - start)
+    bulk_bytes = client.bytes_sent / count
+
+    print(f"store latency {latency * 1000:.1f} ms/call, dimension 1536")
+    print(f"store_memory  (per row, {baseline_count:,} rows):  {per_row:10,.0f} memories/s  {per_row_bytes:8,.0f} B/memory")
+    print(f"store_memories (chunks of {chunk_size}, {count:,} rows): {bulk:10,.0f} memories/s  {bulk_bytes:8,.0f} B/memory")
+    print(f"projected 100k backfill: {100000 / per_row:8.1f} s per row vs {100000 / bulk:8.1f} s bulk")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=100000)
+    parser.add_argument("--baseline-count", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.005)
+    parser.add_argument("--chunk-size", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(run(args.count, args.baseline_count, args.latency, args.chunk_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Recall and latency of the in-process Echo memory index.
+
+    python -m benchmarks.bench_memory_index --sizes 10000,100000,1000000
+
+At dimension 1536 the index holds 6 KB per vector in float32, so the 1M
+run needs about 7 GB of RAM.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from echo.memory.vector_index import VectorIndex
+
+
+def clustered_vectors(rng: np.random.Generator, count: int, dimension: int, centers: np.ndarray) -> np.ndarray:
+    # Unit-norm topic centres plus noise of comparable norm, like real embeddings
+    labels = rng.integers(0, len(centers), count)
+    noise = rng.standard_normal((count, dimension), dtype=np.float32) * (0.7 / np.sqrt(dimension))
+    return centers[labels] + noise
+
+
+def run(size: int, dimension: int, queries: int, limit: int, n_probe: int, seed: int = 0) -> None:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(16, size // 200), dimension), dtype=np.float32)
+    centers /= np.linalg.norm(centers, axis=1, keepdims=True)
+
+    index = VectorIndex(dimension, n_probe=n_probe)
+    start = time.perf_counter()
+    for offset in range(0, size, 50000):
+        count = min(50000, size - offset)
+        ids = [str(i) for i in range(offset, offset + count)]
+        index.add_many(ids, clustered_vectors(rng, count, dimension, centers), [{"id": i} for i in ids])
+    build = time.perf_counter() - start
+
+    exact = VectorIndex(dimension, exact_threshold=size + 1)
+    exact._vectors, exact._size, exact._rows = index._vectors, len(index), index._rows
+
+    query_vectors = clustered_vectors(rng, queries, dimension, centers)
+    recalls, ann_times, exact_times = [], [], []
+    for query in query_vectors:
+        start = time.perf_counter()
+        found = index.search(query, -1.0, limit)
+        ann_times.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        truth = exact.search(query, -1.0, limit)
+        exact_times.append(time.perf_counter() - start)
+        recalls.append(len({r["id"] for r in found} & {r["id"] for r in truth}) / limit)
+
+    print(f"n={size:>9,}  build {build:7.1f} s  recall@{limit} {np.mean(recalls):.3f}  "
+          f"ann p50 {np.median(ann_times) * 1000:7.2f} ms  exact p50 {np.median(exact_times) * 1000:7.2f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--dimension", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--n-probe", type=int, default=8)
+    args = parser.parse_args()
+    for size in (int(s) for s in args.sizes.split(",")):
+        run(size, args.dimension, args.queries, args.limit, args.n_probe)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Memory use and recall of float32 / float16 / int8 Echo memory indexes.
+
+    python -m benchmarks.bench_memory_quantization --count 100000
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.bench_memory_index import clustered_vectors
+from echo.memory.vector_index import VectorIndex, rerank
+
+
+def python_list_bytes(vector: np.ndarray) -> int:
+    values = vector.astype(np.float64).tolist()
+    return sys.getsizeof(values) + sum(sys.getsizeof(value) for value in values)
+
+
+def run(count: int, dimension: int, queries: int, limit: int, rerank_factor: int) -> None:
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((max(16, count // 200), dimension), dtype=np.float32)
+    centers /= np.linalg.norm(centers, axis=1, keepdims=True)
+    vectors = clustered_vectors(rng, count, dimension, centers)
+    ids = [str(i) for i in range(count)]
+    rows = [{"id": i} for i in ids]
+    query_vectors = clustered_vectors(rng, queries, dimension, centers)
+
+    truth_index = VectorIndex(dimension, exact_threshold=count + 1)
+    truth_index.add_many(ids, vectors, rows)
+    truth = [{r["id"] for r in truth_index.search(q, -1.0, limit)} for q in query_vectors]
+    full_vectors = dict(zip(ids, vectors))
+
+    print(f"n={count:,}  dimension={dimension}  recall@{limit} against exact float32")
+    print(f"python list of floats: {python_list_bytes(vectors[0]):8,} B/vector")
+    for precision in ("float32", "float16", "int8"):
+        index = VectorIndex(dimension, exact_threshold=count + 1, precision=precision)
+        index.add_many(ids, vectors, rows)
+
+        recalls, reranked, times = [], [], []
+        for query, expected in zip(query_vectors, truth):
+            start = time.perf_counter()
+            found = index.search(query, -1.0, limit)
+            times.append(time.perf_counter() - start)
+            recalls.append(len({r["id"] for r in found} & expected) / limit)
+            candidates = index.search(query, -1.0, limit * rerank_factor)
+            top = rerank(candidates, full_vectors, query, -1.0, limit)
+            reranked.append(len({r["id"] for r in top} & expected) / limit)
+
+        print(f"{precision:>8}: {index.memory_bytes() / count:8,.0f} B/vector  "
+              f"{index.memory_bytes() / 2 ** 20:8.1f} MiB  recall {np.mean(recalls):.3f}  "
+              f"reranked x{rerank_factor} {np.mean(reranked):.3f}  p50 {np.median(times) * 1000:6.2f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=100000)
+    parser.add_argument("--dimension", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--rerank-factor", type=int, default=4)
+    args = parser.parse_args()
+    run(args.count, args.dimension, args.queries, args.limit, args.rerank_factor)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""Payout throughput: per-row process_payout/update_payout_status vs the batch pipeline.
+
+    python -m benchmarks.bench_payout_batch --users 20000 --latency 0.002
+
+Creates pending payouts from earnings, settles them from an NDJSON file in
+two transitions (processing, then completed/failed) and replays the file to
+show that already-applied settlements are no-ops. Then checks that
+re-running the batch creates no new payouts, that final statuses and
+transaction ids stay put, and that settlements the store rejects fail one
+by one.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.stand_in import StandInAPIError, StandInClient
+from vault.backend.data_access import DataAccess
+from grid.dividend_engine.calculator import DividendCalculator
+from grid.dividend_engine.settlements import read_settlements
+
+STATUS_RANK = {"pending": 0, "processing": 1, "completed": 2, "failed": 2}
+
+
+def sum_dividend_rollups(client, p_user_id, p_first_day, p_last_day):
+    return [{"data_type": "spotify", "total": 1.0 + hash(p_user_id) % 1000 / 100}]
+
+
+def sum_dividend_rollups_by_user(client, p_user_ids, p_first_day, p_last_day):
+    return [{"user_id": user_id, **row} for user_id in p_user_ids
+            for row in sum_dividend_rollups(client, user_id, p_first_day, p_last_day)]
+
+
+def apply_payout_settlements(client, p_settlements):
+    """Mirror of the SQL function, with dicts standing in for the indexes; all or nothing."""
+    for settlement in p_settlements:
+        if settlement["status"] not in STATUS_RANK:
+            raise StandInAPIError(f"Unknown payout status {settlement['status']}", "22023")
+    rows = client.rows("payouts")
+    payouts = {row["id"]: row for row in rows}
+    for settlement in p_settlements:
+        current = payouts.get(settlement["payout_id"], {}).get("transaction_id")
+        if current and settlement["transaction_id"] and current != settlement["transaction_id"]:
+            raise StandInAPIError(f"Payout {settlement['payout_id']} already has transaction {current}, "
+                                  f"not {settlement['transaction_id']}", "22023")
+    owners = {row["transaction_id"]: row["id"] for row in rows if row.get("transaction_id")}
+    updates = []
+    for settlement in p_settlements:
+        payout = payouts.get(settlement["payout_id"])
+        if payout is None:
+            continue
+        transaction_id = payout.get("transaction_id") or settlement["transaction_id"]
+        if payout["status"] == settlement["status"] and payout.get("transaction_id") == transaction_id:
+            continue
+        if payout["status"] != settlement["status"] and \
+                STATUS_RANK[settlement["status"]] <= STATUS_RANK.get(payout["status"], 3):
+            continue
+        if transaction_id and owners.setdefault(transaction_id, payout["id"]) != payout["id"]:
+            raise StandInAPIError("duplicate key value violates unique constraint "
+                                  "\"idx_payouts_transaction_id\"", "23505")
+        updates.append((payout, settlement["status"], transaction_id))
+    for payout, status, transaction_id in updates:
+        payout.update(status=status, transaction_id=transaction_id)
+    return len(updates)
+
+
+def new_client(latency: float) -> StandInClient:
+    client = StandInClient(latency=latency)
+    client.register_function("sum_dividend_rollups", sum_dividend_rollups)
+    client.register_function("sum_dividend_rollups_by_user", sum_dividend_rollups_by_user)
+    client.register_function("apply_payout_settlements", apply_payout_settlements)
+    return client
+
+
+def write_settlement_file(path: str, payouts: list) -> int:
+    rng = random.Random(0)
+    count = 0
+    with open(path, "w", encoding="utf-8") as settlement_file:
+        for payout in payouts:
+            settlement_file.write(json.dumps({"payout_id": payout["id"], "status": "processing"}) + "\n")
+            count += 1
+        for payout in payouts:
+            settlement_file.write(json.dumps({
+                "payout_id": payout["id"],
+                "status": "failed" if rng.random() < 0.02 else "completed",
+                "transaction_id": "tx-" + payout["id"]
+            }) + "\n")
+            count += 1
+    return count
+
+
+async def run(users: int, baseline_users: int, latency: float, chunk_size: int) -> None:
+    user_ids = [f"user-{i}" for i in range(users)]
+
+    calculator = DividendCalculator(DataAccess(client=new_client(latency)))
+    started = time.perf_counter()
+    for user_id in user_ids[:baseline_users]:
+        earnings = await calculator.calculate_total_earnings(user_id)
+        payout = await calculator.process_payout(user_id, earnings["total"], "stripe")
+        await calculator.update_payout_status(payout["id"], "processing")
+        await calculator.update_payout_status(payout["id"], "completed", "tx-" + payout["id"])
+    per_row = baseline_users / (time.perf_counter() - started)
+
+    client = new_client(latency)
+    calculator = DividendCalculator(DataAccess(client=client))
+    created = await calculator.create_payouts_batch(user_ids, "stripe", chunk_size=chunk_size)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "settlements.ndjson")
+        settlement_count = write_settlement_file(path, created["payouts"])
+        settled = await calculator.apply_settlements(read_settlements(path), chunk_size=chunk_size)
+        replayed = await calculator.apply_settlements(read_settlements(path), chunk_size=chunk_size)
+
+    statuses = {}
+    for row in client.rows("payouts"):
+        statuses[row["status"]] = statuses.get(row["status"], 0) + 1
+    assert statuses.get("pending", 0) == 0 and statuses.get("processing", 0) == 0, statuses
+    assert replayed["applied"] == 0, replayed
+
+    print(f"store latency {latency * 1000:.1f} ms/call")
+    print(f"per-row create + 2 updates ({baseline_users:>7,} users):      {per_row:10,.0f} payouts/s")
+    print(f"create_payouts_batch        ({users:>7,} users):      {created['per_second']:10,.0f} payouts/s")
+    print(f"apply_settlements           ({settlement_count:>7,} settlements): {settled['per_second']:10,.0f} settlements/s "
+          f"({settled['applied']:,} applied)")
+    print(f"replay                      ({settlement_count:>7,} settlements): {replayed['per_second']:10,.0f} settlements/s "
+          f"({replayed['applied']:,} applied)")
+    print(f"final statuses: {statuses}")
+
+    # Re-running the batch finds every payout already there
+    rerun = await calculator.create_payouts_batch(user_ids, "stripe", chunk_size=chunk_size)
+    assert created["created"] == users and rerun["created"] == 0, (created["created"], rerun["created"])
+    assert [payout["id"] for payout in rerun["payouts"]] == [payout["id"] for payout in created["payouts"]]
+    assert len(client.rows("payouts")) == users
+    print("re-running create_payouts_batch creates no payouts: ok")
+
+    # Final statuses and transaction ids stay put, and rejected settlements fail on their own
+    fresh = await calculator.create_payouts_batch(user_ids[:2], "stripe", start_date=datetime(2026, 1, 1))
+    rows = {row["id"]: row for row in client.rows("payouts")}
+    payouts = [rows[payout["id"]] for payout in created["payouts"][:5] + fresh["payouts"]]
+    bad = [
+        {"payout_id": payouts[0]["id"], "status": "failed" if payouts[0]["status"] == "completed" else "completed"},
+        {"payout_id": payouts[1]["id"], "status": "refunded"},
+        {"payout_id": payouts[2]["id"], "status": payouts[2]["status"], "transaction_id": payouts[3]["transaction_id"]},
+        {"payout_id": payouts[3]["id"], "status": payouts[3]["status"], "transaction_id": "tx-other"},
+        {"payout_id": payouts[4]["id"], "status": payouts[4]["status"], "transaction_id": payouts[4]["transaction_id"]},
+        {"payout_id": payouts[5]["id"], "status": "processing", "transaction_id": "tx-shared"},
+        {"payout_id": payouts[6]["id"], "status": "processing", "transaction_id": "tx-shared"}
+    ]
+    before = {payout["id"]: dict(payout) for payout in payouts}
+    checked = await calculator.apply_settlements(bad, chunk_size=chunk_size)
+    # Only payouts[5] changes; 0 and 4 are skipped, 1, 2, 3 and 6 fail
+    assert (checked["applied"], checked["skipped"], checked["failed"]) == (1, 2, 4), checked
+    assert sorted(error["payout_id"] for error in checked["errors"]) == sorted(payouts[i]["id"] for i in (1, 2, 3, 6))
+    assert [payout["id"] for payout in payouts if payout != before[payout["id"]]] == [payouts[5]["id"]]
+    print("completed/failed are final; unknown statuses, replaced and reused transaction ids fail per settlement: ok")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--baseline-users", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.002)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(run(args.users, args.baseline_users, args.latency, args.chunk_size))
+
+
+if __name__ == "__main__":
+    main()
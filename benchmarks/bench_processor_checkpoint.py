@@ -0,0 +1,140 @@
+"""Processor state persistence: to_json/from_json vs the chunked binary checkpoint.
+
+    python -m benchmarks.bench_processor_checkpoint --records 500000
+
+Compares file size, write/read time and peak traced memory, then interrupts
+a checkpointed process_stream partway and resumes it, checking that every
+record lands in the checkpoint exactly once. Also checks that an empty file
+reads as an empty checkpoint and that anything else is rejected unread.
+"""
+import argparse
+import asyncio
+import os
+import pickle
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks import signal_modules
+
+checkpoint = signal_modules.load("processors.checkpoint")
+base = signal_modules.load("processors.base")
+
+
+def synthetic_record(i: int) -> dict:
+    return {"id": i, "from": f"user{i % 5000}@example.com", "subject": f"Message {i}",
+            "labels": ["INBOX", "UPDATES"], "size": i * 37 % 100000, "score": (i % 1000) / 1000}
+
+
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - started
+
+
+def peak_mb(func) -> float:
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1e6
+
+
+async def resume_check(directory: str, records: int, chunk_size: int) -> None:
+    path = os.path.join(directory, "stream.ckpt")
+    source = [("emails", synthetic_record(i)) for i in range(records)]
+    stop_after = records // chunk_size * 6 // 10
+
+    processor = base.GmailProcessor({})
+    chunks = 0
+    async for _ in processor.process_stream(source, chunk_size=chunk_size, checkpoint=path):
+        chunks += 1
+        if chunks > stop_after:
+            break  # interrupted: this chunk was never acknowledged
+
+    processor = base.GmailProcessor({})
+    resumed = 0
+    async for chunk in processor.process_stream(source, chunk_size=chunk_size, checkpoint=path):
+        resumed += len(chunk["emails"])
+
+    ids = [record["id"] for records_, _ in checkpoint.read_checkpoint(path) for _, record in records_]
+    assert ids == list(range(records)), "resumed checkpoint is missing or repeating records"
+    print(f"resume: interrupted after {stop_after} of {-(-records // chunk_size)} chunks, "
+          f"resumed with {resumed:,} records, checkpoint holds all {len(ids):,} exactly once")
+
+
+async def format_check(directory: str) -> None:
+    empty = os.path.join(directory, "empty.ckpt")
+    open(empty, "wb").close()
+    assert list(checkpoint.read_checkpoint(empty)) == []
+    assert base.GmailProcessor.load_checkpoint(empty).processed_data == []
+    processor = base.GmailProcessor({})
+    streamed = [chunk async for chunk in processor.process_stream([("emails", {"id": 1})], checkpoint=empty)]
+    assert len(streamed) == 1 and [len(records) for records, _ in checkpoint.read_checkpoint(empty)] == [1]
+
+    foreign = os.path.join(directory, "foreign.ckpt")
+    with open(foreign, "wb") as foreign_file:
+        foreign_file.write(pickle.dumps([{"id": 1}]))
+    try:
+        list(checkpoint.read_checkpoint(foreign))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("a pickle was read as a checkpoint")
+    print("empty file reads as an empty checkpoint; non-checkpoint files are rejected: ok")
+
+
+async def run(records: int, chunk_size: int) -> None:
+    processor = base.GmailProcessor({})
+    processor.processed_data = [synthetic_record(i) for i in range(records)]
+    processor.quality_scores = {"completeness": 0.97}
+
+    with tempfile.TemporaryDirectory() as directory:
+        json_path = os.path.join(directory, "state.json")
+        ckpt_path = os.path.join(directory, "state.ckpt")
+
+        def write_json():
+            with open(json_path, "w") as state_file:
+                state_file.write(processor.to_json())
+
+        def read_json():
+            with open(json_path) as state_file:
+                return base.GmailProcessor.from_json(state_file.read())
+
+        _, json_write = timed(write_json)
+        loaded, json_read = timed(read_json)
+        assert loaded.processed_data == processor.processed_data
+        _, ckpt_write = timed(lambda: processor.save_checkpoint(ckpt_path, chunk_size))
+        loaded, ckpt_read = timed(lambda: base.GmailProcessor.load_checkpoint(ckpt_path))
+        assert loaded.processed_data == processor.processed_data
+        del loaded
+
+        def lazy_scan():
+            return sum(len(chunk) for chunk, _ in checkpoint.read_checkpoint(ckpt_path))
+
+        count, lazy_read = timed(lazy_scan)
+        assert count == records
+
+        print(f"{records:,} records")
+        print(f"{'':>18} {'size':>9} {'write':>8} {'read':>8} {'write peak':>11} {'read peak':>10}")
+        print(f"{'to_json/from_json':>18} {os.path.getsize(json_path) / 1e6:7.1f}MB {json_write:7.2f}s {json_read:7.2f}s "
+              f"{peak_mb(write_json):9.1f}MB {peak_mb(read_json):8.1f}MB")
+        print(f"{'checkpoint':>18} {os.path.getsize(ckpt_path) / 1e6:7.1f}MB {ckpt_write:7.2f}s {ckpt_read:7.2f}s "
+              f"{peak_mb(lambda: processor.save_checkpoint(ckpt_path, chunk_size)):9.1f}MB "
+              f"{peak_mb(lambda: base.GmailProcessor.load_checkpoint(ckpt_path)):8.1f}MB")
+        print(f"{'lazy chunk scan':>18} {'':>9} {'':>8} {lazy_read:7.2f}s {'':>11} {peak_mb(lazy_scan):8.1f}MB")
+
+        await resume_check(directory, min(records, 100000), chunk_size)
+        await format_check(directory)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=500000)
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    args = parser.parse_args()
+    asyncio.run(run(args.records, args.chunk_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Gmail MIME parsing throughput from 1 to N worker processes with ProcessorRunner.
+
+    python -m benchmarks.bench_processor_runner --messages 20000 --workers 1 2 4 8
+
+Writes a synthetic NDJSON export of raw RFC 822 messages, then parses it on
+the event loop (process_stream over read_export) and with run_export at each
+worker count. Also reports the longest event-loop stall seen by a 10 ms
+heartbeat, which is what CPU-bound parsing on the loop costs everything else.
+The export has blank lines and a few bodies in an unknown charset mixed in.
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+from benchmarks import signal_modules
+
+signal_modules.load("processors.checkpoint")
+base = signal_modules.load("processors.base")
+runner_module = signal_modules.load("processors.runner")
+
+MESSAGE = (
+    "From: Sender {i} <sender{i}@example.com>\r\n"
+    "To: user@example.com\r\n"
+    "Subject: =?utf-8?q?Weekly_report_{i}?=\r\n"
+    "Date: Mon, 12 Oct 2026 10:{m:02d}:00 +0000\r\n"
+    "MIME-Version: 1.0\r\n"
+    "Content-Type: multipart/alternative; boundary=\"b{i}\"\r\n\r\n"
+    "--b{i}\r\nContent-Type: text/plain; charset=utf-8\r\nContent-Transfer-Encoding: quoted-printable\r\n\r\n"
+    "Hello =E2=80=94 here is report {i}. " + "Lorem ipsum dolor sit amet. " * 10 + "\r\n"
+    "--b{i}\r\nContent-Type: text/html; charset=utf-8\r\n\r\n<p>Report {i}</p>\r\n"
+    "--b{i}--\r\n"
+)
+
+
+def write_export(path: str, messages: int) -> None:
+    with open(path, "w", encoding="utf-8") as export:
+        for i in range(messages):
+            raw = MESSAGE.format(i=i, m=i % 60)
+            if i % 1000 == 999:
+                raw = raw.replace("text/plain; charset=utf-8", "text/plain; charset=x-unknown", 1)
+            record = {"id": i, "raw": raw, "labels": ["INBOX"]}
+            export.write(json.dumps({"section": "emails", "record": record}) + "\n")
+            if i % 500 == 0:
+                export.write("  \n")
+
+
+async def measure(consume) -> tuple:
+    stalls = [0.0]
+    running = True
+
+    async def heartbeat():
+        loop = asyncio.get_running_loop()
+        while running:
+            before = loop.time()
+            await asyncio.sleep(0.01)
+            stalls[0] = max(stalls[0], loop.time() - before - 0.01)
+
+    beat = asyncio.ensure_future(heartbeat())
+    started = time.perf_counter()
+    count = await consume()
+    elapsed = time.perf_counter() - started
+    running = False
+    await beat
+    return count, elapsed, stalls[0]
+
+
+async def run(messages: int, worker_counts: list, shard_mb: float) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "gmail.ndjson")
+        write_export(path, messages)
+        print(f"{messages:,} messages, {os.path.getsize(path) / 1e6:,.0f} MB, {os.cpu_count()} CPUs available")
+
+        async def on_loop():
+            processor = base.GmailProcessor({})
+            count = 0
+            async for chunk in processor.process_stream(base.read_export(path)):
+                count += len(chunk["emails"])
+            return count
+
+        count, elapsed, stall = await measure(on_loop)
+        print(f"{'event loop':>12}: {count / elapsed:9,.0f} messages/s, max loop stall {stall * 1000:7.1f} ms")
+
+        for workers in worker_counts:
+            runner = runner_module.ProcessorRunner(max_workers=workers, shard_bytes=int(shard_mb * 1e6))
+
+            async def in_pool():
+                count = 0
+                async for chunk in runner.run_export("gmail", path):
+                    count += len(chunk["emails"])
+                return count
+
+            count, elapsed, stall = await measure(in_pool)
+            runner.close()
+            assert count == messages, count
+            print(f"{workers:>4} workers: {count / elapsed:9,.0f} messages/s, max loop stall {stall * 1000:7.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--shard-mb", type=float, default=1.0)
+    args = parser.parse_args()
+    asyncio.run(run(args.messages, args.workers, args.shard_mb))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Concurrent ContextManager.get_context lookups: uncoalesced vs singleflight vs micro-batching.
+
+    python -m benchmarks.bench_request_coalescing --agents 50 --rounds 20 --latency 0.005
+
+Each round, every agent looks up a context at the same moment: the same
+shared context in the first scenario, a distinct one each in the second.
+The hot-context cache is empty, so each lookup reaches the loader. Also
+checks that a missing id fails every waiter, that a malformed id in a batch
+fails only its own lookup, that uppercase ids find their contexts, and that
+a write is visible to the next lookup.
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from benchmarks.stand_in import StandInAPIError, StandInClient, StandInQuery
+from mcp.agents.context_cache import ContextCache
+from mcp.agents.context_manager import ContextManager
+from vault.backend.coalesce import RowLoader
+from vault.backend.data_access import DataAccess
+
+
+class UuidQuery(StandInQuery):
+    """Rejects non-UUID ids in filters, as Postgres does for a uuid column."""
+
+    def eq(self, column, value):
+        self._check([value])
+        return super().eq(column, value)
+
+    def in_(self, column, values):
+        self._check(values)
+        return super().in_(column, values)
+
+    def _check(self, values):
+        for value in values:
+            try:
+                uuid.UUID(str(value))
+            except ValueError:
+                self.invalid = value
+
+    def execute(self):
+        if getattr(self, "invalid", None) is not None:
+            self.client.record_call(None, self.table)
+            raise StandInAPIError(f'invalid input syntax for type uuid: "{self.invalid}"', "22P02")
+        return super().execute()
+
+
+class UuidClient(StandInClient):
+    def table(self, name: str) -> StandInQuery:
+        return UuidQuery(self, name)
+
+
+def context(i: int) -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "user_id": f"user-{i % 10}",
+        "context_type": "conversation",
+        "data": {"turns": i % 50, "topic": f"topic {i}"},
+        "metadata": {},
+        "created_at": "2026-10-18T00:00:00",
+        "updated_at": "2026-10-18T00:00:00"
+    }
+
+
+async def scenario(manager: ContextManager, client: StandInClient, rounds: int, ids_for_round) -> tuple:
+    client.calls = 0
+    began = time.perf_counter()
+    for round_number in range(rounds):
+        ids = ids_for_round(round_number)
+        contexts = await asyncio.gather(*(manager.get_context(context_id) for context_id in ids))
+        assert [c["id"] for c in contexts] == ids
+    return (time.perf_counter() - began) / rounds, client.calls
+
+
+async def run(agents: int, rounds: int, latency: float) -> None:
+    client = StandInClient(latency)
+    rows = [context(i) for i in range(agents * rounds)]
+    client.rows("contexts").extend(rows)
+    db = DataAccess(client=client)
+
+    print(f"store round trip {latency * 1000:.1f} ms, {agents} concurrent lookups per round, {rounds} rounds")
+    print(f"{'mode':<8}{'shared ms/round':>17}{'queries':>9}{'distinct ms/round':>19}{'queries':>9}")
+    for mode in ("off", "single", "batch"):
+        manager = ContextManager(db, cache=ContextCache(db, max_users=0))
+        manager.loader = RowLoader(db, "contexts", mode=mode)
+        shared_time, shared_calls = await scenario(
+            manager, client, rounds, lambda r: [rows[r]["id"]] * agents)
+        distinct_time, distinct_calls = await scenario(
+            manager, client, rounds, lambda r: [row["id"] for row in rows[r * agents:(r + 1) * agents]])
+        print(f"{mode:<8}{shared_time * 1000:>17.2f}{shared_calls:>9,}{distinct_time * 1000:>19.2f}{distinct_calls:>9,}")
+
+        # Every waiter on a missing id sees the error
+        results = await asyncio.gather(*(manager.get_context("missing") for _ in range(agents)),
+                                       return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results), mode
+
+        # Updates are visible to the next lookup, and callers get their own copies
+        target = rows[0]["id"]
+        first, second = await asyncio.gather(manager.get_context(target), manager.get_context(target))
+        first["data"] = "mutated"
+        assert second["data"] != "mutated", mode
+        await manager.update_context(target, data={"turns": -1})
+        assert (await manager.get_context(target))["data"] == {"turns": -1}, mode
+    print("errors reach every waiter, callers get independent rows, writes are visible: ok")
+
+    # A malformed id fails the batch's in_ query; the other keys are then looked up one by one
+    client = UuidClient(latency)
+    client.rows("contexts").extend(rows[:agents])
+    db = DataAccess(client=client)
+    manager = ContextManager(db, cache=ContextCache(db, max_users=0))
+    manager.loader = RowLoader(db, "contexts", mode="batch")
+    ids = [row["id"] for row in rows[:agents]]
+    results = await asyncio.gather(*(manager.get_context(context_id) for context_id in ids + ["not-a-uuid"]),
+                                   return_exceptions=True)
+    assert [result["id"] for result in results[:-1]] == ids, results
+    assert isinstance(results[-1], StandInAPIError), results[-1]
+    print(f"malformed id fails only its own lookup ({client.calls} queries for {agents + 1} keys): ok")
+
+    # Postgres matches a uuid however it is written; results come back canonical
+    client.calls = 0
+    upper = [context_id.upper() for context_id in ids[:10]]
+    singles = await asyncio.gather(*(manager.get_context(context_id) for context_id in upper + ids[:10]))
+    assert [context["id"] for context in singles] == ids[:10] * 2, singles
+    assert client.calls == 1, client.calls
+    assert [context["id"] for context in await manager.get_contexts(upper)] == ids[:10]
+    print("uppercase ids find their contexts and share lookups with the canonical ids: ok")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--agents", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.005)
+    args = parser.parse_args()
+    asyncio.run(run(args.agents, args.rounds, args.latency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Dashboard polling of GET /vault/entries: uncached vs response cache vs conditional GET (304).
+
+    python -m benchmarks.bench_response_cache --polls 500 --entries 100 --latency 0.005
+
+Each poll fetches one page of a user's entries and one entry through the
+FastAPI app in-process (httpx ASGI transport) against a stand-in store with
+a fixed round-trip latency. Store reads and body serializations are counted.
+A write between polls must invalidate both cached responses.
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+import httpx
+
+from benchmarks.stand_in import StandInClient
+from vault.backend.data_access import DataAccess
+from vault.backend.response_cache import ResponseCache
+import vault.backend.main as vault_api
+
+
+def entry(i: int) -> dict:
+    stamp = f"2026-01-01T00:{i // 60 % 60:02d}:{i % 60:02d}"
+    return {
+        "id": str(uuid.uuid4()),
+        "user_id": "user",
+        "data_type": "health",
+        "content": {"heart_rate": 60 + i % 40, "steps": i * 37 % 12000, "note": "resting " * 20},
+        "metadata": {"source": "bench"},
+        "created_at": stamp,
+        "updated_at": stamp
+    }
+
+
+async def poll(http: httpx.AsyncClient, polls: int, entry_id: str, conditional: bool) -> tuple:
+    etags = {}
+    not_modified = 0
+    sent = 0
+    began = time.perf_counter()
+    for _ in range(polls):
+        for path in ("/vault/entries?user_id=user&limit=100", f"/vault/entries/{entry_id}"):
+            headers = {"If-None-Match": etags[path]} if conditional and path in etags else {}
+            response = await http.get(path, headers=headers)
+            assert response.status_code in (200, 304), response.text
+            not_modified += response.status_code == 304
+            sent += len(response.content)
+            etags[path] = response.headers["etag"]
+    return (time.perf_counter() - began) / polls, not_modified, sent / polls
+
+
+async def run(polls: int, entries: int, latency: float) -> None:
+    client = StandInClient(latency)
+    rows = [entry(i) for i in range(entries)]
+    client.rows("vault_entries").extend(rows)
+    vault_api.db = DataAccess(client=client)
+    vault_api.schema_cache.db = vault_api.entry_loader.db = vault_api.db
+
+    serialize = vault_api._json_body
+    serialized = [0]
+
+    def counting_json_body(data):
+        serialized[0] += 1
+        return serialize(data)
+
+    vault_api._json_body = counting_json_body
+    transport = httpx.ASGITransport(app=vault_api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://vault") as http:
+        print(f"store round trip {latency * 1000:.1f} ms, {entries} entries per page, {polls} polls of 2 requests")
+        print(f"{'mode':<26}{'ms/poll':>9}{'store reads':>13}{'serialized':>12}{'304s':>7}{'bytes/poll':>12}")
+        for label, cache, conditional in (
+            ("no cache", ResponseCache(max_bytes=0), False),
+            ("response cache", ResponseCache(), False),
+            ("cache + If-None-Match", ResponseCache(), True)
+        ):
+            vault_api.response_cache = cache
+            client.calls, serialized[0] = 0, 0
+            per_poll, not_modified, sent = await poll(http, polls, rows[0]["id"], conditional)
+            print(f"{label:<26}{per_poll * 1000:>9.2f}{client.calls:>13,}{serialized[0]:>12,}{not_modified:>7,}{sent:>12,.0f}")
+
+        # A write for the user must invalidate both cached responses
+        before = (await http.get("/vault/entries?user_id=user&limit=100")).headers["etag"]
+        newer = dict(rows[0], id=str(uuid.uuid4()), created_at="2026-02-01T00:00:00", updated_at="2026-02-01T00:00:00")
+        assert (await http.post("/vault/entries", json=newer)).status_code == 200
+        response = await http.get("/vault/entries?user_id=user&limit=100", headers={"If-None-Match": before})
+        assert response.status_code == 200 and response.headers["etag"] != before, "stale page served"
+        assert response.json()[0]["id"] == newer["id"], "new entry missing"
+        print("write invalidated the cached page: ok")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--polls", type=int, default=500)
+    parser.add_argument("--entries", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.005)
+    args = parser.parse_args()
+    asyncio.run(run(args.polls, args.entries, args.latency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Per-entry cost of schema validation: registry lookup per write vs the compiled SchemaCache.
+
+    python -m benchmarks.bench_schema_validation --entries 100000 --latency 0.002
+
+The naive path reads the schema_registry row for every entry and walks its
+field list; the cached path compiles each (type, version) once and checks
+entries in-process. Registering a new version mid-run checks invalidation.
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.stand_in import StandInClient
+from vault.backend.data_access import DataAccess
+from vault.backend.schema_cache import FIELD_CHECKS, SchemaCache, SchemaValidationError
+
+FIELDS = [
+    {"name": "marker", "type": "string", "required": True},
+    {"name": "value", "type": "number", "unit": "mg/dL", "required": True},
+    {"name": "reference_low", "type": "number"},
+    {"name": "reference_high", "type": "number"},
+    {"name": "fasting", "type": "boolean"},
+    {"name": "sample_count", "type": "integer"},
+    {"name": "lab", "type": "string"},
+    {"name": "collected_at", "type": "datetime", "required": True},
+    {"name": "notes", "type": "text"},
+    {"name": "panel", "type": "array"},
+    {"name": "flags", "type": "object"},
+    {"name": "device", "type": "string"}
+]
+
+
+def entry(i: int) -> dict:
+    content = {
+        "marker": "glucose", "value": 80 + i % 40, "reference_low": 70, "reference_high": 99,
+        "fasting": bool(i % 2), "sample_count": 1, "lab": "Quest",
+        "collected_at": "2026-03-01T08:15:00Z", "notes": "routine", "panel": ["cmp"], "flags": {}
+    }
+    if i % 100 == 99:
+        content["value"] = "high"
+    return content
+
+
+async def naive_validate(db: DataAccess, schema_type: str, content: dict) -> None:
+    result = await db.table("schema_registry").select("*").eq("type", schema_type).execute()
+    fields = max(result.data, key=lambda row: row["version"])["fields"]
+    errors = []
+    for field in fields:
+        value = content.get(field["name"])
+        if value is None:
+            if field.get("required"):
+                errors.append(f"{field['name']} is required")
+        elif field["type"] in FIELD_CHECKS and not FIELD_CHECKS[field["type"]](value):
+            errors.append(f"{field['name']} must be {field['type']}")
+    if errors:
+        raise SchemaValidationError("; ".join(errors))
+
+
+async def find_rejected(validate, entries: int) -> tuple:
+    """Seconds per entry and the indices of the entries rejected."""
+    rejected = []
+    began = time.perf_counter()
+    for i in range(entries):
+        try:
+            await validate(entry(i))
+        except SchemaValidationError:
+            rejected.append(i)
+    return (time.perf_counter() - began) / entries, rejected
+
+
+async def run(entries: int, naive_entries: int, latency: float) -> None:
+    client = StandInClient(latency)
+    client.rows("schema_registry").append(
+        {"id": "s1", "type": "blood_test", "display_name": "Blood Test", "version": 1, "fields": FIELDS}
+    )
+    db = DataAccess(client=client)
+    cache = SchemaCache(db)
+
+    client.calls = 0
+    naive_time, naive_rejected = await find_rejected(lambda c: naive_validate(db, "blood_test", c), naive_entries)
+    naive_calls = client.calls
+
+    client.calls = 0
+    cached_time, cached_rejected = await find_rejected(lambda c: cache.validate("blood_test", c), entries)
+    cached_calls = client.calls
+    # Both paths saw the same first entries and must reject the same ones
+    common = min(entries, naive_entries)
+    assert [i for i in naive_rejected if i < common] == [i for i in cached_rejected if i < common], "paths disagree"
+
+    print(f"registry round trip {latency * 1000:.1f} ms, {len(FIELDS)} fields, 1% invalid entries")
+    print(f"{'path':<22}{'entries':>10}{'us/entry':>12}{'registry reads':>16}{'rejected':>10}")
+    print(f"{'registry per write':<22}{naive_entries:>10,}{naive_time * 1e6:>12,.1f}{naive_calls:>16,}{len(naive_rejected):>10,}")
+    print(f"{'SchemaCache':<22}{entries:>10,}{cached_time * 1e6:>12,.1f}{cached_calls:>16,}{len(cached_rejected):>10,}")
+
+    # A new version with "device" required applies once the cache is invalidated
+    client.rows("schema_registry").append({
+        "id": "s2", "type": "blood_test", "display_name": "Blood Test", "version": 2,
+        "fields": FIELDS[:-1] + [{"name": "device", "type": "string", "required": True}]
+    })
+    cache.invalidate("blood_test")
+    try:
+        await cache.validate("blood_test", entry(0))
+        raise AssertionError("version 2 was not picked up")
+    except SchemaValidationError as error:
+        assert "device" in str(error)
+    await cache.validate("blood_test", entry(0), version=1)
+    print(f"after registering version 2: {cache.loads} registry loads in total, version 1 still served")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=100000)
+    parser.add_argument("--naive-entries", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.002)
+    args = parser.parse_args()
+    asyncio.run(run(args.entries, args.naive_entries, args.latency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Peak RSS and throughput ingesting a synthetic export: process() vs process_stream().
+
+    python -m benchmarks.bench_signal_stream --size-gb 5 --baseline-gb 0.25
+
+The export is generated lazily as NDJSON-sized Gmail records and parsed
+line by line, so nothing but the pipeline itself holds memory. Streaming
+runs first because peak RSS only ever grows; the whole-dict baseline then
+loads --baseline-gb into memory to show what the old path costs.
+"""
+import argparse
+import asyncio
+import json
+import resource
+import time
+
+from benchmarks import signal_modules
+
+signal_modules.load("processors.checkpoint")
+base = signal_modules.load("processors.base")
+
+BODY = "lorem ipsum dolor sit amet " * 14
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def synthetic_lines(size: int):
+    produced = index = 0
+    while produced < size:
+        if index % 20 == 0:
+            line = f'{{"section": "contacts", "record": {{"id": {index}, "email": "user{index}@example.com"}}}}'
+        else:
+            line = (f'{{"section": "emails", "record": {{"id": {index}, "thread": {index // 7}, '
+                    f'"from": "user{index % 5000}@example.com", "subject": "Message {index}", "body": "{BODY}"}}}}')
+        produced += len(line) + 1
+        index += 1
+        yield line
+
+
+async def synthetic_export(size: int):
+    for count, line in enumerate(synthetic_lines(size)):
+        item = json.loads(line)
+        yield item["section"], item["record"]
+        if count % 1000 == 0:
+            # Hand control back to the loop as a real reader would
+            await asyncio.sleep(0)
+
+
+async def run(size_gb: float, baseline_gb: float, chunk_size: int, buffer_size: int) -> None:
+    processor = base.GmailProcessor({"stream_chunk_size": chunk_size, "stream_buffer_size": buffer_size})
+    size = int(size_gb * 1e9)
+    start_rss = peak_rss_mb()
+
+    started = time.perf_counter()
+    records = 0
+    async for chunk in processor.process_stream(synthetic_export(size)):
+        assert await processor.validate(chunk)
+        records += len(chunk["emails"]) + len(chunk["contacts"])
+    elapsed = time.perf_counter() - started
+    stream_rss = peak_rss_mb()
+    print(f"process_stream: {size_gb:g} GB, {records:,} records in {elapsed:.1f}s "
+          f"({size / elapsed / 1e6:,.0f} MB/s), peak RSS {start_rss:,.0f} -> {stream_rss:,.0f} MB")
+
+    if baseline_gb:
+        started = time.perf_counter()
+        raw_data = {"emails": [], "contacts": [], "labels": []}
+        for line in synthetic_lines(int(baseline_gb * 1e9)):
+            item = json.loads(line)
+            raw_data[item["section"]].append(item["record"])
+        processed = await processor.process(raw_data)
+        assert await processor.validate(processed)
+        elapsed = time.perf_counter() - started
+        print(f"process (whole dict): {baseline_gb:g} GB in {elapsed:.1f}s, "
+              f"peak RSS {stream_rss:,.0f} -> {peak_rss_mb():,.0f} MB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-gb", type=float, default=5.0)
+    parser.add_argument("--baseline-gb", type=float, default=0.25)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--buffer-size", type=int, default=10000)
+    args = parser.parse_args()
+    asyncio.run(run(args.size_gb, args.baseline_gb, args.chunk_size, args.buffer_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Cold vs warm throughput of Gatekeeper.verify_token.
+
+    python -m benchmarks.bench_verify_token --iterations 50000
+
+Also checks that expired, tampered and malformed tokens get a 401.
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import jwt
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "bench.bench.bench")
+os.environ.setdefault("JWT_SECRET", "benchmark-secret-0123456789abcdef")
+
+from api_layer.access_control.gatekeeper import Gatekeeper
+
+
+async def run(iterations: int, cache_size: int) -> float:
+    os.environ["GATEKEEPER_TOKEN_CACHE_SIZE"] = str(cache_size)
+    gatekeeper = Gatekeeper()
+    token = jwt.encode(
+        {"sub": "bench-user", "exp": int(time.time()) + 3600},
+        os.environ["JWT_SECRET"],
+        algorithm="HS256"
+    )
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await gatekeeper.verify_token(credentials)
+    return iterations / (time.perf_counter() - start)
+
+
+async def check_rejections() -> None:
+    os.environ["GATEKEEPER_TOKEN_CACHE_SIZE"] = "1024"
+    gatekeeper = Gatekeeper()
+    secret = os.environ["JWT_SECRET"]
+    valid = jwt.encode({"sub": "bench-user", "exp": int(time.time()) + 3600}, secret, algorithm="HS256")
+    tokens = {
+        "expired": (jwt.encode({"sub": "bench-user", "exp": int(time.time()) - 60}, secret, algorithm="HS256"),
+                    "Token has expired"),
+        "wrong key": (jwt.encode({"sub": "bench-user"}, secret + "-other", algorithm="HS256"), "Invalid token"),
+        "tampered": (valid[:-4] + ("AAAA" if not valid.endswith("AAAA") else "BBBB"), "Invalid token"),
+        "malformed": ("not-a-jwt", "Invalid token")
+    }
+    for name, (token, detail) in tokens.items():
+        try:
+            await gatekeeper.verify_token(HTTPAuthorizationCredentials(scheme="Bearer", credentials=token))
+        except HTTPException as error:
+            assert (error.status_code, error.detail) == (401, detail), (name, error.status_code, error.detail)
+        else:
+            raise AssertionError(f"{name} token was accepted")
+    print(f"rejects {', '.join(tokens)} tokens with 401: ok")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=50000)
+    args = parser.parse_args()
+
+    cold = asyncio.run(run(args.iterations, cache_size=0))
+    warm = asyncio.run(run(args.iterations, cache_size=1024))
+    print(f"cold (jwt.decode every call): {cold:12,.0f} verifications/s")
+    print(f"warm (token cache):           {warm:12,.0f} verifications/s")
+    print(f"speedup:                      {warm / cold:12.1f}x")
+    asyncio.run(check_rejections())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Measurement helpers for the benchmark suite: latency percentiles, throughput,
+allocations per operation, and JSON results that can be compared run to run.
+"""
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import gc
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+Operation = Callable[[int], Awaitable[Any]]
+
+# Metrics where a larger value is a regression; ops_per_sec is the other way round
+LOWER_IS_BETTER = ("p50_ms", "p90_ms", "p99_ms", "alloc_kb_per_op")
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    rank = min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[rank]
+
+
+async def measure(op: Operation,
+                  iterations: int,
+                  warmup: int = 20,
+                  concurrency: int = 1,
+                  alloc_samples: int = 50) -> Dict[str, Any]:
+    """Run op(i) iterations times and summarise it.
+
+    With concurrency > 1, that many workers run operations back to back, so
+    latencies include queueing behind the shared executor. Allocations are
+    measured in a separate pass under tracemalloc (which slows everything
+    down) as the mean peak growth of traced memory during one operation.
+    """
+    for i in range(warmup):
+        await op(i)
+
+    latencies: List[float] = []
+    next_index = warmup
+
+    async def worker() -> None:
+        nonlocal next_index
+        while next_index < warmup + iterations:
+            index = next_index
+            next_index += 1
+            began = time.perf_counter()
+            await op(index)
+            latencies.append(time.perf_counter() - began)
+
+    gc.collect()
+    began = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - began
+
+    growth = []
+    tracemalloc.start()
+    try:
+        for i in range(alloc_samples):
+            current = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            await op(warmup + iterations + i)
+            growth.append(tracemalloc.get_traced_memory()[1] - current)
+    finally:
+        tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "iterations": iterations,
+        "concurrency": concurrency,
+        "ops_per_sec": iterations / elapsed if elapsed else 0.0,
+        "mean_ms": sum(latencies) / len(latencies) * 1000,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p90_ms": percentile(latencies, 0.90) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": latencies[-1] * 1000,
+        "alloc_kb_per_op": sum(growth) / len(growth) / 1024 if growth else 0.0
+    }
+
+
+def environment(settings: Dict[str, Any]) -> Dict[str, Any]:
+    """Describe the run: interpreter, machine, commit and benchmark settings."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "settings": settings
+    }
+
+
+def write_results(path: str, meta: Dict[str, Any], results: Dict[str, Dict[str, Any]]) -> None:
+    """Write a run's results as JSON."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as results_file:
+        json.dump({"meta": meta, "results": results}, results_file, indent=2, sort_keys=True)
+
+
+def read_results(path: str) -> Dict[str, Any]:
+    with open(path) as results_file:
+        return json.load(results_file)
+
+
+def compare(current: Dict[str, Dict[str, Any]],
+            baseline: Dict[str, Dict[str, Any]],
+            threshold: float = 0.1) -> List[Dict[str, Any]]:
+    """Return the metrics that got worse than baseline by more than threshold (a fraction)."""
+    regressions = []
+    for name, metrics in sorted(current.items()):
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        for metric in LOWER_IS_BETTER + ("ops_per_sec",):
+            old, new = previous.get(metric), metrics.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = change < -threshold if metric == "ops_per_sec" else change > threshold
+            if worse:
+                regressions.append({"benchmark": name, "metric": metric, "baseline": old,
+                                    "current": new, "change": change})
+    return regressions
+
+
+def format_table(results: Dict[str, Dict[str, Any]], baseline: Optional[Dict[str, Dict[str, Any]]] = None) -> str:
+    """Render results as a text table, with the p50 change against baseline if given."""
+    lines = [f"{'benchmark':<34}{'ops/s':>10}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'KB/op':>9}"
+             + (f"{'p50 vs base':>13}" if baseline else "")]
+    for name, metrics in sorted(results.items()):
+        line = (f"{name:<34}{metrics['ops_per_sec']:>10,.0f}{metrics['p50_ms']:>9.3f}"
+                f"{metrics['p90_ms']:>9.3f}{metrics['p99_ms']:>9.3f}{metrics['alloc_kb_per_op']:>9.1f}")
+        if baseline:
+            previous = baseline.get(name)
+            if previous and previous.get("p50_ms"):
+                line += f"{(metrics['p50_ms'] - previous['p50_ms']) / previous['p50_ms']:>+13.1%}"
+            else:
+                line += f"{'new':>13}"
+        lines.append(line)
+    return "\n".join(lines)
@@ -0,0 +1,27 @@
+"""Imports modules from signal/, which the standard library signal module shadows.
+
+Each module is loaded by path and registered in sys.modules under its
+dotted name (signal.processors.base, ...), so the signal modules' imports
+of each other resolve and pool workers can unpickle their functions. Load
+a module's signal dependencies before the module itself.
+"""
+import importlib.util
+import os
+import sys
+from types import ModuleType
+
+
+def load(name: str) -> ModuleType:
+    """Import signal.<name>, e.g. load("processors.base")."""
+    dotted = "signal." + name
+    if dotted not in sys.modules:
+        path = os.path.join(os.path.dirname(__file__), "..", "signal", *name.split(".")) + ".py"
+        spec = importlib.util.spec_from_file_location(dotted, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[dotted] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            del sys.modules[dotted]
+            raise
+    return sys.modules[dotted]
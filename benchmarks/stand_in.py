@@ -0,0 +1,289 @@
+"""In-process stand-in for the synchronous supabase client.
+
+Implements the query-builder subset used by the Y modules against plain
+in-memory tables. execute() sleeps for the configured latency to emulate
+the blocking HTTP round trip of the real client: a base latency (optionally
+per table or function) plus seeded, exponentially distributed jitter, so
+runs with the same seed draw the same sequence of delays.
+"""
+from typing import Any, Callable, Dict, List, Optional
+import copy
+import json
+import random
+import threading
+import time
+import uuid
+
+
+_OPERATORS = {
+    "eq": lambda left, right: left == right,
+    "neq": lambda left, right: left != right,
+    "gt": lambda left, right: left is not None and left > right,
+    "gte": lambda left, right: left is not None and left >= right,
+    "lt": lambda left, right: left is not None and left < right,
+    "lte": lambda left, right: left is not None and left <= right
+}
+
+
+def _split_terms(filters: str) -> List[str]:
+    """Split on commas outside parentheses and double quotes."""
+    terms, depth, quoted, start, i = [], 0, False, 0, 0
+    while i < len(filters):
+        char = filters[i]
+        if char == "\\" and quoted:
+            i += 1
+        elif char == '"':
+            quoted = not quoted
+        elif not quoted and char in "()":
+            depth += 1 if char == "(" else -1
+        elif not quoted and char == "," and depth == 0:
+            terms.append(filters[start:i])
+            start = i + 1
+        i += 1
+    terms.append(filters[start:])
+    return [term.strip() for term in terms if term.strip()]
+
+
+def _parse_logic(mode: str, filters: str) -> Callable[[Dict[str, Any]], bool]:
+    predicates = []
+    for term in _split_terms(filters):
+        if term.startswith(("and(", "or(")) and term.endswith(")"):
+            nested, inner = term.split("(", 1)
+            predicates.append(_parse_logic(nested, inner[:-1]))
+            continue
+        column, op, value = term.split(".", 2)
+        if value.startswith('"') and value.endswith('"'):
+            value = value[1:-1].replace('\\"', '"').replace("\\\\", "\\")
+        predicates.append(lambda row, column=column, compare=_OPERATORS[op], value=value: compare(row.get(column), value))
+    combine = all if mode == "and" else any
+    return lambda row: combine(predicate(row) for predicate in predicates)
+
+
+class StandInAPIError(Exception):
+    """Shaped like postgrest's APIError: the SQLSTATE or PGRST code is in .code."""
+
+    def __init__(self, message: str, code: str):
+        super().__init__(message)
+        self.message = message
+        self.code = code
+
+
+class StandInResponse:
+    def __init__(self, data: List[Dict[str, Any]], count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+class StandInQuery:
+    def __init__(self, client: "StandInClient", table: str):
+        self.client = client
+        self.table = table
+        self.operation = "select"
+        self.payload: Any = None
+        self.filters: List[Callable[[Dict[str, Any]], bool]] = []
+        self.ordering: List[tuple] = []
+        self.offset = 0
+        self.max_rows: Optional[int] = None
+        self.columns = "*"
+
+    # Operations
+    def select(self, columns: str = "*", count: Optional[str] = None) -> "StandInQuery":
+        self.operation = "select"
+        self.columns = columns
+        return self
+
+    def insert(self, rows: Any, **kwargs) -> "StandInQuery":
+        self.operation = "insert"
+        self.payload = rows
+        return self
+
+    def upsert(self,
+               rows: Any,
+               on_conflict: str = "id",
+               ignore_duplicates: bool = False,
+               count: Optional[str] = None,
+               **kwargs) -> "StandInQuery":
+        self.operation = "upsert"
+        self.payload = (rows, on_conflict, ignore_duplicates, count)
+        return self
+
+    def update(self, values: Dict[str, Any], **kwargs) -> "StandInQuery":
+        self.operation = "update"
+        self.payload = values
+        return self
+
+    def delete(self, **kwargs) -> "StandInQuery":
+        self.operation = "delete"
+        return self
+
+    # Filters
+    def _filter(self, predicate: Callable[[Dict[str, Any]], bool]) -> "StandInQuery":
+        self.filters.append(predicate)
+        return self
+
+    def eq(self, column: str, value: Any) -> "StandInQuery":
+        return self._filter(lambda row: row.get(column) == value)
+
+    def neq(self, column: str, value: Any) -> "StandInQuery":
+        return self._filter(lambda row: row.get(column) != value)
+
+    def gt(self, column: str, value: Any) -> "StandInQuery":
+        return self._filter(lambda row: row.get(column) is not None and row[column] > value)
+
+    def gte(self, column: str, value: Any) -> "StandInQuery":
+        return self._filter(lambda row: row.get(column) is not None and row[column] >= value)
+
+    def lt(self, column: str, value: Any) -> "StandInQuery":
+        return self._filter(lambda row: row.get(column) is not None and row[column] < value)
+
+    def lte(self, column: str, value: Any) -> "StandInQuery":
+        return self._filter(lambda row: row.get(column) is not None and row[column] <= value)
+
+    def in_(self, column: str, values: List[Any]) -> "StandInQuery":
+        allowed = set(values)
+        return self._filter(lambda row: row.get(column) in allowed)
+
+    def is_(self, column: str, value: Any) -> "StandInQuery":
+        expected = None if value in (None, "null") else value
+        return self._filter(lambda row: row.get(column) is expected)
+
+    def or_(self, filters: str) -> "StandInQuery":
+        """PostgREST or=(...) filter: comma-separated column.op.value terms and nested and(...)."""
+        return self._filter(_parse_logic("or", filters))
+
+    # Modifiers
+    def order(self, column: str, desc: bool = False) -> "StandInQuery":
+        self.ordering.append((column, desc))
+        return self
+
+    def range(self, start: int, end: int) -> "StandInQuery":
+        self.offset = start
+        self.max_rows = end - start + 1
+        return self
+
+    def limit(self, count: int) -> "StandInQuery":
+        self.max_rows = count
+        return self
+
+    def execute(self) -> StandInResponse:
+        self.client.record_call(self.payload, self.table)
+        with self.client.lock:
+            return getattr(self, "_execute_" + self.operation)(self.client.rows(self.table))
+
+    def _matches(self, row: Dict[str, Any]) -> bool:
+        return all(predicate(row) for predicate in self.filters)
+
+    def _project(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        if self.columns.strip() == "*":
+            return dict(row)
+        return {column.strip(): row.get(column.strip()) for column in self.columns.split(",")}
+
+    def _execute_select(self, rows: List[Dict[str, Any]]) -> StandInResponse:
+        matched = [row for row in rows if self._matches(row)]
+        for column, desc in reversed(self.ordering):
+            matched.sort(key=lambda row: (row.get(column) is None, row.get(column)), reverse=desc)
+        end = None if self.max_rows is None else self.offset + self.max_rows
+        return StandInResponse([self._project(row) for row in matched[self.offset:end]])
+
+    def _execute_insert(self, rows: List[Dict[str, Any]]) -> StandInResponse:
+        new_rows = self.payload if isinstance(self.payload, list) else [self.payload]
+        inserted = []
+        for new_row in new_rows:
+            row = copy.deepcopy(new_row)
+            row.setdefault("id", str(uuid.uuid4()))
+            rows.append(row)
+            inserted.append(dict(row))
+        return StandInResponse(inserted)
+
+    def _execute_upsert(self, rows: List[Dict[str, Any]]) -> StandInResponse:
+        new_rows, on_conflict, ignore_duplicates, count = self.payload
+        new_rows = new_rows if isinstance(new_rows, list) else [new_rows]
+        keys = [key.strip() for key in on_conflict.split(",")]
+        index = {tuple(row.get(key) for key in keys): row for row in rows}
+        written = []
+        for new_row in new_rows:
+            existing = index.get(tuple(new_row.get(key) for key in keys))
+            if existing is not None:
+                if ignore_duplicates:
+                    continue
+                existing.update(copy.deepcopy(new_row))
+                written.append(dict(existing))
+            else:
+                row = copy.deepcopy(new_row)
+                row.setdefault("id", str(uuid.uuid4()))
+                rows.append(row)
+                index[tuple(row.get(key) for key in keys)] = row
+                written.append(dict(row))
+        return StandInResponse(written, len(written) if count else None)
+
+    def _execute_update(self, rows: List[Dict[str, Any]]) -> StandInResponse:
+        updated = []
+        for row in rows:
+            if self._matches(row):
+                row.update(copy.deepcopy(self.payload))
+                updated.append(dict(row))
+        return StandInResponse(updated)
+
+    def _execute_delete(self, rows: List[Dict[str, Any]]) -> StandInResponse:
+        kept, deleted = [], []
+        for row in rows:
+            (deleted if self._matches(row) else kept).append(row)
+        rows[:] = kept
+        return StandInResponse(deleted)
+
+
+class StandInRpc:
+    def __init__(self, client: "StandInClient", fn: str, params: Dict[str, Any]):
+        self.client = client
+        self.fn = fn
+        self.params = params
+
+    def execute(self) -> StandInResponse:
+        self.client.record_call(self.params, self.fn)
+        with self.client.lock:
+            return StandInResponse(self.client.functions[self.fn](self.client, **self.params))
+
+
+class StandInClient:
+    """Drop-in for supabase.Client backed by in-memory tables."""
+
+    def __init__(self,
+                 latency: float = 0.0,
+                 jitter: float = 0.0,
+                 seed: int = 0,
+                 latencies: Optional[Dict[str, float]] = None):
+        self.latency = latency
+        self.jitter = jitter
+        # Per table/function base latency overrides
+        self.latencies = dict(latencies or {})
+        self._random = random.Random(seed)
+        self.tables: Dict[str, List[Dict[str, Any]]] = {}
+        self.functions: Dict[str, Callable[..., List[Dict[str, Any]]]] = {}
+        self.lock = threading.RLock()
+        self.calls = 0
+        self.bytes_sent = 0
+
+    def record_call(self, payload: Any, name: Optional[str] = None) -> None:
+        """Count the call and its JSON request body, then wait out the latency."""
+        size = len(json.dumps(payload, default=str)) if payload is not None else 0
+        with self.lock:
+            self.calls += 1
+            self.bytes_sent += size
+            delay = self.latencies.get(name, self.latency)
+            if self.jitter:
+                delay += self._random.expovariate(1.0 / self.jitter)
+        if delay:
+            time.sleep(delay)
+
+    def rows(self, table: str) -> List[Dict[str, Any]]:
+        return self.tables.setdefault(table, [])
+
+    def table(self, name: str) -> StandInQuery:
+        return StandInQuery(self, name)
+
+    def rpc(self, fn: str, params: Optional[Dict[str, Any]] = None) -> StandInRpc:
+        return StandInRpc(self, fn, params or {})
+
+    def register_function(self, name: str, func: Callable[..., List[Dict[str, Any]]]) -> None:
+        """Register a Python implementation of a database function for rpc()."""
+        self.functions[name] = func
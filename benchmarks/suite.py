@@ -0,0 +1,392 @@
+"""Benchmark suite for the database-bound hot paths, against the in-process stand-in.
+
+    python -m benchmarks.suite --latency 0.001 --jitter 0.0005 --output benchmarks/results/run.json
+    python -m benchmarks.suite --baseline benchmarks/results/run.json --fail-on-regression
+
+Each scenario seeds a fresh StandInClient with the same generated data
+(deterministic for a given --seed), then measures one operation of
+MemoryStore, DividendCalculator, ContextManager, Gatekeeper or the Vault
+API: latency percentiles, throughput and allocated KB per operation.
+Results are written as JSON and, with --baseline, compared with an earlier
+run; metrics worse by more than --threshold are reported as regressions.
+"""
+from typing import Any, AsyncIterator, Callable, Dict, List, Tuple
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+import argparse
+import asyncio
+import fnmatch
+import random
+import sys
+import uuid
+
+import httpx
+import numpy as np
+
+from api_layer.access_control.decision_cache import DecisionCache
+from api_layer.access_control.gatekeeper import Gatekeeper
+from benchmarks import harness
+from benchmarks.stand_in import StandInClient
+from echo.memory.memory_store import MemoryStore
+from echo.memory.vector_codec import decode_vector, encode_vector
+from grid.dividend_engine.calculator import DividendCalculator
+from mcp.agents.context_cache import ContextCache
+from mcp.agents.context_manager import ContextManager
+from vault.backend.data_access import DataAccess
+from vault.backend.response_cache import ResponseCache
+import vault.backend.main as vault_api
+
+USERS = 20
+DIMENSION = 1536
+DATA_TYPES = ("spotify", "gmail", "location", "health")
+NOW = datetime(2026, 10, 18, 12, 0, 0)
+
+Scenario = Callable[[StandInClient, "Dataset"], AsyncIterator[harness.Operation]]
+SCENARIOS: Dict[str, Tuple[Scenario, int]] = {}
+
+
+def scenario(name: str, concurrency: Tuple[int, ...] = (1,)) -> Callable[[Scenario], Scenario]:
+    """Register an async generator that sets up a scenario and yields its op(i).
+
+    Each extra concurrency level registers a variant named "<name>[cN]".
+    """
+    def register(func: Scenario) -> Scenario:
+        for level in concurrency:
+            SCENARIOS[name if level == 1 else f"{name}[c{level}]"] = (asynccontextmanager(func), level)
+        return func
+    return register
+
+
+def user(i: int) -> str:
+    return f"user-{i % USERS}"
+
+
+def stamp(rng: random.Random, days: int = 30) -> str:
+    return (NOW - timedelta(seconds=rng.randrange(days * 86400))).isoformat()
+
+
+class Dataset:
+    """Rows for every table the scenarios read, generated from the seed."""
+
+    def __init__(self, rows: int, seed: int):
+        rng = random.Random(seed)
+        vectors = np.random.default_rng(seed).standard_normal((rows, DIMENSION), dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        self.query_vectors = vectors[:16]
+        self.tables: Dict[str, List[Dict[str, Any]]] = {
+            "echo_memories": [],
+            "payouts": [],
+            "contexts": [],
+            "permissions": [],
+            "consents": [],
+            "vault_entries": [],
+            "schema_registry": [{
+                "type": "health",
+                "version": 1,
+                "fields": [{"name": "heart_rate", "type": "number", "required": True},
+                           {"name": "steps", "type": "integer"}, {"name": "note", "type": "string"}]
+            }]
+        }
+        for i in range(rows):
+            created = stamp(rng)
+            self.tables["echo_memories"].append({
+                "id": str(uuid.UUID(int=rng.getrandbits(128))), "user_id": user(i),
+                "content": {"text": f"memory {i}", "tags": ["bench"]}, "embedding": encode_vector(vectors[i]),
+                "metadata": {}, "created_at": created, "updated_at": created
+            })
+            self.tables["payouts"].append({
+                "id": str(uuid.UUID(int=rng.getrandbits(128))), "user_id": user(i),
+                "amount": round(rng.uniform(1, 50), 2), "status": "completed", "created_at": created
+            })
+            self.tables["contexts"].append({
+                "id": str(uuid.UUID(int=rng.getrandbits(128))), "user_id": user(i), "context_type": "conversation",
+                "data": {"turns": i % 50, "topic": f"topic {i}"}, "metadata": {},
+                "created_at": created, "updated_at": stamp(rng, days=2)
+            })
+            self.tables["vault_entries"].append({
+                "id": str(uuid.UUID(int=rng.getrandbits(128))), "user_id": user(i), "data_type": "health",
+                "content": {"heart_rate": 60 + i % 40, "steps": rng.randrange(12000), "note": "resting"},
+                "metadata": {"source": "bench"}, "created_at": created, "updated_at": created
+            })
+        for i in range(USERS * 10):
+            self.tables["permissions"].append({
+                "id": str(uuid.UUID(int=rng.getrandbits(128))), "user_id": user(i),
+                "resource": f"resource-{i // USERS}", "action": "read"
+            })
+            self.tables["consents"].append({
+                "id": str(uuid.UUID(int=rng.getrandbits(128))), "user_id": user(i),
+                "data_type": DATA_TYPES[i // USERS % len(DATA_TYPES)], "purpose": f"purpose-{i // USERS}",
+                "expires_at": (NOW + timedelta(days=3650)).isoformat()
+            })
+
+    def load(self, client: StandInClient) -> None:
+        for table, rows in self.tables.items():
+            client.rows(table).extend(dict(row) for row in rows)
+
+    def ids(self, table: str) -> List[str]:
+        return [row["id"] for row in self.tables[table]]
+
+
+def match_memories(client: StandInClient, query_embedding: str, match_threshold: float,
+                   match_count: int, p_user_id: str) -> List[Dict[str, Any]]:
+    rows = [row for row in client.rows("echo_memories") if row["user_id"] == p_user_id and row["embedding"]]
+    if not rows:
+        return []
+    scores = np.stack([decode_vector(row["embedding"]) for row in rows]) @ decode_vector(query_embedding)
+    best = [i for i in np.argsort(-scores)[:match_count] if scores[i] >= match_threshold]
+    return [{"id": rows[i]["id"], "content": rows[i]["content"], "similarity": float(scores[i])} for i in best]
+
+
+# Echo memory store
+
+@scenario("memory.store_memory")
+async def store_memory(client, data):
+    store = MemoryStore(DataAccess(client=client), use_index=False)
+    yield lambda i: store.store_memory(user(i), {"text": f"new memory {i}"}, data.query_vectors[i % 16])
+
+
+@scenario("memory.retrieve_memory", concurrency=(1, 32))
+async def retrieve_memory(client, data):
+    store = MemoryStore(DataAccess(client=client), use_index=False)
+    ids = data.ids("echo_memories")
+    yield lambda i: store.retrieve_memory(ids[i % len(ids)])
+
+
+@scenario("memory.list_memories")
+async def list_memories(client, data):
+    store = MemoryStore(DataAccess(client=client), use_index=False)
+    yield lambda i: store.list_memories(user(i), limit=20)
+
+
+@scenario("memory.search_memories")
+async def search_memories(client, data):
+    client.register_function("match_memories", match_memories)
+    store = MemoryStore(DataAccess(client=client), use_index=False)
+    yield lambda i: store.search_memories(user(i), data.query_vectors[i % 16], limit=10, match_threshold=0.0)
+
+
+# Grid dividends
+
+@scenario("dividends.calculate_dividend")
+async def calculate_dividend(client, data):
+    calculator = DividendCalculator(DataAccess(client=client))
+    yield lambda i: calculator.calculate_dividend(user(i), DATA_TYPES[i % len(DATA_TYPES)], 10 + i % 90, 0.9)
+
+
+@scenario("dividends.get_payout_history")
+async def get_payout_history(client, data):
+    calculator = DividendCalculator(DataAccess(client=client))
+    yield lambda i: calculator.get_payout_history(user(i), limit=20)
+
+
+# MCP contexts (hot-context cache off unless the name says otherwise)
+
+@scenario("contexts.create_context")
+async def create_context(client, data):
+    db = DataAccess(client=client)
+    manager = ContextManager(db, cache=ContextCache(db, max_users=0))
+    yield lambda i: manager.create_context(user(i), "conversation", {"turns": 0, "topic": f"new {i}"})
+
+
+@scenario("contexts.get_context")
+async def get_context(client, data):
+    db = DataAccess(client=client)
+    manager = ContextManager(db, cache=ContextCache(db, max_users=0))
+    ids = data.ids("contexts")
+    yield lambda i: manager.get_context(ids[i % len(ids)])
+
+
+@scenario("contexts.update_context")
+async def update_context(client, data):
+    db = DataAccess(client=client)
+    manager = ContextManager(db, cache=ContextCache(db, max_users=0))
+    ids = data.ids("contexts")
+    yield lambda i: manager.update_context(ids[i % len(ids)], data={"turns": i})
+
+
+@scenario("contexts.get_active_contexts")
+async def get_active_contexts(client, data):
+    db = DataAccess(client=client)
+    manager = ContextManager(db, cache=ContextCache(db, max_users=0))
+    yield lambda i: manager.get_active_contexts(user(i), current_time=NOW)
+
+
+@scenario("contexts.get_active_contexts_cached")
+async def get_active_contexts_cached(client, data):
+    db = DataAccess(client=client)
+    manager = ContextManager(db, cache=ContextCache(db, max_users=USERS, write_behind_seconds=0))
+    try:
+        yield lambda i: manager.get_active_contexts(user(i))
+    finally:
+        await manager.close()
+
+
+# Gatekeeper
+
+@scenario("gatekeeper.check_permission", concurrency=(1, 32))
+async def check_permission(client, data):
+    gatekeeper = Gatekeeper(DataAccess(client=client))
+    gatekeeper.decision_cache = DecisionCache(max_size=0)
+    try:
+        yield lambda i: gatekeeper.check_permission(user(i), f"resource-{i % 10}", "read")
+    finally:
+        await gatekeeper.shutdown()
+
+
+@scenario("gatekeeper.check_permission_cached")
+async def check_permission_cached(client, data):
+    gatekeeper = Gatekeeper(DataAccess(client=client))
+    try:
+        yield lambda i: gatekeeper.check_permission(user(i), f"resource-{i % 10}", "read")
+    finally:
+        await gatekeeper.shutdown()
+
+
+@scenario("gatekeeper.check_consent")
+async def check_consent(client, data):
+    gatekeeper = Gatekeeper(DataAccess(client=client))
+    gatekeeper.decision_cache = DecisionCache(max_size=0)
+    try:
+        yield lambda i: gatekeeper.check_consent(user(i), DATA_TYPES[i // USERS % len(DATA_TYPES)],
+                                                 f"purpose-{i // USERS % 10}")
+    finally:
+        await gatekeeper.shutdown()
+
+
+@scenario("gatekeeper.track_usage")
+async def track_usage(client, data):
+    gatekeeper = Gatekeeper(DataAccess(client=client))
+    try:
+        yield lambda i: gatekeeper.track_usage(user(i), f"resource-{i % 10}", "read", {"bytes": i})
+    finally:
+        await gatekeeper.shutdown()
+
+
+# Vault API, in-process over the ASGI transport
+
+@asynccontextmanager
+async def vault(client: StandInClient, cache: ResponseCache) -> AsyncIterator[httpx.AsyncClient]:
+    vault_api.db = DataAccess(client=client)
+    vault_api.schema_cache.db = vault_api.entry_loader.db = vault_api.db
+    vault_api.schema_cache.invalidate("health")
+    vault_api.response_cache = cache
+    transport = httpx.ASGITransport(app=vault_api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://vault") as http:
+        yield http
+
+
+async def expect(response: Any, *statuses: int) -> None:
+    response = await response
+    if response.status_code not in statuses:
+        raise RuntimeError(f"{response.request.method} {response.request.url}: "
+                           f"{response.status_code} {response.text[:200]}")
+
+
+@scenario("vault.create_entry")
+async def vault_create_entry(client, data):
+    async with vault(client, ResponseCache()) as http:
+        def op(i):
+            entry = dict(data.tables["vault_entries"][i % len(data.tables["vault_entries"])],
+                         id=str(uuid.uuid4()), created_at=NOW.isoformat(), updated_at=NOW.isoformat())
+            return expect(http.post("/vault/entries", json=entry), 200)
+        yield op
+
+
+@scenario("vault.get_entry")
+async def vault_get_entry(client, data):
+    ids = data.ids("vault_entries")
+    async with vault(client, ResponseCache(max_bytes=0)) as http:
+        yield lambda i: expect(http.get(f"/vault/entries/{ids[i % len(ids)]}"), 200)
+
+
+@scenario("vault.list_entries")
+async def vault_list_entries(client, data):
+    async with vault(client, ResponseCache(max_bytes=0)) as http:
+        yield lambda i: expect(http.get(f"/vault/entries?user_id={user(i)}&limit=50"), 200)
+
+
+@scenario("vault.list_entries_cached")
+async def vault_list_entries_cached(client, data):
+    async with vault(client, ResponseCache()) as http:
+        yield lambda i: expect(http.get(f"/vault/entries?user_id={user(i)}&limit=50"), 200)
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    data = Dataset(args.rows, args.seed)
+    results = {}
+    for name, (setup, concurrency) in SCENARIOS.items():
+        if args.filter and not any(fnmatch.fnmatch(name, pattern) for pattern in args.filter):
+            continue
+        client = StandInClient(args.latency, args.jitter, args.seed, args.table_latency)
+        data.load(client)
+        async with setup(client, data) as op:
+            results[name] = await harness.measure(op, args.iterations, args.warmup,
+                                                  args.concurrency or concurrency, args.alloc_samples)
+        results[name]["store_calls"] = client.calls
+        print(f"  {name}: {results[name]['p50_ms']:.3f} ms p50", file=sys.stderr)
+    return results
+
+
+def table_latency(value: str) -> Tuple[str, float]:
+    name, _, seconds = value.partition("=")
+    try:
+        return name, float(seconds)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected NAME=SECONDS, got {value!r}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.001, help="base store round trip, seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="mean of the exponential jitter added, seconds")
+    parser.add_argument("--table-latency", type=table_latency, action="append", default=[],
+                        metavar="NAME=SECONDS", help="base latency for one table or function")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rows", type=int, default=1000, help="rows per seeded table")
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--alloc-samples", type=int, default=30)
+    parser.add_argument("--concurrency", type=int, default=0, help="override every scenario's concurrency")
+    parser.add_argument("--filter", action="append", default=[], metavar="GLOB", help="e.g. 'vault.*'")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", help="results JSON of an earlier run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.1, help="regression threshold, fraction")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--list", action="store_true", help="list scenarios and exit")
+    args = parser.parse_args()
+    args.table_latency = dict(args.table_latency)
+
+    if args.list:
+        print("\n".join(SCENARIOS))
+        return
+
+    settings = {key: value for key, value in vars(args).items()
+                if key not in ("output", "baseline", "fail_on_regression", "list")}
+    results = asyncio.run(run(args))
+    baseline = None
+    if args.baseline:
+        previous = harness.read_results(args.baseline)
+        baseline = previous["results"]
+        changed = sorted(key for key in ("latency", "jitter", "table_latency", "seed", "rows")
+                         if previous["meta"]["settings"].get(key) != settings[key])
+        if changed:
+            print(f"note: baseline ran with different {', '.join(changed)}")
+    print(harness.format_table(results, baseline))
+
+    if args.output:
+        harness.write_results(args.output, harness.environment(settings), results)
+        print(f"results written to {args.output}")
+
+    if baseline is not None:
+        regressions = harness.compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression['benchmark']} {regression['metric']}: "
+                  f"{regression['baseline']:.4g} -> {regression['current']:.4g} ({regression['change']:+.1%})")
+        if not regressions:
+            print(f"no regressions beyond {args.threshold:.0%}")
+        if regressions and args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,62 +1,149 @@
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Union
+import asyncio
 import json
+import uuid
 from datetime import datetime, timedelta
 import numpy as np
-from supabase import create_client, Client
 import os
 from dotenv import load_dotenv
+from vault.backend.coalesce import RowLoader
+from vault.backend.data_access import DataAccess, get_data_access, keyset_page
+from echo.memory.vector_index import MemoryIndex, rerank
+from echo.memory.vector_codec import encode_vector, encode_vectors
 
 load_dotenv()
 
 class MemoryStore:
     """Persistent memory store for Echo."""
     
-    def __init__(self):
-        self.supabase: Client = create_client(
-            os.getenv("SUPABASE_URL"),
-            os.getenv("SUPABASE_KEY")
-        )
+    def __init__(self,
+                 data_access: Optional[DataAccess] = None,
+                 use_index: Optional[bool] = None,
+                 index_precision: Optional[str] = None,
+                 rerank_factor: Optional[int] = None,
+                 index_ttl: Optional[float] = None):
+        self.db = (data_access or get_data_access()).for_module(__name__)
         self.vector_dimension = 1536  # OpenAI embedding dimension
+        
+        # Optional in-process ANN index; users are loaded into it on first search.
+        # Writes made through this store update it at once; writes from other
+        # processes or straight to echo_memories appear when a user's snapshot,
+        # older than index_ttl seconds (ECHO_MEMORY_INDEX_TTL), is reloaded
+        if use_index is None:
+            use_index = os.getenv("ECHO_MEMORY_INDEX", "0") == "1"
+        self.index: Optional[MemoryIndex] = MemoryIndex(
+            self.vector_dimension,
+            precision=index_precision or os.getenv("ECHO_MEMORY_INDEX_PRECISION", "float32")
+        ) if use_index else None
+        self.index_ttl = index_ttl if index_ttl is not None \
+            else float(os.getenv("ECHO_MEMORY_INDEX_TTL", "300"))
+        self._warming: Dict[str, asyncio.Task] = {}
+        
+        # With compact (float16/int8) vectors, re-score the top limit * rerank_factor
+        # candidates against the full-precision embeddings from the store
+        self.rerank_factor = rerank_factor if rerank_factor is not None \
+            else int(os.getenv("ECHO_MEMORY_RERANK", "0"))
+        self.rerank_margin = 0.02
+        
+        # Concurrent retrieve_memory calls share queries (DATA_ACCESS_COALESCE)
+        self.loader = RowLoader(self.db, "echo_memories")
     
     async def store_memory(self, 
                           user_id: str,
                           content: Dict[str, Any],
-                          embedding: Optional[List[float]] = None,
+                          embedding: Optional[Union[List[float], np.ndarray]] = None,
                           metadata: Optional[Dict[str, Any]] = None) -> str:
         """Store a new memory with optional embedding."""
         memory = {
             "user_id": user_id,
             "content": content,
-            "embedding": embedding,
+            "embedding": encode_vector(embedding) if embedding is not None else None,
             "metadata": metadata or {},
             "created_at": datetime.utcnow().isoformat(),
             "updated_at": datetime.utcnow().isoformat()
         }
         
-        result = self.supabase.table("echo_memories").insert(memory).execute()
+        result = await self.db.table("echo_memories").insert(memory).execute()
+        if self.index is not None:
+            self.index.upsert(result.data[0])
         return result.data[0]["id"]
     
+    async def store_memories(self,
+                           user_id: str,
+                           contents: List[Dict[str, Any]],
+                           embeddings: Optional[np.ndarray] = None,
+                           metadata: Optional[List[Dict[str, Any]]] = None,
+                           chunk_size: int = 500) -> List[str]:
+        """Store a batch of memories with an optional (n, 1536) embedding array."""
+        if embeddings is not None:
+            embeddings = np.asarray(embeddings, dtype=np.float32)
+            if embeddings.shape != (len(contents), self.vector_dimension):
+                raise ValueError(
+                    f"Expected embeddings of shape ({len(contents)}, {self.vector_dimension}), "
+                    f"got {embeddings.shape}"
+                )
+        
+        ids: List[str] = []
+        for start in range(0, len(contents), chunk_size):
+            end = min(start + chunk_size, len(contents))
+            now = datetime.utcnow().isoformat()
+            vectors = encode_vectors(embeddings[start:end]) if embeddings is not None else [None] * (end - start)
+            
+            # Ids are assigned here so the insert does not echo the embeddings back
+            memories = [
+                {
+                    "id": str(uuid.uuid4()),
+                    "user_id": user_id,
+                    "content": contents[i],
+                    "embedding": vectors[i - start],
+                    "metadata": (metadata[i] if metadata else None) or {},
+                    "created_at": now,
+                    "updated_at": now
+                }
+                for i in range(start, end)
+            ]
+            await self.db.table("echo_memories").insert(memories, returning="minimal").execute()
+            
+            if self.index is not None:
+                for memory in memories:
+                    self.index.upsert(memory)
+            ids.extend(memory["id"] for memory in memories)
+        
+        return ids
+    
     async def retrieve_memory(self, memory_id: str) -> Dict[str, Any]:
         """Retrieve a specific memory by ID."""
-        result = self.supabase.table("echo_memories").select("*").eq("id", memory_id).execute()
-        if not result.data:
+        memory = await self.loader.get(memory_id)
+        if memory is None:
             raise ValueError(f"Memory {memory_id} not found")
-        return result.data[0]
+        return memory
     
     async def search_memories(self,
                             user_id: str,
-                            query_embedding: List[float],
-                            limit: int = 10) -> List[Dict[str, Any]]:
+                            query_embedding: Union[List[float], np.ndarray],
+                            limit: int = 10,
+                            match_threshold: float = 0.7) -> List[Dict[str, Any]]:
         """Search memories using vector similarity."""
+        if self.index is not None:
+            if self.index.is_warm(user_id):
+                # A stale snapshot keeps serving while its replacement loads
+                if self.index.age(user_id) >= self.index_ttl:
+                    self._schedule_warm(user_id)
+                if self.rerank_factor > 0:
+                    return await self._search_reranked(user_id, query_embedding, match_threshold, limit)
+                return self.index.search(user_id, query_embedding, match_threshold, limit)
+            # Cold start: answer from the RPC while the index loads in the background
+            self._schedule_warm(user_id)
+        
         # Convert query embedding to PostgreSQL vector format
-        query_vector = f"[{','.join(map(str, query_embedding))}]"
+        query_vector = encode_vector(query_embedding)
         
         # Perform vector similarity search
-        result = self.supabase.rpc(
+        result = await self.db.rpc(
             "match_memories",
             {
                 "query_embedding": query_vector,
-                "match_threshold": 0.7,
+                "match_threshold": match_threshold,
                 "match_count": limit,
                 "p_user_id": user_id
             }
@@ -64,10 +151,33 @@ class MemoryStore:
         
         return result.data
     
+    async def _search_reranked(self,
+                               user_id: str,
+                               query_embedding: Union[List[float], np.ndarray],
+                               match_threshold: float,
+                               limit: int) -> List[Dict[str, Any]]:
+        # The margin keeps candidates that quantization error pushed below the threshold
+        candidates = self.index.search(
+            user_id,
+            query_embedding,
+            match_threshold - self.rerank_margin,
+            limit * self.rerank_factor
+        )
+        if not candidates:
+            return []
+        
+        result = await self.db.table("echo_memories")\
+            .select("id, embedding")\
+            .in_("id", [candidate["id"] for candidate in candidates])\
+            .execute()
+        
+        full_vectors = {row["id"]: row["embedding"] for row in result.data}
+        return rerank(candidates, full_vectors, query_embedding, match_threshold, limit)
+    
     async def update_memory(self,
                           memory_id: str,
                           content: Optional[Dict[str, Any]] = None,
-                          embedding: Optional[List[float]] = None,
+                          embedding: Optional[Union[List[float], np.ndarray]] = None,
                           metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Update an existing memory."""
         updates = {
@@ -77,30 +187,47 @@ class MemoryStore:
         if content is not None:
             updates["content"] = content
         if embedding is not None:
-            updates["embedding"] = embedding
+            updates["embedding"] = encode_vector(embedding)
         if metadata is not None:
             updates["metadata"] = metadata
         
-        result = self.supabase.table("echo_memories").update(updates).eq("id", memory_id).execute()
+        result = await self.db.table("echo_memories").update(updates).eq("id", memory_id).execute()
+        self.loader.forget(memory_id)
+        if self.index is not None:
+            self.index.upsert(result.data[0])
         return result.data[0]
     
     async def delete_memory(self, memory_id: str) -> bool:
         """Delete a memory."""
-        result = self.supabase.table("echo_memories").delete().eq("id", memory_id).execute()
+        result = await self.db.table("echo_memories").delete().eq("id", memory_id).execute()
+        self.loader.forget(memory_id)
+        if self.index is not None:
+            for row in result.data:
+                self.index.remove(row)
         return len(result.data) > 0
     
     async def list_memories(self,
                           user_id: str,
                           limit: int = 100,
-                          offset: int = 0) -> List[Dict[str, Any]]:
-        """List memories for a user with pagination."""
-        result = self.supabase.table("echo_memories")\
+                          offset: int = 0,
+                          cursor: Optional[str] = None) -> List[Dict[str, Any]]:
+        """List memories for a user with pagination, newest first.
+        
+        Pass next_cursor(page, limit) as cursor to continue after a page;
+        offset is ignored when a cursor is given.
+        """
+        query = self.db.table("echo_memories")\
             .select("*")\
-            .eq("user_id", user_id)\
-            .order("created_at", desc=True)\
-            .range(offset, offset + limit - 1)\
-            .execute()
+            .eq("user_id", user_id)
         
+        if cursor:
+            query = keyset_page(query, limit, cursor)
+        else:
+            query = query.order("created_at", desc=True)\
+                .order("id", desc=True)\
+                .range(offset, offset + limit - 1)
+        
+        result = await query.execute()
         return result.data
     
     async def prune_memories(self,
@@ -109,10 +236,54 @@ class MemoryStore:
         """Prune old memories."""
         cutoff_date = (datetime.utcnow() - timedelta(days=max_age_days)).isoformat()
         
-        result = self.supabase.table("echo_memories")\
+        result = await self.db.table("echo_memories")\
             .delete()\
             .eq("user_id", user_id)\
             .lt("created_at", cutoff_date)\
             .execute()
         
-        return len(result.data) 
\ No newline at end of file
+        for row in result.data:
+            self.loader.forget(row["id"])
+        if self.index is not None:
+            for row in result.data:
+                self.index.remove(row)
+        return len(result.data)
+    
+    async def warm_index(self, user_id: str, page_size: int = 1000) -> None:
+        """Load (or reload) all of a user's memories into the in-process index."""
+        if self.index is None:
+            return
+        
+        self.index.begin_load(user_id)
+        rows: List[Dict[str, Any]] = []
+        try:
+            # Keyset pagination on id so concurrent deletes cannot shift pages
+            last_id = None
+            while True:
+                query = self.db.table("echo_memories")\
+                    .select("id, user_id, content, metadata, embedding")\
+                    .eq("user_id", user_id)
+                if last_id is not None:
+                    query = query.gt("id", last_id)
+                result = await query.order("id").limit(page_size).execute()
+                rows.extend(result.data)
+                if len(result.data) < page_size:
+                    break
+                last_id = result.data[-1]["id"]
+        except Exception:
+            self.index.abort_load(user_id)
+            raise
+        self.index.finish_load(user_id, rows)
+    
+    def _schedule_warm(self, user_id: str) -> None:
+        if self.index.is_loading(user_id) or user_id in self._warming:
+            return
+        task = asyncio.get_running_loop().create_task(self.warm_index(user_id))
+        self._warming[user_id] = task
+        task.add_done_callback(lambda done: self._warm_done(user_id, done))
+    
+    def _warm_done(self, user_id: str, task: asyncio.Task) -> None:
+        self._warming.pop(user_id, None)
+        # A failed warm-up leaves the user cold; the next search retries it
+        if not task.cancelled():
+            task.exception() 
\ No newline at end of file
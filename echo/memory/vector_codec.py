@@ -0,0 +1,28 @@
+from typing import Any, Dict, List
+import numpy as np
+
+_formats: Dict[int, str] = {}
+
+def _format(dimension: int) -> str:
+    # One %-format per dimension: formatting happens in C, and %.9g round-trips float32
+    fmt = _formats.get(dimension)
+    if fmt is None:
+        fmt = _formats[dimension] = "[" + ",".join(["%.9g"] * dimension) + "]"
+    return fmt
+
+def encode_vector(vector: Any) -> str:
+    """Encode one embedding (list or NumPy array) as pgvector text."""
+    vector = np.asarray(vector, dtype=np.float32).ravel()
+    return _format(len(vector)) % tuple(vector.tolist())
+
+def encode_vectors(vectors: Any) -> List[str]:
+    """Encode an (n, dimension) array of embeddings as pgvector text."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    fmt = _format(vectors.shape[1])
+    return [fmt % tuple(row) for row in vectors.tolist()]
+
+def decode_vector(value: Any) -> np.ndarray:
+    """Convert a stored embedding (pgvector text or a sequence) to float32."""
+    if isinstance(value, str):
+        return np.fromstring(value.strip("[]"), sep=",", dtype=np.float32)
+    return np.asarray(value, dtype=np.float32)
@@ -0,0 +1,339 @@
+from typing import Dict, Any, List, Optional, Sequence
+import time
+import numpy as np
+from echo.memory.vector_codec import decode_vector
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+PRECISIONS = {"float32": np.float32, "float16": np.float16, "int8": np.int8}
+
+class VectorIndex:
+    """Cosine-similarity index over one user's memories.
+
+    Small indexes are searched exactly. Once an index grows past
+    exact_threshold vectors it is partitioned with spherical k-means (IVF)
+    and only the n_probe closest partitions are scanned per query.
+
+    Vectors are stored contiguously as float32, float16, or int8 with one
+    float32 scale per vector (precision="int8").
+    """
+
+    def __init__(self,
+                 dimension: int,
+                 exact_threshold: int = 20000,
+                 n_probe: int = 8,
+                 precision: str = "float32"):
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision {precision!r}, expected one of {sorted(PRECISIONS)}")
+        self.dimension = dimension
+        self.exact_threshold = exact_threshold
+        self.n_probe = n_probe
+        self.precision = precision
+        self._vectors = np.empty((0, dimension), dtype=PRECISIONS[precision])
+        self._scales = np.empty(0, dtype=np.float32)
+        self._size = 0
+        self._ids: List[str] = []
+        self._rows: List[Dict[str, Any]] = []
+        self._positions: Dict[str, int] = {}
+        self._centroids: Optional[np.ndarray] = None
+        self._assignments = np.empty(0, dtype=np.int32)
+        self._trained_size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, memory_id: str) -> bool:
+        return memory_id in self._positions
+
+    def memory_bytes(self) -> int:
+        """Bytes held by the vector storage (excluding row payloads)."""
+        per_vector = self._vectors.itemsize * self.dimension
+        if self.precision == "int8":
+            per_vector += self._scales.itemsize
+        return self._size * per_vector
+
+    def add(self, memory_id: str, vector: Any, row: Dict[str, Any]) -> None:
+        """Add or replace a single vector."""
+        self.add_many([memory_id], np.asarray([decode_vector(vector)]), [row])
+
+    def add_many(self,
+                 memory_ids: Sequence[str],
+                 vectors: np.ndarray,
+                 rows: Sequence[Dict[str, Any]]) -> None:
+        """Add or replace a batch of vectors given as an (n, dimension) array."""
+        for memory_id in memory_ids:
+            if memory_id in self._positions:
+                self.remove(memory_id)
+
+        vectors = _normalize(np.asarray(vectors, dtype=np.float32).reshape(-1, self.dimension))
+        count = len(vectors)
+        self._reserve(self._size + count)
+        start, end = self._size, self._size + count
+        self._store(start, end, vectors)
+        for offset, (memory_id, row) in enumerate(zip(memory_ids, rows)):
+            self._positions[memory_id] = start + offset
+            self._ids.append(memory_id)
+            self._rows.append(row)
+        self._size = end
+
+        if self._centroids is not None:
+            self._assignments[start:end] = self._assign(vectors)
+        if self._size >= self.exact_threshold and self._size >= 2 * self._trained_size:
+            self._train()
+
+    def remove(self, memory_id: str) -> bool:
+        """Remove a vector; the last vector is moved into its slot."""
+        position = self._positions.pop(memory_id, None)
+        if position is None:
+            return False
+
+        last = self._size - 1
+        if position != last:
+            moved_id = self._ids[last]
+            self._vectors[position] = self._vectors[last]
+            self._scales[position] = self._scales[last]
+            self._assignments[position] = self._assignments[last]
+            self._ids[position] = moved_id
+            self._rows[position] = self._rows[last]
+            self._positions[moved_id] = position
+        self._ids.pop()
+        self._rows.pop()
+        self._size = last
+        return True
+
+    def search(self, query: Any, match_threshold: float, limit: int) -> List[Dict[str, Any]]:
+        """Return up to limit rows with similarity > match_threshold, best first."""
+        if self._size == 0 or limit <= 0:
+            return []
+        query = _normalize(decode_vector(query))
+
+        if self._centroids is None:
+            candidates = None
+            similarities = self._similarities(slice(0, self._size), query)
+        else:
+            probes = np.argsort(self._centroids @ query)[-self.n_probe:]
+            probe_mask = np.zeros(len(self._centroids), dtype=bool)
+            probe_mask[probes] = True
+            candidates = np.flatnonzero(probe_mask[self._assignments[:self._size]])
+            similarities = self._similarities(candidates, query)
+
+        matches = np.flatnonzero(similarities > match_threshold)
+        if len(matches) > limit:
+            matches = matches[np.argpartition(similarities[matches], -limit)[-limit:]]
+        matches = matches[np.argsort(similarities[matches])[::-1]]
+
+        results = []
+        for match in matches:
+            position = match if candidates is None else candidates[match]
+            results.append({**self._rows[position], "similarity": float(similarities[match])})
+        return results
+
+    def _store(self, start: int, end: int, vectors: np.ndarray) -> None:
+        if self.precision == "int8":
+            scales = np.abs(vectors).max(axis=1) / 127
+            scales[scales == 0] = 1.0
+            self._vectors[start:end] = np.rint(vectors / scales[:, None])
+            self._scales[start:end] = scales
+        else:
+            self._vectors[start:end] = vectors
+
+    def _decode(self, positions: np.ndarray) -> np.ndarray:
+        vectors = self._vectors[positions].astype(np.float32, copy=False)
+        if self.precision == "int8":
+            vectors *= self._scales[positions][:, None]
+        return vectors
+
+    def _similarities(self, positions: Any, query: np.ndarray, chunk_size: int = 4096) -> np.ndarray:
+        """Dot products for a slice or index array of stored vectors."""
+        if self.precision == "float32":
+            return self._vectors[positions] @ query
+        # Compact storage is widened to float32 one cache-sized chunk at a time
+        if isinstance(positions, slice):
+            count = positions.stop - positions.start
+            chunks = (slice(positions.start + start, positions.start + min(start + chunk_size, count))
+                      for start in range(0, count, chunk_size))
+        else:
+            count = len(positions)
+            chunks = (positions[start:start + chunk_size] for start in range(0, count, chunk_size))
+        similarities = np.empty(count, dtype=np.float32)
+        buffer = np.empty((chunk_size, self.dimension), dtype=np.float32)
+        offset = 0
+        for chunk in chunks:
+            block = self._vectors[chunk]
+            widened = buffer[:len(block)]
+            widened[...] = block
+            similarities[offset:offset + len(block)] = widened @ query
+            offset += len(block)
+        if self.precision == "int8":
+            similarities *= self._scales[positions]
+        return similarities
+
+    def _reserve(self, capacity: int) -> None:
+        if capacity <= len(self._vectors):
+            return
+        capacity = max(capacity, 2 * len(self._vectors), 1024)
+        vectors = np.empty((capacity, self.dimension), dtype=self._vectors.dtype)
+        vectors[:self._size] = self._vectors[:self._size]
+        scales = np.ones(capacity, dtype=np.float32)
+        scales[:self._size] = self._scales[:self._size]
+        assignments = np.zeros(capacity, dtype=np.int32)
+        assignments[:self._size] = self._assignments[:self._size]
+        self._vectors, self._scales, self._assignments = vectors, scales, assignments
+
+    def _assign(self, vectors: np.ndarray, chunk_size: int = 16384) -> np.ndarray:
+        assignments = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), chunk_size):
+            chunk = vectors[start:start + chunk_size]
+            assignments[start:start + chunk_size] = np.argmax(chunk @ self._centroids.T, axis=1)
+        return assignments
+
+    def _train(self, iterations: int = 10, seed: int = 0) -> None:
+        """Fit sqrt(n) partitions with spherical k-means on a sample."""
+        n_lists = max(1, int(np.sqrt(self._size)))
+        rng = np.random.default_rng(seed)
+        sample_size = min(self._size, n_lists * 32)
+        sample = self._decode(np.sort(rng.choice(self._size, sample_size, replace=False)))
+
+        centroids = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            order = np.argsort(labels, kind="stable")
+            counts = np.bincount(labels, minlength=n_lists)
+            filled = counts > 0
+            starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[filled]
+            sums = centroids.copy()
+            sums[filled] = np.add.reduceat(sample[order], starts, axis=0)
+            centroids = _normalize(sums)
+
+        self._centroids = centroids
+        for start in range(0, self._size, 16384):
+            positions = np.arange(start, min(start + 16384, self._size))
+            self._assignments[positions] = self._assign(self._decode(positions))
+        self._trained_size = self._size
+
+def rerank(candidates: List[Dict[str, Any]],
+           full_vectors: Dict[str, Any],
+           query: Any,
+           match_threshold: float,
+           limit: int) -> List[Dict[str, Any]]:
+    """Re-score candidates against full-precision vectors keyed by id."""
+    query = _normalize(decode_vector(query))
+    rescored = []
+    for candidate in candidates:
+        vector = full_vectors.get(candidate["id"])
+        if vector is None:
+            continue
+        similarity = float(_normalize(decode_vector(vector)) @ query)
+        if similarity > match_threshold:
+            rescored.append({**candidate, "similarity": similarity})
+    rescored.sort(key=lambda row: row["similarity"], reverse=True)
+    return rescored[:limit]
+
+class MemoryIndex:
+    """Per-user VectorIndexes kept in step with the echo_memories table.
+
+    A user's index is only searched once it has been fully loaded ("warm").
+    Writes that arrive while a user is loading are buffered and replayed on
+    top of the loaded snapshot; when a warm user is reloaded they are also
+    applied to the index still being searched. age() tells how long ago a
+    user's snapshot was read, so callers can reload stale users.
+    """
+
+    def __init__(self,
+                 dimension: int,
+                 exact_threshold: int = 20000,
+                 n_probe: int = 8,
+                 precision: str = "float32"):
+        self.dimension = dimension
+        self.exact_threshold = exact_threshold
+        self.n_probe = n_probe
+        self.precision = precision
+        self._indexes: Dict[str, VectorIndex] = {}
+        self._loading: Dict[str, List[tuple]] = {}
+        self._loaded_at: Dict[str, float] = {}
+        self._load_started: Dict[str, float] = {}
+
+    def is_warm(self, user_id: str) -> bool:
+        return user_id in self._indexes
+
+    def is_loading(self, user_id: str) -> bool:
+        return user_id in self._loading
+
+    def age(self, user_id: str) -> float:
+        """Seconds since a warm user's snapshot was read."""
+        return time.monotonic() - self._loaded_at[user_id]
+
+    def begin_load(self, user_id: str) -> None:
+        """Start buffering writes for a user whose snapshot is being read."""
+        if user_id not in self._loading:
+            self._loading[user_id] = []
+            self._load_started[user_id] = time.monotonic()
+
+    def finish_load(self, user_id: str, rows: List[Dict[str, Any]]) -> None:
+        """Install a user's snapshot, then replay writes buffered during the load."""
+        index = VectorIndex(self.dimension, self.exact_threshold, self.n_probe, self.precision)
+        rows = [row for row in rows if row.get("embedding") is not None]
+        if rows:
+            index.add_many(
+                [row["id"] for row in rows],
+                np.stack([decode_vector(row["embedding"]) for row in rows]),
+                [self._payload(row) for row in rows]
+            )
+        self._indexes[user_id] = index
+        self._loaded_at[user_id] = self._load_started.pop(user_id, time.monotonic())
+        for operation, row in self._loading.pop(user_id, []):
+            operation(row)
+
+    def abort_load(self, user_id: str) -> None:
+        self._loading.pop(user_id, None)
+        self._load_started.pop(user_id, None)
+
+    def memory_bytes(self) -> int:
+        """Bytes held by vector storage across all warm users."""
+        return sum(index.memory_bytes() for index in self._indexes.values())
+
+    def drop(self, user_id: str) -> None:
+        self._indexes.pop(user_id, None)
+        self._loaded_at.pop(user_id, None)
+
+    def upsert(self, row: Dict[str, Any]) -> None:
+        """Apply an inserted or updated echo_memories row."""
+        user_id = row.get("user_id")
+        if user_id in self._loading:
+            self._loading[user_id].append((self.upsert, row))
+        index = self._indexes.get(user_id)
+        if index is None:
+            return
+        if row.get("embedding") is None:
+            index.remove(row["id"])
+        else:
+            index.add(row["id"], row["embedding"], self._payload(row))
+
+    def remove(self, row: Dict[str, Any]) -> None:
+        """Apply a deleted echo_memories row."""
+        user_id = row.get("user_id")
+        if user_id in self._loading:
+            self._loading[user_id].append((self.remove, row))
+        index = self._indexes.get(user_id)
+        if index is not None:
+            index.remove(row["id"])
+
+    def search(self,
+               user_id: str,
+               query_embedding: Any,
+               match_threshold: float,
+               limit: int) -> List[Dict[str, Any]]:
+        return self._indexes[user_id].search(query_embedding, match_threshold, limit)
+
+    @staticmethod
+    def _payload(row: Dict[str, Any]) -> Dict[str, Any]:
+        # Same columns as the match_memories RPC returns
+        return {
+            "id": row["id"],
+            "user_id": row.get("user_id"),
+            "content": row.get("content"),
+            "metadata": row.get("metadata")
+        }
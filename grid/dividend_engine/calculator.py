@@ -1,20 +1,72 @@
-from typing import Dict, Any, List, Optional
-from datetime import datetime, timedelta
+from typing import Dict, Any, AsyncIterable, AsyncIterator, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+from datetime import date, datetime, timedelta, timezone
+import asyncio
 import numpy as np
-from supabase import create_client, Client
 import os
+import time
+import uuid
 from dotenv import load_dotenv
+from vault.backend.data_access import DataAccess, get_data_access, is_data_error, keyset_page
 
 load_dotenv()
 
+async def _iterate(items: Union[Iterable[Any], AsyncIterable[Any]]) -> AsyncIterator[Any]:
+    if hasattr(items, "__aiter__"):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+def _as_utc(moment: Optional[datetime]) -> Optional[datetime]:
+    """Convert an aware datetime to UTC so .date() is its UTC day; naive ones pass through."""
+    if moment is None or moment.tzinfo is None:
+        return moment
+    return moment.astimezone(timezone.utc)
+
+def _day_start(day: date, like: datetime) -> datetime:
+    """Midnight starting day, aware or naive to match like."""
+    return datetime.combine(day, datetime.min.time(), tzinfo=like.tzinfo)
+
+def _earnings_ranges(start_date: Optional[datetime],
+                     end_date: Optional[datetime]) -> Tuple[Optional[tuple], List[tuple]]:
+    """Split a range into whole UTC days, for the rollups, and raw (start, end, end_inclusive) edges.
+
+    The whole days are None when the range has none.
+    """
+    start_date = _as_utc(start_date)
+    end_date = _as_utc(end_date)
+    first_day = start_date.date() if start_date else None
+    if start_date and start_date != _day_start(first_day, start_date):
+        first_day += timedelta(days=1)
+    last_day = end_date.date() - timedelta(days=1) if end_date else None
+    
+    if first_day and last_day and first_day > last_day:
+        # No whole day in range
+        return None, [(start_date, end_date, True)]
+    edges = []
+    if start_date and start_date.date() != first_day:
+        edges.append((start_date, _day_start(first_day, start_date), False))
+    if end_date:
+        edges.append((_day_start(end_date.date(), end_date), end_date, True))
+    return (first_day, last_day), edges
+
+def _period_key(start_date: Optional[datetime], end_date: Optional[datetime]) -> str:
+    """Period key "start/end" in naive UTC ISO format, empty for an open end."""
+    def part(moment: Optional[datetime]) -> str:
+        moment = _as_utc(moment)
+        return moment.replace(tzinfo=None).isoformat() if moment else ""
+    return f"{part(start_date)}/{part(end_date)}"
+
+def _add_totals(totals: Dict[str, float], rows: Iterable[Mapping[str, Any]]) -> None:
+    for item in rows:
+        totals[item["data_type"]] = totals.get(item["data_type"], 0.0) + item["total"]
+
 class DividendCalculator:
     """Calculates and routes dividends based on data usage and value."""
     
-    def __init__(self):
-        self.supabase: Client = create_client(
-            os.getenv("SUPABASE_URL"),
-            os.getenv("SUPABASE_KEY")
-        )
+    def __init__(self, data_access: Optional[DataAccess] = None):
+        self.db = (data_access or get_data_access()).for_module(__name__)
         self.base_rates = {
             "spotify": 0.01,  # $0.01 per play
             "gmail": 0.005,   # $0.005 per email
@@ -43,15 +95,72 @@ class DividendCalculator:
             "calculated_at": datetime.utcnow().isoformat()
         }
         
-        result = self.supabase.table("dividend_calculations").insert(calculation).execute()
+        result = await self.db.table("dividend_calculations").insert(calculation).execute()
         return dividend
     
+    async def calculate_dividends_batch(self,
+                                      events: Mapping[str, Sequence[Any]],
+                                      chunk_size: int = 1000) -> Dict[str, Any]:
+        """Calculate dividends for many usage events in one vectorized pass.
+        
+        events is columnar: a DataFrame or a mapping of equal-length arrays with
+        user_id, data_type, usage_count and optionally quality_score. Each event
+        gets exactly the dividend calculate_dividend would compute for it.
+        """
+        user_ids = np.asarray(events["user_id"], dtype=object)
+        data_types = np.asarray(events["data_type"], dtype=object)
+        usage_counts = np.asarray(events["usage_count"], dtype=np.int64)
+        if "quality_score" in events:
+            quality_scores = np.asarray(events["quality_score"], dtype=np.float64)
+        else:
+            quality_scores = np.ones(len(user_ids), dtype=np.float64)
+        
+        # Look rates up once per distinct data type, then broadcast
+        type_names, type_index = np.unique(data_types.astype(str), return_inverse=True)
+        type_rates = np.array([self.base_rates.get(name, self.base_rates["default"]) for name in type_names])
+        base_rates = type_rates[type_index]
+        # Same operand order as the scalar path so results are bit-identical
+        dividends = base_rates * usage_counts.astype(np.float64) * quality_scores
+        
+        calculated_at = datetime.utcnow().isoformat()
+        for start in range(0, len(user_ids), chunk_size):
+            end = start + chunk_size
+            calculations = [
+                {
+                    "user_id": user_id,
+                    "data_type": data_type,
+                    "usage_count": usage_count,
+                    "quality_score": quality_score,
+                    "base_rate": base_rate,
+                    "dividend": dividend,
+                    "calculated_at": calculated_at
+                }
+                for user_id, data_type, usage_count, quality_score, base_rate, dividend in zip(
+                    user_ids[start:end].tolist(),
+                    data_types[start:end].tolist(),
+                    usage_counts[start:end].tolist(),
+                    quality_scores[start:end].tolist(),
+                    base_rates[start:end].tolist(),
+                    dividends[start:end].tolist()
+                )
+            ]
+            await self.db.table("dividend_calculations").insert(calculations, returning="minimal").execute()
+        
+        users, user_index = np.unique(user_ids.astype(str), return_inverse=True)
+        user_totals = np.bincount(user_index, weights=dividends, minlength=len(users))
+        
+        return {
+            "count": len(dividends),
+            "total": float(dividends.sum()),
+            "by_user": dict(zip(users.tolist(), user_totals.tolist()))
+        }
+    
     async def get_user_dividends(self,
                                user_id: str,
                                start_date: Optional[datetime] = None,
                                end_date: Optional[datetime] = None) -> List[Dict[str, Any]]:
         """Get all dividend calculations for a user within a date range."""
-        query = self.supabase.table("dividend_calculations")\
+        query = self.db.table("dividend_calculations")\
             .select("*")\
             .eq("user_id", user_id)
         
@@ -60,7 +169,7 @@ class DividendCalculator:
         if end_date:
             query = query.lte("calculated_at", end_date.isoformat())
         
-        result = query.execute()
+        result = await query.execute()
         return result.data
     
     async def process_payout(self,
@@ -76,7 +185,7 @@ class DividendCalculator:
             "created_at": datetime.utcnow().isoformat()
         }
         
-        result = self.supabase.table("payouts").insert(payout).execute()
+        result = await self.db.table("payouts").insert(payout).execute()
         return result.data[0]
     
     async def update_payout_status(self,
@@ -92,47 +201,298 @@ class DividendCalculator:
         if transaction_id:
             updates["transaction_id"] = transaction_id
         
-        result = self.supabase.table("payouts")\
+        result = await self.db.table("payouts")\
             .update(updates)\
             .eq("id", payout_id)\
             .execute()
         
         return result.data[0]
     
+    async def create_payouts_batch(self,
+                                 user_ids: Sequence[str],
+                                 payment_method: str,
+                                 start_date: Optional[datetime] = None,
+                                 end_date: Optional[datetime] = None,
+                                 minimum_amount: float = 0.0,
+                                 chunk_size: int = 1000,
+                                 max_in_flight: int = 4) -> Dict[str, Any]:
+        """Create pending payouts for many users from their earnings totals.
+        
+        Users are handled in chunks of chunk_size, max_in_flight at a time;
+        each chunk costs one grouped earnings query per part of the range
+        (see calculate_total_earnings_batch) and one upsert. Users below
+        minimum_amount are skipped.
+        
+        A payout is keyed by user and period (the start/end dates), with an id
+        derived from both, so running the same batch again creates nothing
+        new: payouts that already exist are kept as they are. "created" counts
+        the payouts this call inserted.
+        """
+        started = time.perf_counter()
+        user_ids = list(dict.fromkeys(user_ids))
+        period = _period_key(start_date, end_date)
+        stats = {"payouts": [], "created": 0}
+        in_flight = set()
+        
+        async def create(chunk: List[str]) -> None:
+            earnings = await self.calculate_total_earnings_batch(chunk, start_date, end_date)
+            created_at = datetime.utcnow().isoformat()
+            payouts = [
+                {
+                    "id": str(uuid.uuid5(uuid.NAMESPACE_URL, f"payout:{user_id}:{period}")),
+                    "user_id": user_id,
+                    "amount": totals["total"],
+                    "payment_method": payment_method,
+                    "status": "pending",
+                    "period": period,
+                    "created_at": created_at
+                }
+                for user_id, totals in earnings.items()
+                if totals["total"] > 0 and totals["total"] >= minimum_amount
+            ]
+            if payouts:
+                result = await self.db.table("payouts")\
+                    .upsert(payouts, on_conflict="user_id,period", ignore_duplicates=True,
+                            returning="minimal", count="exact")\
+                    .execute()
+                stats["created"] += result.count or 0
+            stats["payouts"].extend(payouts)
+        
+        try:
+            for start in range(0, len(user_ids), chunk_size):
+                while len(in_flight) >= max_in_flight:
+                    done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    in_flight.difference_update(done)
+                    for task in done:
+                        task.result()
+                in_flight.add(asyncio.ensure_future(create(user_ids[start:start + chunk_size])))
+            if in_flight:
+                await asyncio.gather(*in_flight)
+        finally:
+            for task in in_flight:
+                task.cancel()
+        
+        payouts = stats["payouts"]
+        elapsed = time.perf_counter() - started
+        return {
+            "payouts": payouts,
+            "count": len(payouts),
+            "created": stats["created"],
+            "total": sum(payout["amount"] for payout in payouts),
+            "seconds": elapsed,
+            "per_second": len(user_ids) / elapsed if elapsed else 0.0
+        }
+    
+    async def apply_settlements(self,
+                              settlements: Union[Iterable[Mapping[str, Any]], AsyncIterable[Mapping[str, Any]]],
+                              chunk_size: int = 1000,
+                              max_in_flight: int = 4,
+                              max_errors: int = 100) -> Dict[str, Any]:
+        """Apply payout status transitions in bulk from a settlement file or stream.
+        
+        Each settlement has payout_id, status and optionally transaction_id.
+        Payouts already at that status and transaction_id are left untouched and
+        a completed or failed payout never changes status, so replaying a
+        settlement file is a cheap no-op. A payout's transaction_id is set once.
+        Settlements the store rejects (an unknown status, a transaction_id
+        already used by another payout or different from the one the payout
+        already has) are reported individually, the first max_errors of them, and never abort
+        the rest; a batch that fails for another reason, such as a timeout,
+        is reported as failed without retrying.
+        """
+        started = time.perf_counter()
+        stats = {"received": 0, "applied": 0, "batches": 0, "failed": 0, "errors": []}
+        in_flight = set()
+        
+        def fail(settlement: Mapping[str, Any], error: Any) -> None:
+            stats["failed"] += 1
+            if len(stats["errors"]) < max_errors:
+                stats["errors"].append({"payout_id": settlement.get("payout_id"), "error": str(error)})
+        
+        async def write(batch: List[Dict[str, Any]]) -> None:
+            try:
+                result = await self.db.rpc("apply_payout_settlements", {"p_settlements": batch}).execute()
+                stats["applied"] += result.data or 0
+                stats["batches"] += 1
+                return
+            except Exception as error:
+                if len(batch) == 1 or not is_data_error(error):
+                    for settlement in batch:
+                        fail(settlement, error)
+                    return
+            # The function runs in one transaction, so a rejected batch changed
+            # nothing; bisect to the rejected settlements
+            middle = len(batch) // 2
+            await write(batch[:middle])
+            await write(batch[middle:])
+        
+        async def send(batch: List[Dict[str, Any]]) -> None:
+            while len(in_flight) >= max_in_flight:
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                in_flight.difference_update(done)
+            in_flight.add(asyncio.ensure_future(write(batch)))
+        
+        batch: Dict[str, Dict[str, Any]] = {}
+        # transaction_id -> payout_id within the batch; a transaction settles one payout
+        transactions: Dict[str, str] = {}
+        try:
+            async for settlement in _iterate(settlements):
+                stats["received"] += 1
+                payout_id = settlement.get("payout_id")
+                transaction_id = settlement.get("transaction_id") or None
+                if not payout_id or not settlement.get("status"):
+                    fail(settlement, "Settlement needs payout_id and status")
+                    continue
+                if transaction_id and transactions.get(transaction_id, payout_id) != payout_id:
+                    fail(settlement, f"Transaction {transaction_id} already settles payout "
+                                     f"{transactions[transaction_id]}")
+                    continue
+                previous = batch.get(payout_id)
+                if previous and previous["transaction_id"] and previous["transaction_id"] != transaction_id:
+                    del transactions[previous["transaction_id"]]
+                # Only the last transition per payout in a batch matters
+                batch[payout_id] = {
+                    "payout_id": payout_id,
+                    "status": settlement["status"],
+                    "transaction_id": transaction_id
+                }
+                if transaction_id:
+                    transactions[transaction_id] = payout_id
+                if len(batch) >= chunk_size:
+                    await send(list(batch.values()))
+                    batch, transactions = {}, {}
+            if batch:
+                await send(list(batch.values()))
+            if in_flight:
+                await asyncio.wait(in_flight)
+        finally:
+            for task in in_flight:
+                task.cancel()
+        
+        elapsed = time.perf_counter() - started
+        stats["skipped"] = stats["received"] - stats["applied"] - stats["failed"]
+        stats["seconds"] = elapsed
+        stats["per_second"] = stats["received"] / elapsed if elapsed else 0.0
+        return stats
+    
     async def get_payout_history(self,
                                user_id: str,
                                limit: int = 100,
-                               offset: int = 0) -> List[Dict[str, Any]]:
-        """Get payout history for a user."""
-        result = self.supabase.table("payouts")\
+                               offset: int = 0,
+                               cursor: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get payout history for a user, newest first.
+        
+        Pass next_cursor(page, limit) as cursor to continue after a page;
+        offset is ignored when a cursor is given.
+        """
+        query = self.db.table("payouts")\
             .select("*")\
-            .eq("user_id", user_id)\
-            .order("created_at", desc=True)\
-            .range(offset, offset + limit - 1)\
-            .execute()
+            .eq("user_id", user_id)
+        
+        if cursor:
+            query = keyset_page(query, limit, cursor)
+        else:
+            query = query.order("created_at", desc=True)\
+                .order("id", desc=True)\
+                .range(offset, offset + limit - 1)
         
+        result = await query.execute()
         return result.data
     
     async def calculate_total_earnings(self,
                                      user_id: str,
                                      start_date: Optional[datetime] = None,
                                      end_date: Optional[datetime] = None) -> Dict[str, Any]:
-        """Calculate total earnings for a user."""
-        query = self.supabase.table("dividend_calculations")\
-            .select("data_type, sum(dividend) as total")\
-            .eq("user_id", user_id)
+        """Calculate total earnings for a user.
         
-        if start_date:
-            query = query.gte("calculated_at", start_date.isoformat())
-        if end_date:
-            query = query.lte("calculated_at", end_date.isoformat())
-        
-        result = query.group("data_type").execute()
+        Whole UTC days come from the dividend_rollups table; only the partial
+        days at the edges of the range are summed from raw calculations.
+        Naive datetimes are taken to be UTC.
+        """
+        days, edges = _earnings_ranges(start_date, end_date)
+        sums = [self._sum_rollups(user_id, *days)] if days else []
+        sums += [self._sum_calculations(user_id, start, end, end_inclusive) for start, end, end_inclusive in edges]
         
-        totals = {item["data_type"]: item["total"] for item in result.data}
+        totals: Dict[str, float] = {}
+        for rows in await asyncio.gather(*sums):
+            _add_totals(totals, rows)
         grand_total = sum(totals.values())
         
         return {
             "by_type": totals,
             "total": grand_total
-        } 
\ No newline at end of file
+        }
+    
+    async def calculate_total_earnings_batch(self,
+                                           user_ids: Sequence[str],
+                                           start_date: Optional[datetime] = None,
+                                           end_date: Optional[datetime] = None) -> Dict[str, Dict[str, Any]]:
+        """calculate_total_earnings for many users, keyed by user id.
+        
+        Each part of the range (the whole days and up to two partial edge
+        days) is one grouped query for all the users, so the round trips do
+        not grow with the number of users.
+        """
+        user_ids = list(user_ids)
+        days, edges = _earnings_ranges(start_date, end_date)
+        sums = []
+        if days:
+            first_day, last_day = days
+            sums.append(self.db.rpc(
+                "sum_dividend_rollups_by_user",
+                {
+                    "p_user_ids": user_ids,
+                    "p_first_day": first_day.isoformat() if first_day else None,
+                    "p_last_day": last_day.isoformat() if last_day else None
+                }
+            ).execute())
+        for start, end, end_inclusive in edges:
+            sums.append(self.db.rpc(
+                "sum_dividend_calculations_by_user",
+                {
+                    "p_user_ids": user_ids,
+                    "p_start": start.isoformat() if start else None,
+                    "p_end": end.isoformat() if end else None,
+                    "p_end_inclusive": end_inclusive
+                }
+            ).execute())
+        
+        totals: Dict[str, Dict[str, float]] = {user_id: {} for user_id in user_ids}
+        for result in await asyncio.gather(*sums):
+            for item in result.data:
+                by_type = totals.setdefault(item["user_id"], {})
+                by_type[item["data_type"]] = by_type.get(item["data_type"], 0.0) + item["total"]
+        return {
+            user_id: {"by_type": by_type, "total": sum(by_type.values())}
+            for user_id, by_type in totals.items()
+        }
+    
+    async def _sum_rollups(self,
+                         user_id: str,
+                         first_day: Optional[date],
+                         last_day: Optional[date]) -> List[Dict[str, Any]]:
+        result = await self.db.rpc(
+            "sum_dividend_rollups",
+            {
+                "p_user_id": user_id,
+                "p_first_day": first_day.isoformat() if first_day else None,
+                "p_last_day": last_day.isoformat() if last_day else None
+            }
+        ).execute()
+        return result.data
+    
+    async def _sum_calculations(self,
+                              user_id: str,
+                              start: Optional[datetime],
+                              end: Optional[datetime],
+                              end_inclusive: bool) -> List[Dict[str, Any]]:
+        result = await self.db.rpc(
+            "sum_dividend_calculations",
+            {
+                "p_user_id": user_id,
+                "p_start": start.isoformat() if start else None,
+                "p_end": end.isoformat() if end else None,
+                "p_end_inclusive": end_inclusive
+            }
+        ).execute()
+        return result.data
@@ -0,0 +1,17 @@
+from typing import Any, Dict, Iterator
+import csv
+import json
+
+def read_settlements(path: str) -> Iterator[Dict[str, Any]]:
+    """Stream settlements from a CSV (with header) or NDJSON settlement file.
+
+    Rows need payout_id and status columns; transaction_id is optional.
+    """
+    with open(path, newline="", encoding="utf-8") as settlement_file:
+        if path.endswith(".csv"):
+            for row in csv.DictReader(settlement_file):
+                yield row
+        else:
+            for line in settlement_file:
+                if line.strip():
+                    yield json.loads(line)
@@ -0,0 +1,223 @@
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+import asyncio
+import time
+from vault.backend.data_access import DataAccess, parse_timestamp
+
+class ContextCache:
+    """Per-user cache of active contexts with coalesced write-behind updates.
+
+    A user's contexts are loaded once and then served from memory; contexts
+    drop out when their updated_at leaves the activity window, and users that
+    go unread for a whole window (or fall off the LRU) are evicted. Staged
+    updates are applied to the cached row at once and written to the store
+    write_behind_seconds later, so repeated updates cost one write. The cache
+    assumes a user's agent turns are served by one process.
+    """
+
+    def __init__(self,
+                 data_access: DataAccess,
+                 max_users: int = 10000,
+                 window: timedelta = timedelta(hours=24),
+                 write_behind_seconds: float = 1.0):
+        self.db = data_access.for_module(__name__)
+        self.max_users = max_users
+        self.window = window
+        self.write_behind_seconds = write_behind_seconds
+        # user_id -> (context_id -> (row, created_at, updated_at), last read)
+        self._users: "OrderedDict[str, Tuple[Dict[str, Tuple[Dict[str, Any], datetime, datetime]], float]]" = OrderedDict()
+        self._owners: Dict[str, str] = {}
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        # Staged updates taken by a flush whose write has not finished
+        self._writing: Set[str] = set()
+        # context_id -> (lock, holders and waiters); see writing()
+        self._locks: Dict[str, Tuple[asyncio.Lock, int]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        # Bumped on every write so loads that raced a write are not cached
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.coalesced = 0
+
+    def active(self, user_id: str, now: datetime) -> Optional[List[Dict[str, Any]]]:
+        """Return the user's active contexts at now, or None if not cached."""
+        entry = self._users.get(user_id)
+        if entry is None or entry[1] + self.window.total_seconds() <= time.monotonic():
+            if entry is not None:
+                self._evict(user_id)
+            self.misses += 1
+            return None
+
+        contexts = entry[0]
+        cutoff = now - self.window
+        for context_id in [key for key, (_, _, updated) in contexts.items() if updated < cutoff]:
+            del contexts[context_id]
+            self._owners.pop(context_id, None)
+        self._users[user_id] = (contexts, time.monotonic())
+        self._users.move_to_end(user_id)
+        self.hits += 1
+        return [dict(row) for row, created, _ in contexts.values() if created <= now]
+
+    def load(self, user_id: str, rows: List[Dict[str, Any]], version: int) -> None:
+        """Cache a user's active contexts read at the given version."""
+        if self.max_users <= 0 or version != self.version:
+            return
+        contexts = {}
+        for row in rows:
+            # Staged updates are newer than what the store returned
+            row = dict(row, **self._pending.get(row["id"], {}))
+            contexts[row["id"]] = self._entry(row)
+            self._owners[row["id"]] = user_id
+        self._users[user_id] = (contexts, time.monotonic())
+        self._users.move_to_end(user_id)
+        while len(self._users) > self.max_users:
+            self._evict(next(iter(self._users)))
+
+    def get(self, context_id: str) -> Optional[Dict[str, Any]]:
+        """Return a cached context row, or None."""
+        user_id = self._owners.get(context_id)
+        if user_id is None:
+            return None
+        return dict(self._users[user_id][0][context_id][0])
+
+    def put(self, row: Dict[str, Any]) -> None:
+        """Record a row just written to the store, if its user is cached."""
+        self.version += 1
+        entry = self._users.get(row["user_id"])
+        if entry is not None:
+            entry[0][row["id"]] = self._entry(dict(row))
+            self._owners[row["id"]] = row["user_id"]
+
+    def discard(self, context_id: str) -> None:
+        """Forget a deleted context, including any staged update."""
+        self.version += 1
+        self._pending.pop(context_id, None)
+        user_id = self._owners.pop(context_id, None)
+        if user_id is not None:
+            self._users[user_id][0].pop(context_id, None)
+
+    def stage(self, context_id: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Apply updates to a cached context and schedule the write.
+
+        Returns the updated row, or None if the context is not cached and must
+        be written directly.
+        """
+        user_id = self._owners.get(context_id)
+        if user_id is None or self.write_behind_seconds <= 0:
+            return None
+        contexts = self._users[user_id][0]
+        row = dict(contexts[context_id][0], **updates)
+        contexts[context_id] = self._entry(row)
+
+        if context_id in self._pending:
+            self._pending[context_id].update(updates)
+            self.coalesced += 1
+        else:
+            self._pending[context_id] = dict(updates)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush_later())
+        return dict(row)
+
+    def is_pending(self, context_id: str) -> bool:
+        """Return whether a context has a staged update not yet written."""
+        return context_id in self._pending or context_id in self._writing
+
+    @asynccontextmanager
+    async def writing(self, context_id: str) -> AsyncIterator[None]:
+        """Hold the write lock of one context.
+
+        Writers that read the cached row and write it back (stage, patch) take
+        it so that neither applies its change on top of a stale row.
+        """
+        lock, users = self._locks.get(context_id) or (asyncio.Lock(), 0)
+        self._locks[context_id] = (lock, users + 1)
+        try:
+            async with lock:
+                yield
+        finally:
+            lock, users = self._locks[context_id]
+            if users == 1:
+                del self._locks[context_id]
+            else:
+                self._locks[context_id] = (lock, users - 1)
+
+    async def flush(self) -> None:
+        """Write every staged update to the store now."""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            pending, self._pending = self._pending, {}
+            if not pending:
+                return
+            self._writing.update(pending)
+            try:
+                results = await asyncio.gather(
+                    *(self._write(context_id, updates) for context_id, updates in pending.items()),
+                    return_exceptions=True
+                )
+            finally:
+                self._writing.clear()
+            errors = []
+            for (context_id, updates), result in zip(pending.items(), results):
+                if isinstance(result, BaseException):
+                    # Requeue under anything staged since, which is newer
+                    self._pending[context_id] = dict(updates, **self._pending.get(context_id, {}))
+                    errors.append(result)
+            if errors:
+                raise errors[0]
+
+    async def close(self) -> None:
+        """Cancel the pending timer and flush; call on shutdown."""
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+        self._flush_task = None
+        await self.flush()
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.write_behind_seconds)
+        try:
+            await asyncio.shield(self.flush())
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Failed updates stay staged and are retried below
+            pass
+        if self._pending:
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush_later())
+
+    async def _write(self, context_id: str, updates: Dict[str, Any]) -> None:
+        await self.db.table("contexts")\
+            .update(updates, returning="minimal")\
+            .eq("id", context_id)\
+            .execute()
+        self.writes += 1
+
+    def _entry(self, row: Dict[str, Any]) -> Tuple[Dict[str, Any], datetime, datetime]:
+        return (row, parse_timestamp(row["created_at"]), parse_timestamp(row["updated_at"]))
+
+    def _evict(self, user_id: str) -> None:
+        contexts, _ = self._users.pop(user_id)
+        for context_id in contexts:
+            self._owners.pop(context_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache hit/miss counts and write-behind counters."""
+        lookups = self.hits + self.misses
+        return {
+            "users": len(self._users),
+            "contexts": len(self._owners),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "pending": len(self._pending),
+            "writes": self.writes,
+            "coalesced": self.coalesced
+        }
@@ -1,20 +1,35 @@
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, AsyncIterator, List, Mapping, Optional
 from datetime import datetime, timedelta
+import asyncio
 import json
-from supabase import create_client, Client
 import os
+import uuid
 from dotenv import load_dotenv
+from vault.backend.coalesce import RowLoader
+from vault.backend.data_access import DataAccess, canonical_id, get_data_access, keyset_page
+from mcp.agents.context_cache import ContextCache
+from mcp.agents.context_merge import create_merger
+from mcp.agents.context_patch import ContextConflictError, apply_merge_patch
 
 load_dotenv()
 
 class ContextManager:
     """Manages context and state across the Y system."""
     
-    def __init__(self):
-        self.supabase: Client = create_client(
-            os.getenv("SUPABASE_URL"),
-            os.getenv("SUPABASE_KEY")
+    def __init__(self,
+                 data_access: Optional[DataAccess] = None,
+                 cache: Optional[ContextCache] = None):
+        self.db = (data_access or get_data_access()).for_module(__name__)
+        # Opt-in hot contexts per user: it serves reads from memory, so enable it
+        # (CONTEXT_CACHE_USERS) only where one process owns each user's contexts.
+        # CONTEXT_WRITE_BEHIND_SECONDS=0 writes updates through
+        self.cache = cache or ContextCache(
+            self.db,
+            max_users=int(os.getenv("CONTEXT_CACHE_USERS", "0")),
+            write_behind_seconds=float(os.getenv("CONTEXT_WRITE_BEHIND_SECONDS", "1"))
         )
+        # Concurrent get_context misses share queries (DATA_ACCESS_COALESCE)
+        self.loader = RowLoader(self.db, "contexts")
     
     async def create_context(self,
                            user_id: str,
@@ -31,15 +46,49 @@ class ContextManager:
             "updated_at": datetime.utcnow().isoformat()
         }
         
-        result = self.supabase.table("contexts").insert(context).execute()
+        result = await self.db.table("contexts").insert(context).execute()
+        self.cache.put(result.data[0])
         return result.data[0]
     
     async def get_context(self, context_id: str) -> Dict[str, Any]:
         """Get a specific context by ID."""
-        result = self.supabase.table("contexts").select("*").eq("id", context_id).execute()
-        if not result.data:
+        cached = self.cache.get(canonical_id(context_id))
+        if cached is not None:
+            return cached
+        context = await self.loader.get(context_id)
+        if context is None:
             raise ValueError(f"Context {context_id} not found")
-        return result.data[0]
+        return context
+    
+    async def get_contexts(self, context_ids: List[str]) -> List[Dict[str, Any]]:
+        """Get many contexts in one query, in the order of context_ids."""
+        # Matched on the UUID form the store returns, whatever case the caller used
+        ids = [canonical_id(context_id) for context_id in context_ids]
+        by_id = {}
+        for context_id in ids:
+            cached = self.cache.get(context_id)
+            if cached is not None:
+                by_id[context_id] = cached
+        unique_ids = [context_id for context_id in dict.fromkeys(ids) if context_id not in by_id]
+        if unique_ids:
+            result = await self.db.table("contexts").select("*").in_("id", unique_ids).execute()
+            by_id.update((canonical_id(context["id"]), context) for context in result.data)
+        for given, context_id in zip(context_ids, ids):
+            if context_id not in by_id:
+                raise ValueError(f"Context {given} not found")
+        return [by_id[context_id] for context_id in ids]
+    
+    async def iter_contexts(self,
+                          context_ids: List[str],
+                          chunk_size: int = 200) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield contexts in chunks of one query each, prefetching the next chunk."""
+        chunks = [context_ids[start:start + chunk_size] for start in range(0, len(context_ids), chunk_size)]
+        pending = asyncio.ensure_future(self.get_contexts(chunks[0])) if chunks else None
+        for index in range(len(chunks)):
+            contexts = await pending
+            if index + 1 < len(chunks):
+                pending = asyncio.ensure_future(self.get_contexts(chunks[index + 1]))
+            yield contexts
     
     async def update_context(self,
                            context_id: str,
@@ -55,71 +104,133 @@ class ContextManager:
         if metadata is not None:
             updates["metadata"] = metadata
         
-        result = self.supabase.table("contexts")\
-            .update(updates)\
-            .eq("id", context_id)\
-            .execute()
+        async with self.cache.writing(context_id):
+            # Cached contexts are updated in memory and written behind
+            staged = self.cache.stage(context_id, updates)
+            if staged is not None:
+                return staged
+            
+            result = await self.db.table("contexts")\
+                .update(updates)\
+                .eq("id", context_id)\
+                .execute()
+            
+            self.loader.forget(context_id)
+            self.cache.put(result.data[0])
+            return result.data[0]
+    
+    async def patch_context(self,
+                          context_id: str,
+                          data_patch: Optional[Dict[str, Any]] = None,
+                          metadata_patch: Optional[Dict[str, Any]] = None,
+                          expected_updated_at: Optional[str] = None) -> Dict[str, Any]:
+        """Apply JSON merge patches to a context's data and metadata.
         
-        return result.data[0]
+        Only the patches are sent and the store merges them into the row. If
+        expected_updated_at is given and the context has changed since, the
+        patch is rejected with ContextConflictError. Returns the context id
+        and its new updated_at.
+        """
+        # Updates to the context wait until the patch is applied to the cached row
+        async with self.cache.writing(context_id):
+            if self.cache.is_pending(context_id):
+                # A staged update must land before the patch applied on top of it
+                await self.cache.flush()
+            
+            updated_at = datetime.utcnow().isoformat()
+            result = await self.db.rpc(
+                "patch_context",
+                {
+                    "p_context_id": context_id,
+                    "p_data_patch": data_patch,
+                    "p_metadata_patch": metadata_patch,
+                    "p_expected_updated_at": expected_updated_at,
+                    "p_updated_at": updated_at
+                }
+            ).execute()
+            self.loader.forget(context_id)
+            if not result.data:
+                raise ValueError(f"Context {context_id} not found")
+            if result.data[0]["conflict"]:
+                raise ContextConflictError(
+                    f"Context {context_id} was updated at {result.data[0]['updated_at']}, expected {expected_updated_at}"
+                )
+            
+            cached = self.cache.get(context_id)
+            if cached is not None:
+                if data_patch is not None:
+                    cached["data"] = apply_merge_patch(cached["data"], data_patch)
+                if metadata_patch is not None:
+                    cached["metadata"] = apply_merge_patch(cached["metadata"], metadata_patch)
+                cached["updated_at"] = updated_at
+                self.cache.put(cached)
+            return {"id": context_id, "updated_at": updated_at}
     
     async def delete_context(self, context_id: str) -> bool:
         """Delete a context."""
-        result = self.supabase.table("contexts").delete().eq("id", context_id).execute()
+        self.cache.discard(context_id)
+        result = await self.db.table("contexts").delete().eq("id", context_id).execute()
+        self.loader.forget(context_id)
         return len(result.data) > 0
     
     async def list_contexts(self,
                           user_id: str,
                           context_type: Optional[str] = None,
                           limit: int = 100,
-                          offset: int = 0) -> List[Dict[str, Any]]:
-        """List contexts for a user with optional filtering."""
-        query = self.supabase.table("contexts")\
+                          offset: int = 0,
+                          cursor: Optional[str] = None) -> List[Dict[str, Any]]:
+        """List contexts for a user with optional filtering, newest first.
+        
+        Pass next_cursor(page, limit) as cursor to continue after a page;
+        offset is ignored when a cursor is given.
+        """
+        query = self.db.table("contexts")\
             .select("*")\
             .eq("user_id", user_id)
         
         if context_type:
             query = query.eq("context_type", context_type)
         
-        result = query.order("created_at", desc=True)\
-            .range(offset, offset + limit - 1)\
-            .execute()
+        if cursor:
+            query = keyset_page(query, limit, cursor)
+        else:
+            query = query.order("created_at", desc=True)\
+                .order("id", desc=True)\
+                .range(offset, offset + limit - 1)
+        
+        result = await query.execute()
         
-        return result.data
+        # Cached rows may carry updates not yet written
+        return [self.cache.get(context["id"]) or context for context in result.data]
     
     async def merge_contexts(self,
                            context_ids: List[str],
-                           merge_strategy: str = "latest") -> Dict[str, Any]:
-        """Merge multiple contexts into one."""
-        contexts = []
-        for context_id in context_ids:
-            context = await self.get_context(context_id)
-            contexts.append(context)
+                           merge_strategy: str = "latest",
+                           reducers: Optional[Mapping[str, Any]] = None,
+                           chunk_size: int = 200) -> Dict[str, Any]:
+        """Merge multiple contexts into one.
         
-        if merge_strategy == "latest":
-            # Use the most recent data for each field
-            merged_data = {}
-            for context in sorted(contexts, key=lambda x: x["updated_at"], reverse=True):
-                for key, value in context["data"].items():
-                    if key not in merged_data:
-                        merged_data[key] = value
-        
-        elif merge_strategy == "combine":
-            # Combine all data, with lists concatenated
-            merged_data = {}
+        Contexts are fetched chunk_size at a time and folded into the merge as
+        they arrive. reducers maps keys to a reducer name ("latest", "combine",
+        "concat", "sum", "min", "max") or a function of (merged, value) and
+        overrides the strategy for those keys.
+        """
+        if not context_ids:
+            raise ValueError("No contexts to merge")
+        merger = create_merger(merge_strategy, reducers)
+        first = None
+        async for contexts in self.iter_contexts(context_ids, chunk_size):
+            first = first or contexts[0]
             for context in contexts:
-                for key, value in context["data"].items():
-                    if key in merged_data:
-                        if isinstance(merged_data[key], list):
-                            merged_data[key].extend(value)
-                        else:
-                            merged_data[key] = [merged_data[key], value]
-                    else:
-                        merged_data[key] = value
+                merger.add(context)
+        merged_data = merger.result()
         
-        # Create new merged context
+        # Create new merged context; the id is generated here so the (possibly
+        # large) merged data is not echoed back by the insert
         merged_context = {
-            "user_id": contexts[0]["user_id"],
-            "context_type": contexts[0]["context_type"],
+            "id": str(uuid.uuid4()),
+            "user_id": first["user_id"],
+            "context_type": first["context_type"],
             "data": merged_data,
             "metadata": {
                 "merged_from": context_ids,
@@ -129,21 +240,42 @@ class ContextManager:
             "updated_at": datetime.utcnow().isoformat()
         }
         
-        result = self.supabase.table("contexts").insert(merged_context).execute()
-        return result.data[0]
+        await self.db.table("contexts").insert(merged_context, returning="minimal").execute()
+        self.cache.put(merged_context)
+        return merged_context
     
     async def get_active_contexts(self,
                                 user_id: str,
                                 current_time: Optional[datetime] = None) -> List[Dict[str, Any]]:
-        """Get all active contexts for a user."""
+        """Get all active contexts for a user.
+        
+        Current lookups are served from the hot-context cache after the first
+        one; an explicit current_time always queries the store.
+        """
+        use_cache = current_time is None
         if current_time is None:
             current_time = datetime.utcnow()
+            cached = self.cache.active(user_id, current_time)
+            if cached is not None:
+                return cached
         
-        result = self.supabase.table("contexts")\
+        version = self.cache.version
+        result = await self.db.table("contexts")\
             .select("*")\
             .eq("user_id", user_id)\
             .lte("created_at", current_time.isoformat())\
             .gte("updated_at", (current_time - timedelta(hours=24)).isoformat())\
             .execute()
         
-        return result.data 
\ No newline at end of file
+        if use_cache:
+            self.cache.load(user_id, result.data, version)
+        # Cached rows may carry updates not yet written
+        return [self.cache.get(context["id"]) or context for context in result.data]
+    
+    async def flush(self) -> None:
+        """Write any context updates still held by the write-behind cache."""
+        await self.cache.flush()
+    
+    async def close(self) -> None:
+        """Flush pending context updates; call on shutdown."""
+        await self.cache.close() 
\ No newline at end of file
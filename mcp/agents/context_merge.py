@@ -0,0 +1,150 @@
+from typing import Any, Callable, Dict, Mapping, Optional, Union
+from abc import ABC, abstractmethod
+import operator
+
+_MISSING = object()
+
+class Reducer(ABC):
+    """Folds the values one key takes across contexts, in merge order.
+
+    The running state may differ from the final value; inputs must never be
+    mutated, since they are the caller's contexts.
+    """
+
+    def initial(self, value: Any, context: Mapping[str, Any]) -> Any:
+        return value
+
+    @abstractmethod
+    def step(self, state: Any, value: Any, context: Mapping[str, Any]) -> Any:
+        """Fold the next value into the running state."""
+        pass
+
+    def final(self, state: Any) -> Any:
+        return state
+
+class BinaryReducer(Reducer):
+    """Reducer from a plain function of (accumulated, value)."""
+
+    def __init__(self, func: Callable[[Any, Any], Any]):
+        self.func = func
+
+    def step(self, state: Any, value: Any, context: Mapping[str, Any]) -> Any:
+        return self.func(state, value)
+
+class Latest(Reducer):
+    """Keeps the value from the most recently updated context; ties go to the earlier one."""
+
+    def initial(self, value: Any, context: Mapping[str, Any]) -> Any:
+        return (context["updated_at"], value)
+
+    def step(self, state: Any, value: Any, context: Mapping[str, Any]) -> Any:
+        return (context["updated_at"], value) if context["updated_at"] > state[0] else state
+
+    def final(self, state: Any) -> Any:
+        return state[1]
+
+class Combine(Reducer):
+    """A single value is kept as is; repeated values are gathered into a list.
+
+    Lists are concatenated. The first list is copied only once a second value
+    arrives, so a key that appears once is never copied.
+    """
+
+    def initial(self, value: Any, context: Mapping[str, Any]) -> Any:
+        return (value, False)
+
+    def step(self, state: Any, value: Any, context: Mapping[str, Any]) -> Any:
+        combined, owned = state
+        if not isinstance(combined, list):
+            return ([combined, value], True)
+        if not owned:
+            combined = list(combined)
+        if isinstance(value, list):
+            combined.extend(value)
+        else:
+            combined.append(value)
+        return (combined, True)
+
+    def final(self, state: Any) -> Any:
+        return state[0]
+
+class Concat(Reducer):
+    """Concatenates list values (scalars are appended) into one new list."""
+
+    def initial(self, value: Any, context: Mapping[str, Any]) -> Any:
+        return list(value) if isinstance(value, list) else [value]
+
+    def step(self, state: Any, value: Any, context: Mapping[str, Any]) -> Any:
+        if isinstance(value, list):
+            state.extend(value)
+        else:
+            state.append(value)
+        return state
+
+REDUCERS: Dict[str, Reducer] = {
+    "latest": Latest(),
+    "combine": Combine(),
+    "concat": Concat(),
+    "sum": BinaryReducer(operator.add),
+    "min": BinaryReducer(min),
+    "max": BinaryReducer(max)
+}
+
+def get_reducer(reducer: Union[str, Callable[[Any, Any], Any], Reducer]) -> Reducer:
+    """Resolve a reducer name, Reducer or binary function."""
+    if isinstance(reducer, Reducer):
+        return reducer
+    if callable(reducer):
+        return BinaryReducer(reducer)
+    if reducer not in REDUCERS:
+        raise ValueError(f"Unknown reducer {reducer}")
+    return REDUCERS[reducer]
+
+class ContextMerger:
+    """Merges context data in a single pass over the contexts.
+
+    Memory is one reducer state per distinct key; merged values reference
+    the input values wherever the reducer allows, so contexts are not copied.
+    """
+
+    def __init__(self,
+                 reducers: Optional[Mapping[str, Any]] = None,
+                 default: Any = "latest"):
+        self.reducers = {key: get_reducer(reducer) for key, reducer in (reducers or {}).items()}
+        self.default = get_reducer(default)
+        self._states: Dict[str, Any] = {}
+        self.count = 0
+
+    def add(self, context: Mapping[str, Any]) -> None:
+        """Fold one context into the merge."""
+        states = self._states
+        for key, value in context["data"].items():
+            reducer = self.reducers.get(key, self.default)
+            state = states.get(key, _MISSING)
+            if state is _MISSING:
+                states[key] = reducer.initial(value, context)
+            else:
+                states[key] = reducer.step(state, value, context)
+        self.count += 1
+
+    def result(self) -> Dict[str, Any]:
+        """Return the merged data."""
+        return {
+            key: self.reducers.get(key, self.default).final(state)
+            for key, state in self._states.items()
+        }
+
+MERGE_STRATEGIES: Dict[str, Callable[..., ContextMerger]] = {
+    "latest": lambda reducers=None: ContextMerger(reducers, default="latest"),
+    "combine": lambda reducers=None: ContextMerger(reducers, default="combine")
+}
+
+def register_merge_strategy(name: str, factory: Callable[..., ContextMerger]) -> None:
+    """Register a merge strategy; factory takes reducers=None and returns a ContextMerger."""
+    MERGE_STRATEGIES[name] = factory
+
+def create_merger(strategy: str, reducers: Optional[Mapping[str, Any]] = None) -> ContextMerger:
+    """Build the merger for a named strategy, with optional per-key reducers."""
+    if strategy not in MERGE_STRATEGIES:
+        raise ValueError(f"Unknown merge strategy {strategy}")
+    return MERGE_STRATEGIES[strategy](reducers=reducers)
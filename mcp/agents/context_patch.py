@@ -0,0 +1,20 @@
+from typing import Any, Dict
+
+class ContextConflictError(ValueError):
+    """Raised when a context changed since the updated_at a patch expected."""
+
+def apply_merge_patch(target: Any, patch: Any) -> Any:
+    """Apply a JSON merge patch (RFC 7386) and return the result.
+
+    target is not mutated; only the objects along patched paths are copied,
+    everything else is shared with target.
+    """
+    if not isinstance(patch, dict):
+        return patch
+    result: Dict[str, Any] = dict(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = apply_merge_patch(result.get(key), value)
+    return result
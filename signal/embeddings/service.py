@@ -0,0 +1,142 @@
+from typing import Any, Dict, Optional, Sequence
+import asyncio
+import hashlib
+import re
+import time
+import numpy as np
+
+_TOKEN = re.compile(r"\w+")
+
+class HashingEmbeddingModel:
+    """Deterministic local stand-in for an embedding model.
+
+    Tokens are hashed into signed buckets and the result is L2-normalised, so
+    equal texts always embed identically and similar texts land nearby.
+    latency and per_item emulate the cost of a remote model call.
+    """
+
+    def __init__(self, dimension: int = 1536, latency: float = 0.0, per_item: float = 0.0):
+        self.dimension = dimension
+        self.latency = latency
+        self.per_item = per_item
+        self.calls = 0
+        self.embedded = 0
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed a batch of texts into an (n, dimension) float32 array."""
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in _TOKEN.findall(text.lower()):
+                digest = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "little")
+                vectors[row, digest % self.dimension] += 1.0 if digest >> 63 else -1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors /= np.where(norms == 0, 1.0, norms)
+        self.calls += 1
+        self.embedded += len(texts)
+        if self.latency or self.per_item:
+            time.sleep(self.latency + self.per_item * len(texts))
+        return vectors
+
+def content_digest(text: str) -> bytes:
+    """Content address of a text: its SHA-256 digest."""
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+class EmbeddingService:
+    """Collects embedding requests into model-sized batches.
+
+    A batch is sent when batch_size distinct texts are waiting or the oldest
+    has waited max_wait seconds. Texts are addressed by content hash: cached
+    vectors are returned without a model call, and concurrent requests for
+    the same text share one result. The model runs on a worker thread.
+    """
+
+    def __init__(self,
+                 model: Any,
+                 cache: Optional[Any] = None,
+                 batch_size: int = 64,
+                 max_wait: float = 0.05):
+        if cache is not None and cache.dimension != model.dimension:
+            # Cached vectors from another model would be served as this one's
+            raise ValueError(f"Model embeds {model.dimension} dimensions but the cache holds {cache.dimension}")
+        self.model = model
+        self.cache = cache
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self._waiting: Dict[bytes, asyncio.Future] = {}
+        self._texts: Dict[bytes, str] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._batches: set = set()
+        self.requests = 0
+        self.cache_hits = 0
+        self.deduplicated = 0
+        self.batches = 0
+
+    async def embed(self, text: str) -> np.ndarray:
+        """Return the embedding of one text."""
+        self.requests += 1
+        digest = content_digest(text)
+        if self.cache is not None and digest in self.cache:
+            self.cache_hits += 1
+            return self.cache.get_many([digest])[digest]
+        future = self._waiting.get(digest)
+        if future is not None:
+            self.deduplicated += 1
+            return await asyncio.shield(future)
+
+        loop = asyncio.get_running_loop()
+        future = self._waiting[digest] = loop.create_future()
+        self._texts[digest] = text
+        if len(self._texts) >= self.batch_size:
+            self._send()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._send)
+        return await asyncio.shield(future)
+
+    async def embed_many(self, texts: Sequence[str]) -> np.ndarray:
+        """Return an (n, dimension) array of embeddings for texts."""
+        if not texts:
+            return np.zeros((0, self.model.dimension), dtype=np.float32)
+        return np.stack(await asyncio.gather(*(self.embed(text) for text in texts)))
+
+    async def flush(self) -> None:
+        """Send whatever is waiting and wait for every batch in flight."""
+        if self._texts:
+            self._send()
+        if self._batches:
+            await asyncio.gather(*self._batches, return_exceptions=True)
+
+    def _send(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._texts = self._texts, {}
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._run_batch(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _run_batch(self, batch: Dict[bytes, str]) -> None:
+        digests = list(batch)
+        self.batches += 1
+        try:
+            loop = asyncio.get_running_loop()
+            vectors = await loop.run_in_executor(None, self.model.embed, [batch[digest] for digest in digests])
+            if self.cache is not None:
+                self.cache.put_many(digests, vectors)
+        except Exception as error:
+            for digest in digests:
+                self._waiting.pop(digest).set_exception(error)
+            return
+        for digest, vector in zip(digests, vectors):
+            self._waiting.pop(digest).set_result(vector)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return request, cache and batching counters."""
+        return {
+            "requests": self.requests,
+            "cache_hits": self.cache_hits,
+            "deduplicated": self.deduplicated,
+            "batches": self.batches,
+            "embedded": self.requests - self.cache_hits - self.deduplicated,
+            "cached_vectors": len(self.cache) if self.cache is not None else 0
+        }
@@ -0,0 +1,87 @@
+from typing import Dict, List, Optional
+import os
+import numpy as np
+
+_MAGIC = b"YVEC0001"
+_HEADER = np.dtype([("magic", "S8"), ("dimension", "<u4"), ("reserved", "<u4")])
+
+class VectorCache:
+    """Persistent, append-only embedding cache keyed by content digest.
+
+    The file is a small header followed by fixed-size (digest, vector)
+    records. Existing records are read through a memory map, so opening a
+    large cache only builds the digest index; new vectors are appended and
+    never rewritten. A torn record left by a crash is ignored and overwritten.
+    """
+
+    def __init__(self, path: str, dimension: int):
+        self.path = path
+        self.dimension = dimension
+        # Raw bytes rather than "S32", which would strip trailing NUL bytes
+        self.record = np.dtype([("digest", "u1", (32,)), ("vector", "<f4", (dimension,))])
+        self._index: Dict[bytes, int] = {}
+        self._map: Optional[np.memmap] = None
+        self._mapped = 0
+
+        if not os.path.exists(path) or os.path.getsize(path) < _HEADER.itemsize:
+            with open(path, "wb") as cache_file:
+                header = np.zeros(1, dtype=_HEADER)
+                header["magic"] = _MAGIC
+                header["dimension"] = dimension
+                cache_file.write(header.tobytes())
+        else:
+            header = np.fromfile(path, dtype=_HEADER, count=1)[0]
+            if header["magic"] != _MAGIC or int(header["dimension"]) != dimension:
+                raise ValueError(f"{path} is not a {dimension}-dimension vector cache")
+
+        count = (os.path.getsize(path) - _HEADER.itemsize) // self.record.itemsize
+        self._file = open(path, "r+b")
+        # Drop a partial trailing record so appends stay aligned
+        self._file.truncate(_HEADER.itemsize + count * self.record.itemsize)
+        self._file.seek(0, os.SEEK_END)
+        self._remap(count)
+        if count:
+            blob = np.ascontiguousarray(self._map["digest"]).tobytes()
+            self._index = {blob[offset:offset + 32]: row for row, offset in enumerate(range(0, len(blob), 32))}
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, digest: bytes) -> bool:
+        return digest in self._index
+
+    def get_many(self, digests: List[bytes]) -> Dict[bytes, np.ndarray]:
+        """Return cached vectors for whichever digests are present."""
+        rows = {digest: self._index[digest] for digest in digests if digest in self._index}
+        if rows and max(rows.values()) >= self._mapped:
+            self._remap(len(self._index))
+        return {digest: np.array(self._map["vector"][row]) for digest, row in rows.items()}
+
+    def put_many(self, digests: List[bytes], vectors: np.ndarray) -> None:
+        """Append vectors for digests not already cached."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.shape != (len(digests), self.dimension):
+            raise ValueError(f"Expected {len(digests)} vectors of {self.dimension} dimensions, got shape {vectors.shape}")
+        new = [(digest, i) for i, digest in enumerate(digests) if digest not in self._index]
+        if not new:
+            return
+        records = np.empty(len(new), dtype=self.record)
+        records["digest"] = np.frombuffer(b"".join(digest for digest, _ in new), dtype=np.uint8).reshape(-1, 32)
+        records["vector"] = vectors[[i for _, i in new]]
+        self._file.write(records.tobytes())
+        self._file.flush()
+        start = len(self._index)
+        for offset, (digest, _) in enumerate(new):
+            self._index[digest] = start + offset
+
+    def _remap(self, count: int) -> None:
+        self._map = np.memmap(self.path, dtype=self.record, mode="r", offset=_HEADER.itemsize, shape=(count,)) \
+            if count else np.zeros(0, dtype=self.record)
+        self._mapped = count
+
+    def close(self) -> None:
+        """Flush appended vectors to disk and close the file."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        self._map = None
@@ -1,11 +1,49 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List
+from typing import Dict, Any, AsyncIterable, AsyncIterator, Iterable, Iterator, List, Optional, Tuple, Union
+import asyncio
+import email
+import email.policy
+import gc
 import json
+import os
+import unicodedata
 from datetime import datetime
+from signal.processors.checkpoint import CheckpointWriter, read_checkpoint
+
+_DONE = object()
+
+async def _iterate(items: Union[Iterable[Any], AsyncIterable[Any]]) -> AsyncIterator[Any]:
+    if hasattr(items, "__aiter__"):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+async def read_export(path: str, block_size: int = 1 << 20) -> AsyncIterator[Tuple[str, Any]]:
+    """Stream (section, record) pairs from an NDJSON export.
+
+    Each line is {"section": ..., "record": ...}. The file is read a block at
+    a time on a worker thread, so memory is bounded by block_size.
+    """
+    loop = asyncio.get_running_loop()
+    with open(path, encoding="utf-8") as export:
+        while True:
+            lines = await loop.run_in_executor(None, export.readlines, block_size)
+            if not lines:
+                return
+            for line in lines:
+                if line.strip():
+                    item = json.loads(line)
+                    yield item["section"], item["record"]
 
 class BaseProcessor(ABC):
     """Base class for all data processors in the Signal Layer."""
     
+    # Data type and the export sections process() and process_stream() emit
+    data_type = "base"
+    sections: Tuple[str, ...] = ()
+    
     def __init__(self, config: Dict[str, Any]):
         self.config = config
         self.processed_data = []
@@ -21,15 +59,144 @@ class BaseProcessor(ABC):
         """Validate the processed data."""
         pass
     
+    def process_record(self, section: str, record: Any) -> Optional[Any]:
+        """Process one raw record from an export section; None drops it."""
+        return record
+    
+    def section_records(self, raw_data: Dict[str, Any]) -> Iterator[Tuple[str, Any]]:
+        """(section, record) pairs of a raw export held in memory as {section: [records]}."""
+        for section in self.sections:
+            for record in raw_data.get(section, []):
+                yield section, record
+    
+    def process_records(self, records: Iterable[Tuple[str, Any]]) -> Dict[str, Any]:
+        """Process a batch of (section, record) pairs into one chunk."""
+        chunk = self._empty_chunk()
+        for section, record in records:
+            if section in self.sections:
+                processed = self.process_record(section, record)
+                if processed is not None:
+                    chunk[section].append(processed)
+        return chunk
+    
+    async def process_stream(self,
+                           records: Union[Iterable[Tuple[str, Any]], AsyncIterable[Tuple[str, Any]]],
+                           chunk_size: Optional[int] = None,
+                           buffer_size: Optional[int] = None,
+                           checkpoint: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Process a stream of (section, record) pairs into chunks of signals.
+        
+        Each chunk has the shape process() returns, holding up to chunk_size
+        records. At most buffer_size records are read ahead of the consumer;
+        beyond that the source is not pulled, so memory stays constant no
+        matter how large the export is. Streamed signals are not kept in
+        processed_data.
+        
+        With a checkpoint path, each chunk is appended to the checkpoint once
+        the consumer asks for the next one. Re-running with the same source
+        and checkpoint skips the source records already checkpointed, so an
+        interrupted ingest resumes after its last complete chunk.
+        """
+        chunk_size = chunk_size or self.config.get("stream_chunk_size", 1000)
+        buffer_size = buffer_size or self.config.get("stream_buffer_size", 10000)
+        # Records cross the queue in batches to keep per-record overhead low
+        queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, buffer_size // chunk_size))
+        failure: List[BaseException] = []
+        writer = CheckpointWriter(checkpoint) if checkpoint else None
+        skip = writer.state.get("consumed", 0) if writer else 0
+        if writer:
+            self.quality_scores.update(writer.state.get("quality_scores", {}))
+        
+        async def produce() -> None:
+            batch = []
+            skipped = 0
+            try:
+                async for item in _iterate(records):
+                    if skipped < skip:
+                        skipped += 1
+                        continue
+                    batch.append(item)
+                    if len(batch) >= chunk_size:
+                        await queue.put(batch)
+                        batch = []
+                if batch:
+                    await queue.put(batch)
+            except Exception as error:
+                failure.append(error)
+            await queue.put(_DONE)
+        
+        producer = asyncio.ensure_future(produce())
+        try:
+            chunk, count, consumed = self._empty_chunk(), 0, skip
+            while True:
+                batch = await queue.get()
+                if batch is _DONE:
+                    break
+                for section, record in batch:
+                    consumed += 1
+                    if section not in self.sections:
+                        continue
+                    processed = self.process_record(section, record)
+                    if processed is None:
+                        continue
+                    chunk[section].append(processed)
+                    count += 1
+                    if count >= chunk_size:
+                        yield chunk
+                        if writer:
+                            self._checkpoint_chunk(writer, chunk, consumed)
+                        chunk, count = self._empty_chunk(), 0
+            if failure:
+                raise failure[0]
+            if count:
+                yield chunk
+                if writer:
+                    self._checkpoint_chunk(writer, chunk, consumed)
+        finally:
+            producer.cancel()
+            if writer:
+                writer.close()
+    
+    def _checkpoint_chunk(self, writer: CheckpointWriter, chunk: Dict[str, Any], consumed: int) -> None:
+        records = [(section, record) for section in self.sections for record in chunk[section]]
+        writer.write_chunk(records, {"consumed": consumed, "quality_scores": self.quality_scores})
+    
+    def _empty_chunk(self) -> Dict[str, Any]:
+        return {"type": self.data_type, **{section: [] for section in self.sections}}
+    
     async def score_quality(self, data: Dict[str, Any]) -> float:
-        """Score the quality of the processed data."""
-        # Implement quality scoring logic
-        return 1.0
+        """Score the quality of the processed data.
+        
+        With a QualityScorer in config["quality_scorer"], returns the mean
+        score of the chunk's records and keeps per-component means in
+        quality_scores; otherwise, or if the scorer has no profile for the
+        chunk's type, every chunk scores 1.0.
+        """
+        scorer = self.config.get("quality_scorer")
+        if scorer is None or data.get("type") not in scorer.profiles:
+            return 1.0
+        section = data.get(scorer.profiles[data["type"]]["section"], [])
+        if not section:
+            return 0.0
+        components = scorer.components(data["type"], section)
+        self.quality_scores = {name: float(values.mean()) for name, values in components.items()}
+        return float(scorer.combine(components).mean())
     
     async def generate_embeddings(self, data: Dict[str, Any]) -> List[float]:
-        """Generate embeddings for the processed data."""
-        # Implement embedding generation logic
-        return []
+        """Generate embeddings for the processed data.
+        
+        Uses the EmbeddingService passed as config["embedding_service"], which
+        batches concurrent calls and skips content it has embedded before.
+        """
+        service = self.config.get("embedding_service")
+        if service is None:
+            return []
+        vector = await service.embed(self.embedding_text(data))
+        return vector.tolist()
+    
+    def embedding_text(self, data: Dict[str, Any]) -> str:
+        """Text that represents a record for embedding; canonical JSON by default."""
+        return json.dumps(data, sort_keys=True, default=str)
     
     def to_json(self) -> str:
         """Convert processed data to JSON."""
@@ -40,6 +207,37 @@ class BaseProcessor(ABC):
             "quality_scores": self.quality_scores
         })
     
+    def save_checkpoint(self, path: str, chunk_size: int = 10000) -> None:
+        """Write processed_data and quality_scores to a binary checkpoint in chunks."""
+        if os.path.exists(path):
+            os.remove(path)
+        writer = CheckpointWriter(path)
+        try:
+            for start in range(0, max(len(self.processed_data), 1), chunk_size):
+                writer.write_chunk(
+                    self.processed_data[start:start + chunk_size],
+                    {"processor": self.__class__.__name__, "quality_scores": self.quality_scores}
+                )
+        finally:
+            writer.close()
+    
+    @classmethod
+    def load_checkpoint(cls, path: str, config: Optional[Dict[str, Any]] = None) -> 'BaseProcessor':
+        """Create a processor instance from a checkpoint written by save_checkpoint."""
+        instance = cls(config or {})
+        # Decoded records hold no cycles; pausing the cyclic GC avoids
+        # rescanning the growing list on every allocation threshold
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            for records, state in read_checkpoint(path):
+                instance.processed_data.extend(records)
+                instance.quality_scores = state.get("quality_scores", {})
+        finally:
+            if collecting:
+                gc.enable()
+        return instance
+    
     @classmethod
     def from_json(cls, json_str: str) -> 'BaseProcessor':
         """Create a processor instance from JSON."""
@@ -49,34 +247,68 @@ class BaseProcessor(ABC):
         instance.quality_scores = data.get("quality_scores", {})
         return instance
 
+def _normalize_name(name: str) -> str:
+    """Fold a track or artist name for matching: NFKC, casefolded, single spaces."""
+    return " ".join(unicodedata.normalize("NFKC", name).casefold().split())
+
 class SpotifyProcessor(BaseProcessor):
     """Processor for Spotify data."""
     
+    data_type = "spotify"
+    sections = ("tracks", "artists", "playlists")
+    
+    def process_record(self, section: str, record: Any) -> Optional[Any]:
+        if section == "tracks" and isinstance(record, dict) and "name" in record:
+            return dict(
+                record,
+                normalized_name=_normalize_name(record["name"]),
+                normalized_artist=_normalize_name(record.get("artist", ""))
+            )
+        return record
+    
     async def process(self, raw_data: Dict[str, Any]) -> Dict[str, Any]:
-        # Implement Spotify-specific processing
-        return {
-            "type": "spotify",
-            "tracks": raw_data.get("tracks", []),
-            "artists": raw_data.get("artists", []),
-            "playlists": raw_data.get("playlists", [])
-        }
+        return self.process_records(self.section_records(raw_data))
     
     async def validate(self, data: Dict[str, Any]) -> bool:
         required_fields = ["type", "tracks", "artists", "playlists"]
         return all(field in data for field in required_fields)
 
+def _body_text(part: Any) -> str:
+    """Decoded text of a MIME part; an unknown or wrong charset decodes with replacement characters."""
+    try:
+        return part.get_content()
+    except (LookupError, UnicodeError):
+        payload = part.get_payload(decode=True) or b""
+        try:
+            return payload.decode(part.get_content_charset() or "utf-8", errors="replace")
+        except LookupError:
+            return payload.decode("utf-8", errors="replace")
+
 class GmailProcessor(BaseProcessor):
     """Processor for Gmail data."""
     
+    data_type = "gmail"
+    sections = ("emails", "contacts", "labels")
+    
+    def process_record(self, section: str, record: Any) -> Optional[Any]:
+        # Raw RFC 822 messages are decoded into headers and a text body
+        if section == "emails" and isinstance(record, dict) and "raw" in record:
+            message = email.message_from_string(record["raw"], policy=email.policy.default)
+            body = message.get_body(preferencelist=("plain", "html"))
+            return {
+                "id": record.get("id"),
+                "from": str(message["from"] or ""),
+                "to": str(message["to"] or ""),
+                "subject": str(message["subject"] or ""),
+                "date": str(message["date"] or ""),
+                "body": _body_text(body) if body is not None else "",
+                "labels": record.get("labels", [])
+            }
+        return record
+    
     async def process(self, raw_data: Dict[str, Any]) -> Dict[str, Any]:
-        # Implement Gmail-specific processing
-        return {
-            "type": "gmail",
-            "emails": raw_data.get("emails", []),
-            "contacts": raw_data.get("contacts", []),
-            "labels": raw_data.get("labels", [])
-        }
+        return self.process_records(self.section_records(raw_data))
     
     async def validate(self, data: Dict[str, Any]) -> bool:
         required_fields = ["type", "emails", "contacts", "labels"]
-        return all(field in data for field in required_fields) 
\ No newline at end of file
+        return all(field in data for field in required_fields)
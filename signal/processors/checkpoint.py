@@ -0,0 +1,113 @@
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+import json
+import mmap
+import os
+import struct
+import zlib
+
+# Frames are length-prefixed compact JSON, so reading a checkpoint only
+# ever decodes data, whoever wrote the file
+_CHECKPOINT_MAGIC = b"YCKP0002"
+# Frame header: kind, payload length, CRC32 of the payload
+_FRAME = struct.Struct("<BII")
+_RECORDS, _STATE = 1, 2
+
+_encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+def _encode(payload: Any) -> bytes:
+    return _encoder.encode(payload).encode("utf-8")
+
+def _scan_checkpoint(view: Any) -> Iterator[Tuple[int, int, int, int]]:
+    """Yield (kind, payload start, payload end, frame end) for each intact frame."""
+    if len(view) < len(_CHECKPOINT_MAGIC) and _CHECKPOINT_MAGIC.startswith(bytes(view)):
+        # Empty, or torn before the header was complete: no chunks yet
+        return
+    if bytes(view[:len(_CHECKPOINT_MAGIC)]) != _CHECKPOINT_MAGIC:
+        raise ValueError("Not a processor checkpoint")
+    offset = len(_CHECKPOINT_MAGIC)
+    while offset + _FRAME.size <= len(view):
+        kind, length, crc = _FRAME.unpack_from(view, offset)
+        start, end = offset + _FRAME.size, offset + _FRAME.size + length
+        if end > len(view) or zlib.crc32(view[start:end]) != crc:
+            # Torn write at the tail; everything before it is intact
+            return
+        yield kind, start, end, end
+        offset = end
+
+def read_checkpoint(path: str) -> Iterator[Tuple[List[Any], Dict[str, Any]]]:
+    """Lazily yield (records, state) for each chunk of a checkpoint.
+
+    The file is memory-mapped and each chunk is decoded only when reached.
+    An empty file is a checkpoint with no chunks.
+    """
+    with open(path, "rb") as checkpoint_file:
+        if os.fstat(checkpoint_file.fileno()).st_size == 0:
+            # mmap cannot map an empty file
+            return
+        # The memoryview is released before the map is closed, even on error
+        with mmap.mmap(checkpoint_file.fileno(), 0, access=mmap.ACCESS_READ) as view, \
+                memoryview(view) as frames:
+            records = None
+            for kind, start, end, _ in _scan_checkpoint(frames):
+                payload = json.loads(view[start:end])
+                if kind == _RECORDS:
+                    records = payload
+                elif kind == _STATE and records is not None:
+                    yield records, payload
+                    records = None
+
+class CheckpointWriter:
+    """Appends chunks of processed records to a binary checkpoint.
+
+    Each chunk is a records frame followed by a state frame, written
+    together; a chunk only counts once its state frame is on disk. Opening
+    an existing checkpoint drops any incomplete tail, so writing continues
+    after the last complete chunk and state holds that chunk's state.
+    Records and state must be JSON-serializable; tuples read back as lists.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.chunks = 0
+        self.records = 0
+        self.state: Dict[str, Any] = {}
+        end = len(_CHECKPOINT_MAGIC)
+        if os.path.exists(path) and os.path.getsize(path) >= end:
+            with open(path, "rb") as checkpoint_file, \
+                    mmap.mmap(checkpoint_file.fileno(), 0, access=mmap.ACCESS_READ) as view, \
+                    memoryview(view) as frames:
+                pending = 0
+                for kind, start, stop, frame_end in _scan_checkpoint(frames):
+                    if kind == _RECORDS:
+                        pending = 1
+                    elif kind == _STATE and pending:
+                        self.state = json.loads(view[start:stop])
+                        self.records = self.state.get("records", self.records)
+                        self.chunks += 1
+                        pending = 0
+                        end = frame_end
+            self._file = open(path, "r+b")
+            self._file.truncate(end)
+            self._file.seek(end)
+        else:
+            self._file = open(path, "wb")
+            self._file.write(_CHECKPOINT_MAGIC)
+
+    def write_chunk(self, records: List[Any], state: Optional[Dict[str, Any]] = None) -> None:
+        """Append one chunk of records with the state needed to resume after it."""
+        state = dict(state or {}, records=self.records + len(records))
+        frames = []
+        for kind, payload in ((_RECORDS, records), (_STATE, state)):
+            data = _encode(payload)
+            frames.append(_FRAME.pack(kind, len(data), zlib.crc32(data)))
+            frames.append(data)
+        self._file.write(b"".join(frames))
+        self._file.flush()
+        self.records, self.state = state["records"], state
+        self.chunks += 1
+
+    def close(self) -> None:
+        """Flush the checkpoint to disk and close it."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
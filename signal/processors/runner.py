@@ -0,0 +1,162 @@
+from typing import Dict, Any, AsyncIterable, AsyncIterator, Callable, Iterable, List, Optional, Tuple, Type, Union
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import hashlib
+import json
+import os
+import pickle
+from signal.processors.base import BaseProcessor, GmailProcessor, SpotifyProcessor
+
+async def _iterate(items: Union[Iterable[Any], AsyncIterable[Any]]) -> AsyncIterator[Any]:
+    if hasattr(items, "__aiter__"):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+PROCESSORS: Dict[str, Type[BaseProcessor]] = {}
+
+def register_processor(processor_class: Type[BaseProcessor]) -> Type[BaseProcessor]:
+    """Register a processor class under its data_type; usable as a decorator."""
+    PROCESSORS[processor_class.data_type] = processor_class
+    return processor_class
+
+def get_processor(data_type: str, config: Optional[Dict[str, Any]] = None) -> BaseProcessor:
+    """Create the registered processor for a data type."""
+    if data_type not in PROCESSORS:
+        raise ValueError(f"No processor registered for {data_type}")
+    return PROCESSORS[data_type](config or {})
+
+register_processor(SpotifyProcessor)
+register_processor(GmailProcessor)
+
+# Config entries only used on processed chunks, which workers never score or embed
+_SERVICE_KEYS = ("embedding_service", "quality_scorer")
+
+def _runner_config(data_type: str, config: Optional[Dict[str, Any]]) -> Tuple[Dict[str, Any], str]:
+    """Return the config sent to workers and the key they cache its processor under."""
+    config = {name: value for name, value in (config or {}).items() if name not in _SERVICE_KEYS}
+    get_processor(data_type)
+    digest = hashlib.blake2b(pickle.dumps(config, protocol=pickle.HIGHEST_PROTOCOL), digest_size=16).hexdigest()
+    return config, f"{data_type}:{digest}"
+
+# Processors built inside pool workers, reused across shards
+_worker_processors: Dict[str, BaseProcessor] = {}
+
+def _worker_processor(data_type: str, config: Dict[str, Any], key: str) -> BaseProcessor:
+    if key not in _worker_processors:
+        _worker_processors[key] = get_processor(data_type, config)
+    return _worker_processors[key]
+
+def _process_shard(data_type: str, config: Dict[str, Any], key: str, shard: List[Tuple[str, Any]]) -> Dict[str, Any]:
+    return _worker_processor(data_type, config, key).process_records(shard)
+
+def _process_export_range(data_type: str,
+                          config: Dict[str, Any],
+                          key: str,
+                          path: str,
+                          start: int,
+                          end: int) -> Dict[str, Any]:
+    with open(path, "rb") as export:
+        export.seek(start)
+        lines = export.read(end - start).splitlines()
+    # Blank lines are skipped, as read_export does
+    items = map(json.loads, (line for line in lines if line.strip()))
+    records = ((item["section"], item["record"]) for item in items)
+    return _worker_processor(data_type, config, key).process_records(records)
+
+def _export_ranges(path: str, shard_bytes: int) -> List[Tuple[int, int]]:
+    """Split an NDJSON file into byte ranges that start and end on line breaks."""
+    size = os.path.getsize(path)
+    ranges, start = [], 0
+    with open(path, "rb") as export:
+        while start < size:
+            export.seek(min(start + shard_bytes, size))
+            export.readline()
+            end = min(export.tell(), size)
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+class ProcessorRunner:
+    """Runs registered processors over large inputs on a process pool.
+
+    Inputs are split into shards that are processed in parallel, with at
+    most max_in_flight shards outstanding; chunks come back in input order.
+    run_export lets workers read their own byte range of an export file, so
+    the raw data is never pickled, only the processed chunks. Workers only
+    run process_records: embedding_service and quality_scorer are left out
+    of the config pickled to them, so score and embed the returned chunks
+    in the calling process.
+    """
+
+    def __init__(self,
+                 max_workers: Optional[int] = None,
+                 max_in_flight: Optional[int] = None,
+                 shard_size: int = 1000,
+                 shard_bytes: int = 16 << 20,
+                 mp_context: Any = None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_in_flight = max_in_flight or 2 * self.max_workers
+        self.shard_size = shard_size
+        self.shard_bytes = shard_bytes
+        self.mp_context = mp_context
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    async def run(self,
+                data_type: str,
+                records: Union[Iterable[Tuple[str, Any]], AsyncIterable[Tuple[str, Any]]],
+                config: Optional[Dict[str, Any]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Process (section, record) pairs in shards of shard_size, yielding one chunk per shard."""
+        config, key = _runner_config(data_type, config)
+
+        async def jobs() -> AsyncIterator[Tuple[Callable[..., Any], ...]]:
+            shard = []
+            async for item in _iterate(records):
+                shard.append(item)
+                if len(shard) >= self.shard_size:
+                    yield (_process_shard, data_type, config, key, shard)
+                    shard = []
+            if shard:
+                yield (_process_shard, data_type, config, key, shard)
+
+        async for chunk in self._ordered(jobs()):
+            yield chunk
+
+    async def run_export(self,
+                       data_type: str,
+                       path: str,
+                       config: Optional[Dict[str, Any]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Process an NDJSON export, yielding one chunk per shard_bytes of input."""
+        config, key = _runner_config(data_type, config)
+        path = os.path.abspath(path)
+        jobs = [
+            (_process_export_range, data_type, config, key, path, start, end)
+            for start, end in _export_ranges(path, self.shard_bytes)
+        ]
+        async for chunk in self._ordered(jobs):
+            yield chunk
+
+    async def _ordered(self, jobs: Union[Iterable[Tuple], AsyncIterable[Tuple]]) -> AsyncIterator[Dict[str, Any]]:
+        loop = asyncio.get_running_loop()
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=self.mp_context)
+        in_flight: deque = deque()
+        try:
+            async for job in _iterate(jobs):
+                if len(in_flight) >= self.max_in_flight:
+                    yield await in_flight.popleft()
+                in_flight.append(loop.run_in_executor(self._executor, *job))
+            while in_flight:
+                yield await in_flight.popleft()
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+    def close(self) -> None:
+        """Shut down the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
@@ -0,0 +1,100 @@
+-- Per-user, per-data-type, per-day dividend totals, maintained on insert
+CREATE TABLE dividend_rollups (
+    user_id UUID REFERENCES users(id),
+    data_type TEXT NOT NULL,
+    day DATE NOT NULL, -- UTC day of calculated_at
+    total FLOAT NOT NULL DEFAULT 0,
+    calculations INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (user_id, data_type, day)
+);
+
+CREATE INDEX idx_dividend_rollups_user_day ON dividend_rollups(user_id, day);
+CREATE INDEX idx_dividend_calculations_user_calculated_at ON dividend_calculations(user_id, calculated_at);
+
+-- Statement-level so a bulk insert updates each (user, type, day) once.
+-- dividend_calculations is append-only; updates and deletes are not rolled up.
+CREATE OR REPLACE FUNCTION rollup_dividend_calculations()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public, pg_temp
+AS $$
+BEGIN
+    INSERT INTO dividend_rollups (user_id, data_type, day, total, calculations)
+    SELECT
+        user_id,
+        data_type,
+        (calculated_at AT TIME ZONE 'UTC')::DATE,
+        SUM(dividend),
+        COUNT(*)
+    FROM new_calculations
+    GROUP BY 1, 2, 3
+    ON CONFLICT (user_id, data_type, day) DO UPDATE
+    SET total = dividend_rollups.total + EXCLUDED.total,
+        calculations = dividend_rollups.calculations + EXCLUDED.calculations,
+        updated_at = NOW();
+    RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER dividend_calculations_rollup
+    AFTER INSERT ON dividend_calculations
+    REFERENCING NEW TABLE AS new_calculations
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION rollup_dividend_calculations();
+
+-- Backfill rollups for existing history
+INSERT INTO dividend_rollups (user_id, data_type, day, total, calculations)
+SELECT user_id, data_type, (calculated_at AT TIME ZONE 'UTC')::DATE, SUM(dividend), COUNT(*)
+FROM dividend_calculations
+GROUP BY 1, 2, 3;
+
+-- Totals by data type over whole days [p_first_day, p_last_day] (NULL = unbounded)
+CREATE OR REPLACE FUNCTION sum_dividend_rollups(
+    p_user_id UUID,
+    p_first_day DATE,
+    p_last_day DATE
+)
+RETURNS TABLE (
+    data_type TEXT,
+    total FLOAT
+)
+LANGUAGE sql STABLE
+AS $$
+    SELECT dividend_rollups.data_type, SUM(dividend_rollups.total)
+    FROM dividend_rollups
+    WHERE dividend_rollups.user_id = p_user_id
+    AND (p_first_day IS NULL OR dividend_rollups.day >= p_first_day)
+    AND (p_last_day IS NULL OR dividend_rollups.day <= p_last_day)
+    GROUP BY dividend_rollups.data_type;
+$$;
+
+-- Totals by data type from raw rows in [p_start, p_end) or [p_start, p_end] (NULL = unbounded)
+CREATE OR REPLACE FUNCTION sum_dividend_calculations(
+    p_user_id UUID,
+    p_start TIMESTAMPTZ,
+    p_end TIMESTAMPTZ,
+    p_end_inclusive BOOLEAN DEFAULT TRUE
+)
+RETURNS TABLE (
+    data_type TEXT,
+    total FLOAT
+)
+LANGUAGE sql STABLE
+AS $$
+    SELECT dividend_calculations.data_type, SUM(dividend_calculations.dividend)
+    FROM dividend_calculations
+    WHERE dividend_calculations.user_id = p_user_id
+    AND (p_start IS NULL OR dividend_calculations.calculated_at >= p_start)
+    AND (p_end IS NULL
+         OR dividend_calculations.calculated_at < p_end
+         OR (p_end_inclusive AND dividend_calculations.calculated_at = p_end))
+    GROUP BY dividend_calculations.data_type;
+$$;
+
+ALTER TABLE dividend_rollups ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view their own dividend rollups"
+    ON dividend_rollups FOR SELECT
+    USING (auth.uid() = user_id);
@@ -0,0 +1,117 @@
+-- A provider transaction settles exactly one payout
+CREATE UNIQUE INDEX idx_payouts_transaction_id ON payouts(transaction_id) WHERE transaction_id IS NOT NULL;
+
+-- Earnings period a batch-created payout covers; one payout per user and period.
+-- NULL for payouts created one at a time, which never conflict.
+ALTER TABLE payouts ADD COLUMN period TEXT;
+CREATE UNIQUE INDEX idx_payouts_user_period ON payouts(user_id, period);
+
+-- sum_dividend_rollups and sum_dividend_calculations for many users at once,
+-- keyed by the user ids as given
+CREATE OR REPLACE FUNCTION sum_dividend_rollups_by_user(
+    p_user_ids TEXT[],
+    p_first_day DATE,
+    p_last_day DATE
+)
+RETURNS TABLE (
+    user_id TEXT,
+    data_type TEXT,
+    total FLOAT
+)
+LANGUAGE sql STABLE
+AS $$
+    SELECT ids.user_id, dividend_rollups.data_type, SUM(dividend_rollups.total)
+    FROM unnest(p_user_ids) AS ids(user_id)
+    JOIN dividend_rollups ON dividend_rollups.user_id = ids.user_id::UUID
+    WHERE (p_first_day IS NULL OR dividend_rollups.day >= p_first_day)
+    AND (p_last_day IS NULL OR dividend_rollups.day <= p_last_day)
+    GROUP BY ids.user_id, dividend_rollups.data_type;
+$$;
+
+CREATE OR REPLACE FUNCTION sum_dividend_calculations_by_user(
+    p_user_ids TEXT[],
+    p_start TIMESTAMPTZ,
+    p_end TIMESTAMPTZ,
+    p_end_inclusive BOOLEAN DEFAULT TRUE
+)
+RETURNS TABLE (
+    user_id TEXT,
+    data_type TEXT,
+    total FLOAT
+)
+LANGUAGE sql STABLE
+AS $$
+    SELECT ids.user_id, dividend_calculations.data_type, SUM(dividend_calculations.dividend)
+    FROM unnest(p_user_ids) AS ids(user_id)
+    JOIN dividend_calculations ON dividend_calculations.user_id = ids.user_id::UUID
+    WHERE (p_start IS NULL OR dividend_calculations.calculated_at >= p_start)
+    AND (p_end IS NULL
+         OR dividend_calculations.calculated_at < p_end
+         OR (p_end_inclusive AND dividend_calculations.calculated_at = p_end))
+    GROUP BY ids.user_id, dividend_calculations.data_type;
+$$;
+
+-- Order of payout states (NULL for unknown ones); completed and failed are final
+CREATE OR REPLACE FUNCTION payout_status_rank(p_status TEXT)
+RETURNS INTEGER
+LANGUAGE sql IMMUTABLE
+AS $$
+    SELECT CASE p_status
+        WHEN 'pending' THEN 0
+        WHEN 'processing' THEN 1
+        WHEN 'completed' THEN 2
+        WHEN 'failed' THEN 2
+    END;
+$$;
+
+-- Apply a batch of [{payout_id, status, transaction_id}] and return the number
+-- of payouts that changed. A payout only moves to a later status, or keeps its
+-- status and gains a transaction_id; settlements already applied are skipped
+-- without a write, so replays are no-ops. A payout's transaction_id is set
+-- once and never replaced. A batch with an unknown status, or with a
+-- transaction_id that differs from the one its payout already has, is
+-- rejected as a whole (invalid_parameter_value).
+CREATE OR REPLACE FUNCTION apply_payout_settlements(p_settlements JSONB)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    applied INTEGER;
+    unknown TEXT;
+    mismatch RECORD;
+BEGIN
+    SELECT settlements.status INTO unknown
+    FROM jsonb_to_recordset(p_settlements) AS settlements(status TEXT)
+    WHERE payout_status_rank(settlements.status) IS NULL
+    LIMIT 1;
+    IF FOUND THEN
+        RAISE EXCEPTION 'Unknown payout status %', COALESCE(unknown, 'null')
+            USING ERRCODE = 'invalid_parameter_value';
+    END IF;
+
+    SELECT payouts.id, payouts.transaction_id AS current, settlements.transaction_id AS given
+    INTO mismatch
+    FROM jsonb_to_recordset(p_settlements) AS settlements(payout_id UUID, transaction_id TEXT)
+    JOIN payouts ON payouts.id = settlements.payout_id
+    WHERE payouts.transaction_id <> settlements.transaction_id
+    LIMIT 1;
+    IF FOUND THEN
+        RAISE EXCEPTION 'Payout % already has transaction %, not %', mismatch.id, mismatch.current, mismatch.given
+            USING ERRCODE = 'invalid_parameter_value';
+    END IF;
+
+    UPDATE payouts
+    SET status = settlements.status,
+        transaction_id = COALESCE(payouts.transaction_id, settlements.transaction_id),
+        updated_at = NOW()
+    FROM jsonb_to_recordset(p_settlements) AS settlements(payout_id UUID, status TEXT, transaction_id TEXT)
+    WHERE payouts.id = settlements.payout_id
+    AND (payouts.status IS DISTINCT FROM settlements.status
+         OR (payouts.transaction_id IS NULL AND settlements.transaction_id IS NOT NULL))
+    AND (settlements.status = payouts.status
+         OR payout_status_rank(settlements.status) > payout_status_rank(payouts.status));
+
+    GET DIAGNOSTICS applied = ROW_COUNT;
+    RETURN applied;
+END;
+$$;
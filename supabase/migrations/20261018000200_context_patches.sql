@@ -0,0 +1,65 @@
+-- JSON merge patch (RFC 7386): objects merge recursively, null removes a key,
+-- anything else replaces the target value
+CREATE OR REPLACE FUNCTION jsonb_merge_patch(target JSONB, patch JSONB)
+RETURNS JSONB
+LANGUAGE plpgsql IMMUTABLE
+AS $$
+DECLARE
+    result JSONB;
+    item RECORD;
+BEGIN
+    IF patch IS NULL OR jsonb_typeof(patch) <> 'object' THEN
+        RETURN patch;
+    END IF;
+    IF target IS NULL OR jsonb_typeof(target) <> 'object' THEN
+        result := '{}'::JSONB;
+    ELSE
+        result := target;
+    END IF;
+    FOR item IN SELECT key, value FROM jsonb_each(patch) LOOP
+        IF jsonb_typeof(item.value) = 'null' THEN
+            result := result - item.key;
+        ELSE
+            result := jsonb_set(result, ARRAY[item.key], jsonb_merge_patch(result -> item.key, item.value));
+        END IF;
+    END LOOP;
+    RETURN result;
+END;
+$$;
+
+-- Patch a context's data and metadata in place. With p_expected_updated_at
+-- the patch only applies if the context has not changed since; conflict is
+-- true when it has. No row is returned if the context does not exist.
+CREATE OR REPLACE FUNCTION patch_context(
+    p_context_id UUID,
+    p_data_patch JSONB,
+    p_metadata_patch JSONB,
+    p_expected_updated_at TIMESTAMPTZ,
+    p_updated_at TIMESTAMPTZ
+)
+RETURNS TABLE (
+    updated_at TIMESTAMPTZ,
+    conflict BOOLEAN
+)
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    RETURN QUERY
+    UPDATE contexts
+    SET data = CASE WHEN p_data_patch IS NULL THEN contexts.data
+                    ELSE jsonb_merge_patch(contexts.data, p_data_patch) END,
+        metadata = CASE WHEN p_metadata_patch IS NULL THEN contexts.metadata
+                        ELSE jsonb_merge_patch(contexts.metadata, p_metadata_patch) END,
+        updated_at = p_updated_at
+    WHERE contexts.id = p_context_id
+    AND (p_expected_updated_at IS NULL OR contexts.updated_at = p_expected_updated_at)
+    RETURNING contexts.updated_at, FALSE;
+
+    IF NOT FOUND THEN
+        RETURN QUERY
+        SELECT contexts.updated_at, TRUE
+        FROM contexts
+        WHERE contexts.id = p_context_id;
+    END IF;
+END;
+$$;
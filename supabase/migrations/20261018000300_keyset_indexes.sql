@@ -0,0 +1,11 @@
+-- Keyset pagination: list queries filter on user_id and seek on
+-- (created_at, id) newest first, so each page is an index range scan
+-- instead of skipping OFFSET rows
+CREATE INDEX IF NOT EXISTS idx_vault_entries_user_keyset
+    ON vault_entries(user_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_echo_memories_user_keyset
+    ON echo_memories(user_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_contexts_user_keyset
+    ON contexts(user_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_payouts_user_keyset
+    ON payouts(user_id, created_at DESC, id DESC);
@@ -0,0 +1,193 @@
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Mapping, Optional
+import asyncio
+import os
+from vault.backend.data_access import DataAccess, canonical_id, is_data_error
+from vault.backend.query_metrics import caller_module
+
+def _retrieve(future: asyncio.Future) -> None:
+    # Mark an error as seen so callers that all went away don't trigger "never retrieved"
+    if not future.cancelled():
+        future.exception()
+
+class SingleFlight:
+    """Runs one call per key at a time; concurrent callers with the same key share it.
+
+    The key is released as soon as the call finishes, so a result is never
+    served to callers that arrive afterwards. A caller being cancelled does
+    not cancel the call for the others.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Return func()'s result, joining a call already in flight for key."""
+        call = self._calls.get(key)
+        if call is None:
+            call = self._calls[key] = asyncio.ensure_future(func())
+            self.calls += 1
+            call.add_done_callback(lambda done: self._release(key, done))
+        else:
+            self.shared += 1
+        return await asyncio.shield(call)
+
+    def forget(self, key: Hashable) -> None:
+        """Stop sharing the call in flight for key, e.g. after a write to it."""
+        self._calls.pop(key, None)
+
+    def _release(self, key: Hashable, call: asyncio.Future) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        _retrieve(call)
+
+class BatchLoader:
+    """Folds loads of distinct keys requested in the same loop tick into one call.
+
+    load_many receives up to max_batch keys and returns a mapping of the keys
+    it found; missing keys load as None, and a key mapped to an exception
+    raises it to that key's callers only. A key already in flight is joined
+    rather than loaded again, and released when its batch finishes.
+    """
+
+    def __init__(self,
+                 load_many: Callable[[List[Hashable]], Awaitable[Mapping[Hashable, Any]]],
+                 max_batch: int = 200):
+        self.load_many = load_many
+        self.max_batch = max_batch
+        self._pending: Dict[Hashable, asyncio.Future] = {}
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self._scheduled = False
+        self._batches: set = set()
+        self.loads = 0
+        self.shared = 0
+        self.batches = 0
+
+    async def load(self, key: Hashable) -> Any:
+        """Return the value for key, or None if load_many did not find it."""
+        self.loads += 1
+        future = self._pending.get(key) or self._in_flight.get(key)
+        if future is not None:
+            self.shared += 1
+            return await asyncio.shield(future)
+        loop = asyncio.get_running_loop()
+        future = self._pending[key] = loop.create_future()
+        if len(self._pending) >= self.max_batch:
+            self._dispatch()
+        elif not self._scheduled:
+            self._scheduled = True
+            loop.call_soon(self._dispatch)
+        return await asyncio.shield(future)
+
+    def forget(self, key: Hashable) -> None:
+        """Stop sharing the load in flight for key, e.g. after a write to it."""
+        self._in_flight.pop(key, None)
+
+    def _dispatch(self) -> None:
+        self._scheduled = False
+        batch, self._pending = self._pending, {}
+        if batch:
+            self._in_flight.update(batch)
+            task = asyncio.ensure_future(self._run(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _run(self, batch: Dict[Hashable, asyncio.Future]) -> None:
+        self.batches += 1
+        try:
+            found = await self.load_many(list(batch))
+        except BaseException as error:
+            for future in batch.values():
+                if isinstance(error, asyncio.CancelledError):
+                    future.cancel()
+                else:
+                    future.set_exception(error)
+                    _retrieve(future)
+            if isinstance(error, asyncio.CancelledError):
+                raise
+        else:
+            for key, future in batch.items():
+                value = found.get(key)
+                if isinstance(value, BaseException):
+                    future.set_exception(value)
+                    _retrieve(future)
+                else:
+                    future.set_result(value)
+        finally:
+            for key, future in batch.items():
+                if self._in_flight.get(key) is future:
+                    del self._in_flight[key]
+
+class RowLoader:
+    """Coalesced single-row lookups by a unique column.
+
+    mode is "batch" (distinct keys requested in the same tick share one in_
+    query), "single" (one query per distinct key in flight) or "off". Every
+    caller gets its own shallow copy of the row, or None if it doesn't exist.
+    UUID keys are normalized to the form the store returns, so an uppercase
+    or unhyphenated id finds its row and shares lookups with the canonical
+    one. If the store rejects a batch's query (say one key is not a valid UUID),
+    each key is looked up on its own so only the bad key fails.
+    """
+
+    def __init__(self,
+                 data_access: DataAccess,
+                 table: str,
+                 column: str = "id",
+                 mode: Optional[str] = None,
+                 max_batch: Optional[int] = None):
+        self.db = data_access
+        self.table = table
+        self.column = column
+        # Queries are attributed to the module that owns the loader
+        self.module = caller_module()
+        self.mode = mode or os.getenv("DATA_ACCESS_COALESCE", "batch")
+        if self.mode not in ("batch", "single", "off"):
+            raise ValueError(f"Unknown coalescing mode {self.mode}")
+        self._flight = SingleFlight()
+        self._batch = BatchLoader(
+            self._fetch_many,
+            max_batch or int(os.getenv("DATA_ACCESS_COALESCE_BATCH", "200"))
+        )
+
+    async def get(self, key: Any) -> Optional[Dict[str, Any]]:
+        """Return the row whose column equals key, or None."""
+        key = canonical_id(key)
+        if self.mode == "batch":
+            row = await self._batch.load(key)
+        elif self.mode == "single":
+            row = await self._flight.do(key, lambda: self._fetch_one(key))
+        else:
+            row = await self._fetch_one(key)
+        return dict(row) if row is not None else None
+
+    def forget(self, key: Any) -> None:
+        """Make later lookups of key re-read it; call after writing the row."""
+        key = canonical_id(key)
+        self._flight.forget(key)
+        self._batch.forget(key)
+
+    async def _fetch_one(self, key: Any) -> Optional[Dict[str, Any]]:
+        result = await self.db.table(self.table, module=self.module).select("*").eq(self.column, key).execute()
+        return result.data[0] if result.data else None
+
+    async def _fetch_many(self, keys: List[Any]) -> Dict[Any, Dict[str, Any]]:
+        if len(keys) == 1:
+            row = await self._fetch_one(keys[0])
+            return {keys[0]: row} if row is not None else {}
+        try:
+            result = await self.db.table(self.table, module=self.module).select("*").in_(self.column, keys).execute()
+        except Exception as error:
+            if not is_data_error(error):
+                raise
+            rows = await asyncio.gather(*(self._fetch_one(key) for key in keys), return_exceptions=True)
+            return {key: row for key, row in zip(keys, rows) if row is not None}
+        return {canonical_id(row[self.column]): row for row in result.data}
+
+    def stats(self) -> Dict[str, Any]:
+        """Return query and sharing counters for the active mode."""
+        if self.mode == "batch":
+            return {"mode": "batch", "lookups": self._batch.loads, "shared": self._batch.shared,
+                    "queries": self._batch.batches}
+        return {"mode": self.mode, "shared": self._flight.shared, "queries": self._flight.calls}
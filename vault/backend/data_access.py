@@ -0,0 +1,287 @@
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import asyncio
+import base64
+import json
+import os
+import time
+import uuid
+from supabase import create_client, Client
+from dotenv import load_dotenv
+from vault.backend.query_metrics import QueryMetrics, caller_module, payload_size
+
+load_dotenv()
+
+def _parse_table_timeouts(spec: Optional[str]) -> Dict[str, float]:
+    """Parse "table=seconds,table=seconds" into a timeout map."""
+    timeouts = {}
+    for item in (spec or "").split(","):
+        if "=" in item:
+            table, seconds = item.split("=", 1)
+            timeouts[table.strip()] = float(seconds)
+    return timeouts
+
+class QueryTimeout(asyncio.TimeoutError):
+    """A query outlived its timeout.
+
+    Only the await is abandoned; the worker thread still finishes the HTTP
+    call, so a timed-out write may have been applied. Treat its outcome as
+    unknown: retry only writes that are idempotent.
+    """
+
+def is_data_error(error: BaseException) -> bool:
+    """Whether the store rejected the request's data rather than failing to serve it.
+
+    True for PostgREST request errors (PGRST1xx) and Postgres data exceptions
+    and constraint violations (SQLSTATE classes 22 and 23), which fail the
+    same way on retry. Timeouts, connection errors and server faults are
+    transient and return False.
+    """
+    code = str(getattr(error, "code", None) or "")
+    return code.startswith(("22", "23", "PGRST1"))
+
+_OPERATIONS = frozenset(("select", "insert", "upsert", "update", "delete"))
+_WRITES = frozenset(("insert", "upsert", "update"))
+
+class Query:
+    """Awaitable wrapper around a supabase query builder.
+
+    Builder methods chain exactly as on the supabase client; only execute()
+    differs, running the blocking HTTP call on the shared executor and
+    recording it in the DataAccess metrics.
+    """
+
+    __slots__ = ("_data_access", "_builder", "table", "module", "operation", "_payload")
+
+    def __init__(self,
+                 data_access: "DataAccess",
+                 builder: Any,
+                 table: str,
+                 module: str = "?",
+                 operation: str = "select",
+                 payload: Any = None):
+        self._data_access = data_access
+        self._builder = builder
+        self.table = table
+        self.module = module
+        self.operation = operation
+        self._payload = payload
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._builder, name)
+        if callable(attr):
+            def chain(*args, **kwargs):
+                return self._wrap(attr(*args, **kwargs), name, args)
+            return chain
+        return self._wrap(attr)
+
+    def _wrap(self, value: Any, name: Optional[str] = None, args: tuple = ()) -> Any:
+        if hasattr(value, "execute"):
+            if name in _OPERATIONS:
+                payload = args[0] if args and name in _WRITES else None
+                return Query(self._data_access, value, self.table, self.module, name, payload)
+            return Query(self._data_access, value, self.table, self.module, self.operation, self._payload)
+        return value
+
+    async def execute(self) -> Any:
+        """Execute the query without blocking the event loop."""
+        metrics = self._data_access.metrics
+        if metrics is None:
+            return await self._data_access.run(self._builder.execute, self.table)
+
+        execute, payload = self._builder.execute, self._payload
+        sized = payload is not None and metrics.record_payload_bytes
+
+        def call() -> Tuple[Any, float, Optional[int]]:
+            # Sized on the worker thread, after the request and outside its timing
+            result = execute()
+            finished = time.perf_counter()
+            return result, finished, payload_size(payload) if sized else None
+
+        began = time.perf_counter()
+        try:
+            result, finished, size = await self._data_access.run(call, self.table)
+        except asyncio.CancelledError:
+            raise
+        except BaseException as error:
+            metrics.observe(self.module, self.table, self.operation, time.perf_counter() - began, error=error)
+            raise
+        data = getattr(result, "data", None)
+        metrics.observe(self.module, self.table, self.operation, finished - began,
+                        len(data) if isinstance(data, list) else 0, size)
+        return result
+
+class DataAccess:
+    """Shared supabase client with awaitable, bounded and time-limited queries."""
+
+    def __init__(self,
+                 client: Optional[Client] = None,
+                 max_concurrency: Optional[int] = None,
+                 default_timeout: Optional[float] = None,
+                 table_timeouts: Optional[Dict[str, float]] = None,
+                 metrics: Optional[QueryMetrics] = None):
+        self.client = client if client is not None else create_client(
+            os.getenv("SUPABASE_URL"),
+            os.getenv("SUPABASE_KEY")
+        )
+        self.max_concurrency = max_concurrency or int(os.getenv("DATA_ACCESS_MAX_CONCURRENCY", "16"))
+        self.default_timeout = default_timeout or float(os.getenv("DATA_ACCESS_TIMEOUT", "10"))
+        self.table_timeouts = table_timeouts if table_timeouts is not None \
+            else _parse_table_timeouts(os.getenv("DATA_ACCESS_TABLE_TIMEOUTS"))
+        # Per (module, table, operation) query metrics, off unless DATA_ACCESS_METRICS=1
+        self.metrics = metrics if metrics is not None else \
+            QueryMetrics() if os.getenv("DATA_ACCESS_METRICS", "0") == "1" else None
+        # The worker count is the concurrency limit for in-flight queries
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency,
+            thread_name_prefix="data-access"
+        )
+
+    def table(self, name: str, module: Optional[str] = None) -> Query:
+        """Start a query against a table; metrics attribute it to module (default: the caller's).
+
+        Finding the caller reads its stack frame on every call; owners that
+        query repeatedly hold a for_module() view instead.
+        """
+        return Query(self, self.client.table(name), name, module or caller_module())
+
+    def rpc(self, fn: str, params: Optional[Dict[str, Any]] = None, module: Optional[str] = None) -> Query:
+        """Start a call to a database function."""
+        params = params or {}
+        return Query(self, self.client.rpc(fn, params), fn, module or caller_module(), "rpc", params)
+
+    def for_module(self, module: Optional[str] = None) -> "ModuleDataAccess":
+        """This DataAccess with queries attributed to module (default: the caller's), resolved once."""
+        return ModuleDataAccess(self, module or caller_module())
+
+    async def run(self, func: Callable[[], Any], table: str) -> Any:
+        """Run a blocking call on the executor with the table's timeout.
+
+        Raises QueryTimeout when the timeout passes. The call itself cannot be
+        interrupted and keeps running on its worker thread, so a write that
+        timed out may still commit.
+        """
+        timeout = self.table_timeouts.get(table, self.default_timeout)
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, func)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError as error:
+            if future.done() and not future.cancelled():
+                # Raised by the call itself, not by wait_for
+                raise
+            raise QueryTimeout(f"Query on {table} timed out after {timeout}s") from error
+
+    def close(self) -> None:
+        """Wait for in-flight queries and release the worker threads."""
+        self._executor.shutdown(wait=True)
+
+    async def aclose(self) -> None:
+        """close() without blocking the event loop, for async shutdown handlers."""
+        await asyncio.to_thread(self._executor.shutdown, True)
+
+class ModuleDataAccess:
+    """A DataAccess whose queries are attributed to one module.
+
+    Everything other than table() and rpc() is the shared DataAccess's.
+    """
+
+    __slots__ = ("data_access", "module")
+
+    def __init__(self, data_access: DataAccess, module: str):
+        self.data_access = data_access
+        self.module = module
+
+    def table(self, name: str, module: Optional[str] = None) -> Query:
+        return self.data_access.table(name, module or self.module)
+
+    def rpc(self, fn: str, params: Optional[Dict[str, Any]] = None, module: Optional[str] = None) -> Query:
+        return self.data_access.rpc(fn, params, module or self.module)
+
+    def for_module(self, module: Optional[str] = None) -> "ModuleDataAccess":
+        return ModuleDataAccess(self.data_access, module or caller_module())
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.data_access, name)
+
+_data_access: Optional[DataAccess] = None
+
+def get_data_access() -> DataAccess:
+    """Return the process-wide DataAccess, creating it on first use."""
+    global _data_access
+    if _data_access is None:
+        _data_access = DataAccess()
+    return _data_access
+
+def parse_timestamp(value: str) -> datetime:
+    """Parse a Supabase timestamp into a naive UTC datetime."""
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def canonical_id(value: Any) -> Any:
+    """Lowercase hyphenated form of a UUID, as the database returns it; other values as given."""
+    try:
+        return str(uuid.UUID(str(value)))
+    except ValueError:
+        return value
+
+def encode_cursor(row: Dict[str, Any]) -> str:
+    """Opaque keyset cursor pointing just past row, from its created_at and id."""
+    raw = json.dumps([row["created_at"], row["id"]], default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Return the (created_at, id) a cursor points past."""
+    try:
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError) as error:
+        raise ValueError("Invalid cursor") from error
+    return str(created_at), str(row_id)
+
+def _quote(value: str) -> str:
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+def keyset_page(query: Query, limit: int, cursor: Optional[str] = None, desc: bool = True) -> Query:
+    """Order a query by (created_at, id) and continue after cursor.
+
+    Unlike range(offset, ...), the database seeks straight to the cursor on
+    the (created_at, id) index, so every page costs the same.
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        op = "lt" if desc else "gt"
+        query = query.or_(
+            f"created_at.{op}.{_quote(created_at)},"
+            f"and(created_at.eq.{_quote(created_at)},id.{op}.{_quote(row_id)})"
+        )
+    return query.order("created_at", desc=desc).order("id", desc=desc).limit(limit)
+
+def next_cursor(rows: List[Dict[str, Any]], limit: int) -> Optional[str]:
+    """Cursor for the page after rows, or None if rows was the last page."""
+    return encode_cursor(rows[-1]) if rows and len(rows) >= limit else None
+
+async def iter_keyset(build_query: Callable[[], Query],
+                      page_size: int = 1000,
+                      desc: bool = True) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Yield every row of a query page by page.
+
+    The next page is fetched while the caller handles the current one, so at
+    most two pages are held at a time.
+    """
+    def fetch(cursor: Optional[str]) -> "asyncio.Future":
+        return asyncio.ensure_future(keyset_page(build_query(), page_size, cursor, desc).execute())
+
+    pending: Optional[asyncio.Future] = fetch(None)
+    try:
+        while pending is not None:
+            rows = (await pending).data
+            cursor = next_cursor(rows, page_size)
+            pending = fetch(cursor) if cursor else None
+            if rows:
+                yield rows
+    finally:
+        if pending is not None:
+            pending.cancel()
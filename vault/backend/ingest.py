@@ -0,0 +1,215 @@
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Dict, List, Tuple
+import asyncio
+import codecs
+import inspect
+import json
+import time
+from vault.backend.data_access import DataAccess, is_data_error
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+
+async def _text(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """Decode a byte stream as UTF-8 without splitting characters across chunks."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    async for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+async def iter_ndjson(text: AsyncIterable[str],
+                      max_element: int = 1 << 20) -> AsyncIterator[Tuple[int, Any]]:
+    """Yield (index, value) per non-blank line; value is the ValueError for a malformed line.
+
+    Lines longer than max_element characters are reported and skipped, which
+    bounds the buffer.
+    """
+    buffer = ""
+    index = 0
+    skipping = False
+    async for piece in text:
+        if skipping:
+            if "\n" not in piece:
+                continue
+            piece = piece[piece.index("\n") + 1:]
+            skipping = False
+        buffer += piece
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            if line.strip():
+                yield index, _loads(line)
+                index += 1
+        if len(buffer) > max_element:
+            yield index, ValueError(f"Line longer than {max_element} characters")
+            index += 1
+            buffer = ""
+            skipping = True
+    if buffer.strip() and not skipping:
+        yield index, _loads(buffer)
+
+async def iter_json_array(text: AsyncIterable[str],
+                          max_element: int = 1 << 20) -> AsyncIterator[Tuple[int, Any]]:
+    """Yield (index, value) per element of a JSON array as it arrives.
+
+    A syntax error cannot be skipped inside an array, so it is yielded once
+    as a ValueError and the rest of the body is discarded. Elements longer
+    than max_element characters are treated as syntax errors, which bounds
+    the buffer.
+    """
+    buffer = ""
+    position = 0
+    index = 0
+    # "open": expect "[", "value": expect an element or "]", "next": expect "," or "]"
+    state = "open"
+    pieces = text.__aiter__()
+    while True:
+        try:
+            buffer = buffer[position:] + await pieces.__anext__()
+            position = 0
+            more = True
+        except StopAsyncIteration:
+            more = False
+        while True:
+            while position < len(buffer) and buffer[position] in _WHITESPACE:
+                position += 1
+            if position == len(buffer):
+                break
+            char = buffer[position]
+            if state == "open" or state == "next":
+                expected = "[" if state == "open" else ",]"
+                if char not in expected:
+                    yield index, ValueError(f"Expected {' or '.join(expected)} at element {index}")
+                    return
+                if char == "]":
+                    return
+                position += 1
+                state = "value"
+                continue
+            if char == "]" and index == 0:
+                return
+            try:
+                value, end = _decoder.raw_decode(buffer, position)
+            except ValueError as error:
+                if more and len(buffer) - position <= max_element:
+                    # Probably an element cut off at the chunk boundary
+                    break
+                yield index, error
+                return
+            if end == len(buffer) and more and isinstance(value, (int, float)):
+                # A number may continue in the next chunk
+                break
+            yield index, value
+            index += 1
+            position = end
+            state = "next"
+        if not more:
+            yield index, ValueError("Unterminated JSON array" if state != "open" else "Empty body")
+            return
+
+async def iter_body(chunks: AsyncIterable[bytes]) -> AsyncIterator[Tuple[int, Any]]:
+    """Yield (index, value) from a streamed JSON array or NDJSON body, by its first character."""
+    text = _text(chunks).__aiter__()
+    first = ""
+    async for piece in text:
+        first += piece
+        if first.strip():
+            break
+
+    async def replay() -> AsyncIterator[str]:
+        yield first
+        async for piece in text:
+            yield piece
+
+    parse = iter_json_array if first.lstrip().startswith("[") else iter_ndjson
+    async for item in parse(replay()):
+        yield item
+
+def _loads(line: str) -> Any:
+    try:
+        return json.loads(line)
+    except ValueError as error:
+        return error
+
+async def ingest_entries(data_access: DataAccess,
+                         items: AsyncIterable[Tuple[int, Any]],
+                         validate: Callable[[Any], Dict[str, Any]],
+                         table: str = "vault_entries",
+                         chunk_size: int = 500,
+                         max_in_flight: int = 2,
+                         max_errors: int = 100) -> Dict[str, Any]:
+    """Validate and insert streamed rows in bounded chunks.
+
+    validate turns one parsed item into a row (or an awaitable of one) or
+    raises ValueError/TypeError.
+    Invalid items and rows the store rejects are reported individually (the
+    first max_errors of them) and never abort the rest. A chunk that fails
+    for another reason, such as a timeout, is reported as failed without
+    retrying. At most max_in_flight chunks are buffered, so memory stays
+    flat whatever the body size.
+    """
+    stats = {"received": 0, "inserted": 0, "failed": 0, "errors": []}
+    in_flight: "set[asyncio.Task]" = set()
+    chunk: List[Tuple[int, Dict[str, Any]]] = []
+
+    def fail(index: int, error: Any) -> None:
+        stats["failed"] += 1
+        if len(stats["errors"]) < max_errors:
+            stats["errors"].append({"index": index, "error": str(error)})
+
+    async def insert(rows: List[Tuple[int, Dict[str, Any]]]) -> None:
+        try:
+            await data_access.table(table, module=__name__).insert([row for _, row in rows], returning="minimal").execute()
+            stats["inserted"] += len(rows)
+            return
+        except Exception as error:
+            # The traceback's frames hold the chunk; drop them now rather than at the next GC
+            error.__traceback__ = None
+            if len(rows) == 1 or not is_data_error(error):
+                # Retrying a transient failure would only repeat it, or insert rows twice
+                for index, _ in rows:
+                    fail(index, error)
+                return
+        # Bisect to the rejected rows so the rest still land in few calls
+        middle = len(rows) // 2
+        await insert(rows[:middle])
+        await insert(rows[middle:])
+
+    async def send(rows: List[Tuple[int, Dict[str, Any]]]) -> None:
+        while len(in_flight) >= max_in_flight:
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            in_flight.difference_update(done)
+        in_flight.add(asyncio.ensure_future(insert(rows)))
+
+    started = time.perf_counter()
+    try:
+        async for index, item in items:
+            stats["received"] += 1
+            if isinstance(item, Exception):
+                fail(index, item)
+                continue
+            try:
+                row = validate(item)
+                if inspect.isawaitable(row):
+                    row = await row
+                chunk.append((index, row))
+            except (TypeError, ValueError) as error:
+                fail(index, error)
+                continue
+            if len(chunk) >= chunk_size:
+                await send(chunk)
+                chunk = []
+        if chunk:
+            await send(chunk)
+        if in_flight:
+            await asyncio.wait(in_flight)
+    finally:
+        for task in in_flight:
+            task.cancel()
+
+    elapsed = time.perf_counter() - started
+    stats["seconds"] = elapsed
+    stats["per_second"] = stats["received"] / elapsed if elapsed else 0.0
+    return stats
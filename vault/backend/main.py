@@ -1,9 +1,16 @@
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Request, Response
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
-from supabase import create_client, Client
+from fastapi.responses import StreamingResponse
 from typing import Optional
+import json
 import os
 from dotenv import load_dotenv
+from vault.backend.coalesce import RowLoader
+from vault.backend.data_access import get_data_access, iter_keyset, keyset_page, next_cursor
+from vault.backend.ingest import ingest_entries, iter_body
+from vault.backend.response_cache import CachedResponse, ResponseCache
+from vault.backend.schema_cache import SchemaCache, SchemaValidationError
 
 load_dotenv()
 
@@ -18,12 +25,26 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Supabase client
-supabase: Client = create_client(
-    os.getenv("SUPABASE_URL"),
-    os.getenv("SUPABASE_KEY")
+# Shared data-access layer (one pooled supabase client for every module)
+db = get_data_access().for_module(__name__)
+
+# Compiled validators for registered schemas, so entry writes don't re-read the registry
+schema_cache = SchemaCache(db, ttl=float(os.getenv("VAULT_SCHEMA_CACHE_TTL", "60")))
+
+# Concurrent get_entry misses share queries (DATA_ACCESS_COALESCE)
+entry_loader = RowLoader(db, "vault_entries")
+
+# Serialized read responses, invalidated by the write routes; the TTL bounds
+# staleness from writes made by other processes
+response_cache = ResponseCache(
+    max_bytes=int(os.getenv("VAULT_RESPONSE_CACHE_BYTES", str(64 << 20))),
+    ttl=float(os.getenv("VAULT_RESPONSE_CACHE_TTL", "30"))
 )
 
+@app.on_event("shutdown")
+async def close_data_access():
+    await db.aclose()
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to the Vault API"}
@@ -32,6 +53,13 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/metrics")
+async def metrics():
+    # Per (module, table, operation) data-access metrics in the Prometheus text format;
+    # empty unless DATA_ACCESS_METRICS=1
+    body = db.metrics.render() if db.metrics is not None else ""
+    return Response(content=body, media_type="text/plain; version=0.0.4; charset=utf-8")
+
 # Data Models
 from pydantic import BaseModel
 from datetime import datetime
@@ -51,6 +79,7 @@ class SchemaField(BaseModel):
     type: str
     unit: Optional[str] = None
     description: Optional[str] = None
+    required: bool = False
 
 class SchemaRegistryEntry(BaseModel):
     type: str
@@ -61,53 +90,147 @@ class SchemaRegistryEntry(BaseModel):
     visibility: Optional[str] = "private"
     ui_widget_hint: Optional[str] = None
 
+async def validate_entry(entry: VaultEntry) -> None:
+    """Check entry content against its data type's schema (metadata.schema_version, else the latest)."""
+    version = entry.metadata.get("schema_version")
+    await schema_cache.validate(entry.data_type, entry.content, int(version) if version is not None else None)
+
+def _json_body(data: Any) -> bytes:
+    return json.dumps(data, default=str).encode()
+
+def _respond(request: Request, cached: CachedResponse) -> Response:
+    """Send a cached response, or 304 if the client's copy is current."""
+    if cached.not_modified(request.headers.get("if-none-match"), request.headers.get("if-modified-since")):
+        return Response(status_code=304, headers=cached.headers)
+    return Response(content=cached.body, media_type="application/json", headers=cached.headers)
+
 # Routes
 @app.post("/vault/entries")
 async def create_entry(entry: VaultEntry):
     try:
-        result = supabase.table("vault_entries").insert(entry.dict()).execute()
+        await validate_entry(entry)
+        result = await db.table("vault_entries").insert(jsonable_encoder(entry)).execute()
+        entry_loader.forget(entry.id)
+        response_cache.invalidate(f"user:{entry.user_id}", f"entry:{entry.id}")
         return result.data
+    except SchemaValidationError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@app.get("/vault/entries/{entry_id}")
-async def get_entry(entry_id: str):
+@app.post("/vault/entries/bulk")
+async def bulk_create_entries(request: Request):
+    # Body is a JSON array or NDJSON of entries, parsed and inserted as it streams in;
+    # invalid or rejected rows are reported by index without failing the rest
+    users = set()
+    # data_type -> registry error; rows of a type whose schema could not be fetched
+    # fail at once instead of each waiting out the same failure
+    unavailable = {}
+
+    async def validate(item):
+        entry = VaultEntry(**item)
+        if entry.data_type in unavailable:
+            raise ValueError(unavailable[entry.data_type])
+        try:
+            await validate_entry(entry)
+        except (TypeError, ValueError):
+            raise
+        except Exception as e:
+            unavailable[entry.data_type] = f"Schema registry unavailable for {entry.data_type}: {e}"
+            raise ValueError(unavailable[entry.data_type]) from None
+        users.add(entry.user_id)
+        return jsonable_encoder(entry)
+
     try:
-        result = supabase.table("vault_entries").select("*").eq("id", entry_id).execute()
-        if not result.data:
+        return await ingest_entries(
+            db,
+            iter_body(request.stream()),
+            validate,
+            chunk_size=int(os.getenv("VAULT_INGEST_CHUNK_SIZE", "500")),
+            max_in_flight=int(os.getenv("VAULT_INGEST_MAX_IN_FLIGHT", "2"))
+        )
+    finally:
+        response_cache.invalidate(*(f"user:{user_id}" for user_id in users))
+
+@app.get("/vault/entries/{entry_id}")
+async def get_entry(entry_id: str, request: Request):
+    # Served from the response cache (or as 304) until the entry's user writes again
+    key = f"entry:{entry_id}"
+    cached = response_cache.get(key)
+    if cached is None:
+        version = response_cache.version
+        try:
+            entry = await entry_loader.get(entry_id)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if entry is None:
             raise HTTPException(status_code=404, detail="Entry not found")
-        return result.data[0]
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        cached = response_cache.put(key, [entry], _json_body(entry), version,
+                                    tags=(key, f"user:{entry['user_id']}"))
+    return _respond(request, cached)
+
+def _entries_query(user_id: str, data_type: Optional[str]):
+    query = db.table("vault_entries").select("*").eq("user_id", user_id)
+    if data_type:
+        query = query.eq("data_type", data_type)
+    return query
 
 @app.get("/vault/entries")
 async def list_entries(
+    request: Request,
     user_id: str,
     data_type: Optional[str] = None,
     limit: int = 100,
-    offset: int = 0
+    offset: int = 0,
+    cursor: Optional[str] = None
 ):
-    try:
-        query = supabase.table("vault_entries").select("*").eq("user_id", user_id)
-        if data_type:
-            query = query.eq("data_type", data_type)
-        result = query.range(offset, offset + limit - 1).execute()
-        return result.data
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+    # Newest first; X-Next-Cursor continues after this page (offset is ignored with a cursor)
+    key = f"entries:{user_id}:{data_type}:{limit}:{offset}:{cursor}"
+    cached = response_cache.get(key)
+    if cached is None:
+        version = response_cache.version
+        try:
+            query = _entries_query(user_id, data_type)
+            if cursor:
+                query = keyset_page(query, limit, cursor)
+            else:
+                query = query.order("created_at", desc=True).order("id", desc=True).range(offset, offset + limit - 1)
+            result = await query.execute()
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        following = next_cursor(result.data, limit)
+        cached = response_cache.put(key, result.data, _json_body(result.data), version,
+                                    tags=(f"user:{user_id}",),
+                                    extra_headers={"X-Next-Cursor": following} if following else None)
+    return _respond(request, cached)
+
+@app.get("/vault/export")
+async def export_entries(
+    user_id: str,
+    data_type: Optional[str] = None,
+    page_size: int = 1000
+):
+    # Streams NDJSON page by page; the result set is never held in memory
+    if page_size < 1:
+        raise HTTPException(status_code=400, detail="page_size must be positive")
+
+    async def lines():
+        async for rows in iter_keyset(lambda: _entries_query(user_id, data_type), page_size):
+            yield "".join(json.dumps(row, default=str) + "\n" for row in rows)
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
 
 @app.post("/schemas/register")
 async def register_schema(schema: SchemaRegistryEntry):
-    # Check if schema with type and version already exists
-    existing = supabase.table("schema_registry").select("*") \
-        .eq("type", schema.type).eq("version", schema.version).execute()
-    if existing.data:
-        raise HTTPException(status_code=409, detail="Schema with this type and version already exists.")
+    # The unique (type, version) index rejects duplicates, so no lookup first
     try:
-        result = supabase.table("schema_registry").insert(schema.dict()).execute()
-        return {"message": "Schema registered successfully", "schema": result.data}
+        result = await db.table("schema_registry").insert(schema.dict()).execute()
     except Exception as e:
+        if getattr(e, "code", None) == "23505":
+            raise HTTPException(status_code=409, detail="Schema with this type and version already exists.")
         raise HTTPException(status_code=400, detail=str(e))
+    schema_cache.invalidate(schema.type)
+    return {"message": "Schema registered successfully", "schema": result.data}
 
 if __name__ == "__main__":
     import uvicorn
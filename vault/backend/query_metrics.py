@@ -0,0 +1,196 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from bisect import bisect_left
+import json
+import logging
+import os
+import sys
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the histogram buckets; a final +Inf bucket is implied
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROW_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000)
+BYTE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1 << 20, 4 << 20, 16 << 20)
+
+def caller_module(depth: int = 1) -> str:
+    """Name of the module depth frames above the caller."""
+    return sys._getframe(depth + 1).f_globals.get("__name__", "?")
+
+_encoder = json.JSONEncoder(default=str, separators=(",", ":"))
+
+def payload_size(payload: Any) -> int:
+    """Characters in payload serialized as a compact JSON request body (bytes for ASCII)."""
+    if payload is None:
+        return 0
+    return len(_encoder.encode(payload))
+
+class Histogram:
+    """Fixed-bucket histogram; observe() is a bisect and three additions."""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, fraction: float) -> float:
+        """Upper bound of the bucket holding the fraction-th observation (inf past the last bound)."""
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(self.bounds + (float("inf"),), self.counts):
+            seen += count
+            if seen >= rank and seen:
+                return bound
+        return 0.0
+
+class QuerySeries:
+    """Everything recorded for one (module, table, operation)."""
+
+    __slots__ = ("duration", "rows", "payload_bytes", "errors", "slow")
+
+    def __init__(self):
+        self.duration = Histogram(DURATION_BUCKETS)
+        self.rows = Histogram(ROW_BUCKETS)
+        self.payload_bytes = Histogram(BYTE_BUCKETS)
+        self.errors: Dict[str, int] = {}
+        self.slow = 0
+
+class QueryMetrics:
+    """Per-query timings, row counts, request payload sizes and errors.
+
+    Series are keyed by (module, table, operation), where operation is
+    select/insert/upsert/update/delete or rpc. Request payload sizes are
+    only recorded with record_payload_bytes (DATA_ACCESS_METRICS_PAYLOAD=1).
+    Queries slower than slow_query_seconds are also logged as warnings.
+    render() returns the Prometheus text exposition format.
+    """
+
+    def __init__(self,
+                 slow_query_seconds: Optional[float] = None,
+                 record_payload_bytes: Optional[bool] = None):
+        if slow_query_seconds is None and os.getenv("DATA_ACCESS_SLOW_QUERY_MS"):
+            slow_query_seconds = float(os.getenv("DATA_ACCESS_SLOW_QUERY_MS")) / 1000
+        self.slow_query_seconds = slow_query_seconds
+        # Opt-in: sizing a write serializes its payload once more, on the worker thread
+        self.record_payload_bytes = record_payload_bytes if record_payload_bytes is not None \
+            else os.getenv("DATA_ACCESS_METRICS_PAYLOAD", "0") == "1"
+        self._series: Dict[Tuple[str, str, str], QuerySeries] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, key: Tuple[str, str, str]) -> QuerySeries:
+        series = self._series.get(key)
+        if series is None:
+            with self._lock:
+                series = self._series.setdefault(key, QuerySeries())
+        return series
+
+    def observe(self,
+                module: str,
+                table: str,
+                operation: str,
+                seconds: float,
+                rows: int = 0,
+                payload_bytes: Optional[int] = None,
+                error: Optional[BaseException] = None) -> None:
+        """Record one finished query."""
+        series = self._get((module, table, operation))
+        with self._lock:
+            series.duration.observe(seconds)
+            if error is not None:
+                name = type(error).__name__
+                series.errors[name] = series.errors.get(name, 0) + 1
+            else:
+                series.rows.observe(rows)
+            if payload_bytes is not None:
+                series.payload_bytes.observe(payload_bytes)
+            slow = self.slow_query_seconds is not None and seconds >= self.slow_query_seconds
+            if slow:
+                series.slow += 1
+        if slow:
+            logger.warning(
+                "Slow query: %s %s.%s took %.1f ms (%d rows%s)",
+                module, table, operation, seconds * 1000, rows,
+                f", {type(error).__name__}" if error is not None else ""
+            )
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Return one summary per series, slowest total time first."""
+        summaries = []
+        with self._lock:
+            for (module, table, operation), series in self._series.items():
+                calls = series.duration.count
+                summaries.append({
+                    "module": module,
+                    "table": table,
+                    "operation": operation,
+                    "calls": calls,
+                    "errors": sum(series.errors.values()),
+                    "slow": series.slow,
+                    "total_seconds": series.duration.sum,
+                    "mean_ms": series.duration.sum / calls * 1000 if calls else 0.0,
+                    "p99_ms_bound": series.duration.quantile(0.99) * 1000,
+                    "rows": int(series.rows.sum),
+                    "payload_bytes": int(series.payload_bytes.sum)
+                })
+        return sorted(summaries, key=lambda summary: summary["total_seconds"], reverse=True)
+
+    def render(self) -> str:
+        """Return every series in the Prometheus text exposition format."""
+        with self._lock:
+            items = sorted(self._series.items())
+            lines: List[str] = []
+            for name, kind, help_text, pick in (
+                ("data_access_query_duration_seconds", "histogram", "Data-access query latency, including executor wait.",
+                 lambda series: series.duration),
+                ("data_access_query_rows", "histogram", "Rows returned per successful query.",
+                 lambda series: series.rows),
+                ("data_access_query_payload_bytes", "histogram", "JSON request body bytes per write or rpc.",
+                 lambda series: series.payload_bytes)
+            ):
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+                for key, series in items:
+                    histogram = pick(series)
+                    if histogram.count:
+                        lines += _histogram_lines(name, _labels(key), histogram)
+            lines += ["# HELP data_access_query_errors_total Failed queries by exception type.",
+                      "# TYPE data_access_query_errors_total counter"]
+            for key, series in items:
+                for error, count in sorted(series.errors.items()):
+                    lines.append(f"data_access_query_errors_total{{{_labels(key)},error=\"{_escape(error)}\"}} {count}")
+            lines += ["# HELP data_access_slow_queries_total Queries at or above the slow-query threshold.",
+                      "# TYPE data_access_slow_queries_total counter"]
+            for key, series in items:
+                if series.slow:
+                    lines.append(f"data_access_slow_queries_total{{{_labels(key)}}} {series.slow}")
+        return "\n".join(lines) + "\n"
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(key: Tuple[str, str, str]) -> str:
+    module, table, operation = key
+    return f'module="{_escape(module)}",table="{_escape(table)}",operation="{_escape(operation)}"'
+
+def _format(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+def _histogram_lines(name: str, labels: str, histogram: Histogram) -> Iterable[str]:
+    cumulative = 0
+    for bound, count in zip(histogram.bounds, histogram.counts):
+        cumulative += count
+        yield f'{name}_bucket{{{labels},le="{_format(bound)}"}} {cumulative}'
+    yield f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}'
+    yield f"{name}_sum{{{labels}}} {_format(histogram.sum)}"
+    yield f"{name}_count{{{labels}}} {histogram.count}"
@@ -0,0 +1,165 @@
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Set
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+import hashlib
+import time
+
+def entity_tag(rows: Iterable[Mapping[str, Any]]) -> str:
+    """Weak ETag over the (id, updated_at) of every row in a response."""
+    digest = hashlib.blake2b(digest_size=16)
+    for row in rows:
+        digest.update(f"{row.get('id')}|{row.get('updated_at')}\n".encode())
+    return f'W/"{digest.hexdigest()}"'
+
+def _timestamp(value: Any) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        parsed = value
+    elif isinstance(value, str):
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    else:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    # HTTP dates have whole-second precision
+    return parsed.astimezone(timezone.utc).replace(microsecond=0)
+
+def last_modified(rows: Iterable[Mapping[str, Any]]) -> Optional[datetime]:
+    """Latest updated_at among rows, or None if none is set."""
+    stamps = [stamp for stamp in (_timestamp(row.get("updated_at")) for row in rows) if stamp is not None]
+    return max(stamps) if stamps else None
+
+class CachedResponse:
+    """A serialized JSON response body with its validators and extra headers."""
+
+    __slots__ = ("body", "etag", "last_modified", "extra_headers", "tags", "expires")
+
+    def __init__(self,
+                 body: bytes,
+                 etag: str,
+                 modified: Optional[datetime] = None,
+                 extra_headers: Optional[Dict[str, str]] = None,
+                 tags: Iterable[str] = (),
+                 expires: float = float("inf")):
+        self.body = body
+        self.etag = etag
+        self.last_modified = modified
+        self.extra_headers = dict(extra_headers or {})
+        self.tags = tuple(tags)
+        self.expires = expires
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        """Validator headers plus any extra headers, for 200 and 304 responses alike."""
+        headers = {"ETag": self.etag, "Cache-Control": "no-cache", **self.extra_headers}
+        if self.last_modified is not None:
+            headers["Last-Modified"] = format_datetime(self.last_modified, usegmt=True)
+        return headers
+
+    def not_modified(self, if_none_match: Optional[str], if_modified_since: Optional[str]) -> bool:
+        """Whether a conditional GET with these request headers should get 304.
+
+        If-None-Match wins when present (weak comparison); otherwise
+        If-Modified-Since is compared with Last-Modified.
+        """
+        if if_none_match is not None:
+            tags = {tag.strip() for tag in if_none_match.split(",")}
+            return "*" in tags or self.etag in tags or self.etag[2:] in tags
+        if if_modified_since is not None and self.last_modified is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=timezone.utc)
+            return self.last_modified <= since
+        return False
+
+class ResponseCache:
+    """Size-bounded LRU cache of serialized read responses.
+
+    Entries carry tags (e.g. "user:<id>"); write paths call invalidate() with
+    the tags they touch, so a cached response is served until the data under
+    it changes in this process. ttl bounds how long a response can outlive a
+    write made by another process.
+    """
+
+    def __init__(self, max_bytes: int = 64 << 20, ttl: float = 30.0):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._tagged: Dict[str, Set[str]] = {}
+        self.size = 0
+        # Bumped on every invalidation so responses built from older reads are not cached
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """Return a live cached response, or None."""
+        cached = self._entries.get(key)
+        if cached is None or cached.expires <= time.monotonic():
+            if cached is not None:
+                self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return cached
+
+    def put(self,
+            key: str,
+            rows: List[Mapping[str, Any]],
+            body: bytes,
+            version: int,
+            tags: Iterable[str] = (),
+            extra_headers: Optional[Dict[str, str]] = None) -> CachedResponse:
+        """Cache body serialized from rows read at version; returns the response either way."""
+        cached = CachedResponse(body, entity_tag(rows), last_modified(rows), extra_headers, tags,
+                                time.monotonic() + self.ttl)
+        if version != self.version or len(body) > self.max_bytes:
+            return cached
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = cached
+        self.size += len(body)
+        for tag in cached.tags:
+            self._tagged.setdefault(tag, set()).add(key)
+        while self.size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+        return cached
+
+    def invalidate(self, *tags: str) -> None:
+        """Drop every response carrying any of the tags."""
+        self.version += 1
+        for tag in tags:
+            for key in self._tagged.pop(tag, ()):
+                if key in self._entries:
+                    self._remove(key)
+
+    def _remove(self, key: str) -> None:
+        cached = self._entries.pop(key)
+        self.size -= len(cached.body)
+        for tag in cached.tags:
+            keys = self._tagged.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tagged[tag]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return entry count, bytes held and hit/miss/eviction counters."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions
+        }
@@ -0,0 +1,168 @@
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+from datetime import datetime
+import asyncio
+import time
+from vault.backend.data_access import DataAccess
+
+class SchemaValidationError(ValueError):
+    """Entry content does not match its registered schema."""
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def _is_integer(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def _is_timestamp(value: Any) -> bool:
+    if not isinstance(value, str):
+        return False
+    try:
+        datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return False
+    return True
+
+# Schema field types and their checks; unknown types accept any value
+FIELD_CHECKS: Dict[str, Callable[[Any], bool]] = {
+    "string": lambda value: isinstance(value, str),
+    "text": lambda value: isinstance(value, str),
+    "number": _is_number,
+    "float": _is_number,
+    "integer": _is_integer,
+    "int": _is_integer,
+    "boolean": lambda value: isinstance(value, bool),
+    "bool": lambda value: isinstance(value, bool),
+    "date": _is_timestamp,
+    "datetime": _is_timestamp,
+    "timestamp": _is_timestamp,
+    "object": lambda value: isinstance(value, dict),
+    "json": lambda value: isinstance(value, (dict, list)),
+    "array": lambda value: isinstance(value, list),
+    "list": lambda value: isinstance(value, list)
+}
+
+def compile_schema(fields: Iterable[Mapping[str, Any]]) -> Callable[[Any], None]:
+    """Compile a schema's field list into a validator that raises SchemaValidationError.
+
+    Listed fields may be missing or null unless marked required; fields not
+    in the schema are allowed.
+    """
+    checks: List[Tuple[str, str, Optional[Callable[[Any], bool]], bool]] = []
+    for field in fields:
+        kind = str(field.get("type") or "").lower()
+        checks.append((field["name"], kind, FIELD_CHECKS.get(kind), bool(field.get("required"))))
+    checks_tuple = tuple(checks)
+
+    def validate(content: Any) -> None:
+        if not isinstance(content, dict):
+            raise SchemaValidationError("Entry content must be an object")
+        errors = []
+        for name, kind, check, required in checks_tuple:
+            value = content.get(name)
+            if value is None:
+                if required:
+                    errors.append(f"{name} is required")
+            elif check is not None and not check(value):
+                errors.append(f"{name} must be {kind}")
+        if errors:
+            raise SchemaValidationError("; ".join(errors))
+
+    return validate
+
+class SchemaCache:
+    """In-process cache of compiled schema validators, keyed by (type, version).
+
+    All versions of a type are fetched in one query on first use. Registered
+    versions never change, so their validators are kept for the life of the
+    process; the version list (and the absence of a schema) is re-read after
+    ttl seconds, or at once when invalidate() is called after a registration.
+    """
+
+    def __init__(self, data_access: DataAccess, ttl: float = 60.0):
+        self.db = data_access.for_module(__name__)
+        self.ttl = ttl
+        self._validators: Dict[Tuple[str, int], Callable[[Any], None]] = {}
+        # type -> (registered versions in ascending order, loaded at)
+        self._versions: Dict[str, Tuple[List[int], float]] = {}
+        self._loading: Dict[str, asyncio.Future] = {}
+        # Bumped by invalidate() so loads that raced a registration are not kept
+        self.version = 0
+        self.loads = 0
+
+    async def validator(self,
+                        schema_type: str,
+                        version: Optional[int] = None) -> Optional[Callable[[Any], None]]:
+        """Return the validator for a schema version (default: latest), or None if the type is unregistered."""
+        entry = self._versions.get(schema_type)
+        if entry is not None and entry[1] + self.ttl <= time.monotonic():
+            entry = None
+        while entry is None:
+            await self._load(schema_type)
+            entry = self._versions.get(schema_type)
+        versions = entry[0]
+        if not versions:
+            return None
+        if version is None:
+            version = versions[-1]
+        validator = self._validators.get((schema_type, version))
+        if validator is None:
+            raise SchemaValidationError(f"Schema {schema_type} has no version {version}")
+        return validator
+
+    async def validate(self,
+                       schema_type: str,
+                       content: Any,
+                       version: Optional[int] = None) -> bool:
+        """Validate content against its schema; returns False if the type has no schema."""
+        validator = await self.validator(schema_type, version)
+        if validator is None:
+            return False
+        validator(content)
+        return True
+
+    def invalidate(self, schema_type: str) -> None:
+        """Re-read a type's versions on next use, e.g. after registering a new one."""
+        self.version += 1
+        self._versions.pop(schema_type, None)
+        self._loading.pop(schema_type, None)
+
+    async def _load(self, schema_type: str) -> None:
+        # Concurrent misses for one type share a single query
+        pending = self._loading.get(schema_type)
+        if pending is not None:
+            try:
+                await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # The caller running the query was cancelled; run it here instead
+                await self._load(schema_type)
+            return
+        pending = self._loading[schema_type] = asyncio.get_running_loop().create_future()
+        version = self.version
+        try:
+            result = await self.db.table("schema_registry")\
+                .select("type,version,fields")\
+                .eq("type", schema_type)\
+                .execute()
+            self.loads += 1
+            versions = []
+            for row in result.data:
+                key = (schema_type, int(row["version"]))
+                if key not in self._validators:
+                    self._validators[key] = compile_schema(row["fields"])
+                versions.append(key[1])
+            if version == self.version:
+                self._versions[schema_type] = (sorted(versions), time.monotonic())
+            pending.set_result(None)
+        except asyncio.CancelledError:
+            pending.cancel()
+            raise
+        except Exception as error:
+            pending.set_exception(error)
+            # Waiters see the error; retrieve it here so it is never reported as unhandled
+            pending.exception()
+            raise
+        finally:
+            if self._loading.get(schema_type) is pending:
+                del self._loading[schema_type]